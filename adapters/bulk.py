@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+BlackRoad Foundation — Adapter bulk-write results
+Shared bookkeeping for ``create_many``/``update_many`` across CRM adapters.
+
+A bulk write is split into API-sized chunks that run concurrently; a
+:class:`BulkResult` lines every outcome back up with the caller's input
+order, so partial failures are reported per record rather than per chunk.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional, Sequence
+
+
+def chunks(items: Sequence, size: int) -> Iterator[tuple[int, Sequence]]:
+    """(offset, slice) pairs covering ``items`` in ``size``-sized pieces."""
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
+
+
+@dataclass
+class BulkResult:
+    """Per-record outcome of a bulk write, indexed like the input records."""
+
+    ids: list[Optional[str]]
+    errors: dict[int, list[Any]] = field(default_factory=dict)
+    calls: int = 0
+
+    @classmethod
+    def sized(cls, n: int) -> "BulkResult":
+        return cls(ids=[None] * n)
+
+    @property
+    def succeeded(self) -> int:
+        return len(self.ids) - len(self.errors)
+
+    @property
+    def failed(self) -> int:
+        return len(self.errors)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def success(self, index: int, record_id: Optional[str]) -> None:
+        self.ids[index] = record_id
+
+    def failure(self, index: int, errors: list[Any]) -> None:
+        self.errors[index] = errors
+
+    def fail_chunk(self, start: int, size: int, error: Exception) -> None:
+        """A whole request failed: every record in it gets the same error."""
+        for i in range(start, start + size):
+            self.errors[i] = [{"message": str(error), "type": type(error).__name__}]
+
+    def summary(self) -> dict:
+        return {"records": len(self.ids), "succeeded": self.succeeded, "failed": self.failed,
+                "calls": self.calls, "errors": {str(i): e for i, e in sorted(self.errors.items())}}
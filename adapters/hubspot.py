@@ -4,11 +4,25 @@ BlackRoad Foundation — HubSpot CRM Adapter
 Wraps the HubSpot v3 API with a unified BlackRoad interface.
 """
 from __future__ import annotations
+import asyncio
 import os
-from typing import Any
+from typing import Any, AsyncIterator, Iterator, Sequence
 import httpx
 
+try:
+    from .bulk import BulkResult, chunks
+    from .pagination import aiter_pages, iter_pages
+except ImportError:  # run as a script from adapters/
+    from bulk import BulkResult, chunks
+    from pagination import aiter_pages, iter_pages
+
 HUBSPOT_BASE = "https://api.hubapi.com"
+PAGE_LIMIT = 100   # HubSpot's maximum page size for CRM object listings
+BATCH_LIMIT = 100  # inputs per /batch/create or /batch/update call
+DEFAULT_PROPERTIES = {
+    "contacts": "firstname,lastname,email,company,phone",
+    "deals": "dealname,amount,dealstage,closedate",
+}
 
 
 class HubSpotAdapter:
@@ -18,11 +32,155 @@ class HubSpotAdapter:
         token = access_token or os.getenv("HUBSPOT_ACCESS_TOKEN")
         if not token:
             raise ValueError("HUBSPOT_ACCESS_TOKEN required")
-        self._client = httpx.AsyncClient(
-            base_url=HUBSPOT_BASE,
-            headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
-            timeout=30,
-        )
+        self._headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+        self._client = httpx.AsyncClient(base_url=HUBSPOT_BASE, headers=self._headers, timeout=30)
+        self._sync_client: httpx.Client | None = None
+
+    def _sync(self) -> httpx.Client:
+        # Blocking twin of _client for iter_query; created on first use.
+        if self._sync_client is None:
+            self._sync_client = httpx.Client(base_url=HUBSPOT_BASE, headers=self._headers, timeout=30)
+        return self._sync_client
+
+    def close(self) -> None:
+        """Close the blocking client behind ``iter_query``; ``aclose()`` closes both."""
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+
+    async def aclose(self) -> None:
+        self.close()
+        await self._client.aclose()
+
+    def __enter__(self) -> "HubSpotAdapter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "HubSpotAdapter":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    # ── Pagination ────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _page_params(object_type: str, properties: str | None, page_size: int, after: str | None) -> dict:
+        params: dict = {"limit": min(page_size, PAGE_LIMIT)}
+        props = properties or DEFAULT_PROPERTIES.get(object_type.lower())
+        if props:
+            params["properties"] = props
+        if after:
+            params["after"] = after
+        return params
+
+    @staticmethod
+    def _page(r: httpx.Response) -> tuple[list[dict], str | None]:
+        r.raise_for_status()
+        data = r.json()
+        return data.get("results", []), ((data.get("paging") or {}).get("next") or {}).get("after")
+
+    def iter_query(self, object_type: str, *, properties: str | None = None,
+                   page_size: int = PAGE_LIMIT, prefetch: bool = True) -> Iterator[dict]:
+        """Stream every ``object_type`` record, following ``paging.next.after`` with read-ahead."""
+        path = f"/crm/v3/objects/{object_type.lower()}"
+        return iter_pages(lambda after: self._page(self._sync().get(
+            path, params=self._page_params(object_type, properties, page_size, after))), prefetch=prefetch)
+
+    def aiter_query(self, object_type: str, *, properties: str | None = None,
+                    page_size: int = PAGE_LIMIT, prefetch: bool = True) -> AsyncIterator[dict]:
+        """Async :meth:`iter_query` on the shared async client."""
+        path = f"/crm/v3/objects/{object_type.lower()}"
+
+        async def fetch(after):
+            return self._page(await self._client.get(
+                path, params=self._page_params(object_type, properties, page_size, after)))
+        return aiter_pages(fetch, prefetch=prefetch)
+
+    # ── Bulk writes (/batch/create, /batch/update) ────────────────────────────
+
+    async def create_many(self, object_type: str, records: Sequence[dict], *,
+                          chunk_size: int = BATCH_LIMIT, concurrency: int = 4) -> BulkResult:
+        """
+        Create ``object_type`` records from property dicts, 100 per batch call
+        and ``concurrency`` calls at a time. An optional ``associations`` key
+        on a record is passed through. ``BulkResult.ids`` follows input order.
+        """
+        inputs = []
+        for i, r in enumerate(records):
+            props = {k: v for k, v in r.items() if k != "associations"}
+            item: dict[str, Any] = {"properties": props, "objectWriteTraceId": str(i)}
+            if "associations" in r:
+                item["associations"] = r["associations"]
+            inputs.append(item)
+        return await self._batch(object_type, "create", inputs, chunk_size, concurrency)
+
+    async def update_many(self, object_type: str, records: Sequence[dict], *,
+                          chunk_size: int = BATCH_LIMIT, concurrency: int = 4) -> BulkResult:
+        """Update records given as ``{"id": ..., **properties}`` like :meth:`create_many`."""
+        missing = [i for i, r in enumerate(records) if not r.get("id")]
+        if missing:
+            raise ValueError(f"update_many: records {missing[:5]} have no id")
+        inputs = [{"id": str(r["id"]), "properties": {k: v for k, v in r.items() if k != "id"}}
+                  for r in records]
+        return await self._batch(object_type, "update", inputs, chunk_size, concurrency)
+
+    async def _batch(self, object_type: str, action: str, inputs: list[dict],
+                     chunk_size: int, concurrency: int) -> BulkResult:
+        result = BulkResult.sized(len(inputs))
+        path = f"/crm/v3/objects/{object_type.lower()}/batch/{action}"
+        gate = asyncio.Semaphore(max(1, concurrency))
+
+        async def send(start: int, chunk: Sequence[dict]) -> None:
+            # Any failure, including an unreadable or oddly shaped 2xx body,
+            # stays in this chunk's records; other chunks' writes are kept.
+            async with gate:
+                try:
+                    r = await self._client.post(path, json={"inputs": list(chunk)})
+                    r.raise_for_status()
+                    outcomes = self._batch_outcomes(start, chunk, r.json(), action)
+                except (httpx.HTTPError, ValueError, TypeError, AttributeError) as e:
+                    result.fail_chunk(start, len(chunk), e)
+                    return
+            for at, record_id, errors in outcomes:
+                if errors is None:
+                    result.success(at, record_id)
+                else:
+                    result.failure(at, errors)
+
+        batches = list(chunks(inputs, max(1, min(chunk_size, BATCH_LIMIT))))
+        result.calls = len(batches)
+        await asyncio.gather(*(send(start, chunk) for start, chunk in batches))
+        return result
+
+    @staticmethod
+    def _batch_outcomes(start: int, chunk: Sequence[dict], data: dict,
+                        action: str) -> list[tuple[int, str | None, list | None]]:
+        """
+        (input index, id, errors) for every input of one batch response;
+        errors is None on success. Results are matched back to inputs by
+        trace id (create) or object id (update), as HubSpot does not promise
+        to keep input order. Inputs the response never mentions are failed.
+        """
+        if not isinstance(data, dict):
+            raise ValueError(f"unexpected batch response: {str(data)[:200]}")
+        key = (lambda item: item.get("objectWriteTraceId")) if action == "create" else (lambda item: item.get("id"))
+        index = {key(item): start + i for i, item in enumerate(chunk)}
+        outcomes: dict[int, tuple[str | None, list | None]] = {}
+        for i, item in enumerate(data.get("results", [])):
+            at = index.get(key(item), start + i if action == "create" else None)
+            if at is not None and start <= at < start + len(chunk):
+                outcomes[at] = (item.get("id"), None)
+        for err in data.get("errors", []):
+            ctx = err.get("context") or {}
+            refs = ctx.get("objectWriteTraceId") or ctx.get("ids") or []
+            hits = [index[r] for r in refs if r in index]
+            for at in hits or [i for i in index.values() if i not in outcomes]:
+                outcomes[at] = (None, [err])
+        missing = [{"message": "no result or error returned for this input", "type": "MissingResult"}]
+        return [(at, *outcomes.get(at, (None, missing))) for at in range(start, start + len(chunk))]
 
     # ── Contacts ──────────────────────────────────────────────────────────────
 
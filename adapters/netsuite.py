@@ -4,53 +4,180 @@ BlackRoad Foundation — Oracle NetSuite SuiteQL REST Adapter
 Connects via NetSuite's TBA (Token-Based Authentication) + SuiteQL.
 """
 from __future__ import annotations
-import os, time, hmac, hashlib, base64, random, string, urllib.parse
-from typing import Any
+import os, time, hmac, hashlib, base64, secrets, asyncio, urllib.parse
+from typing import Any, AsyncIterator, Iterable, Iterator
 import httpx
 
+try:
+    from .pagination import aiter_pages, iter_pages
+except ImportError:  # run as a script from adapters/
+    from pagination import aiter_pages, iter_pages
+
 NS_ACCOUNT = os.getenv("NETSUITE_ACCOUNT_ID", "")
 NS_CONSUMER_KEY = os.getenv("NETSUITE_CONSUMER_KEY", "")
 NS_CONSUMER_SECRET = os.getenv("NETSUITE_CONSUMER_SECRET", "")
 NS_TOKEN = os.getenv("NETSUITE_TOKEN", "")
 NS_TOKEN_SECRET = os.getenv("NETSUITE_TOKEN_SECRET", "")
+SUITEQL_PAGE_LIMIT = 1000   # NetSuite's maximum rows per SuiteQL page
+
+
+def _q(value: str) -> str:
+    return urllib.parse.quote(value, safe="")
 
 
 class NetSuiteAdapter:
-    """Oracle NetSuite REST adapter using SuiteQL + TBA OAuth 1.0a."""
+    """
+    Oracle NetSuite REST adapter using SuiteQL + TBA OAuth 1.0a.
 
-    def __init__(self):
-        self._account = NS_ACCOUNT.replace("-", "_").upper()
-        self._base = f"https://{NS_ACCOUNT}.suitetalk.api.netsuite.com/services/rest"
+    One pooled ``httpx.AsyncClient`` serves every call; use the adapter as an
+    async context manager (or call ``aclose()``) to release it::
 
-    def _oauth_header(self, method: str, url: str) -> str:
-        nonce = "".join(random.choices(string.ascii_letters + string.digits, k=32))
-        ts = str(int(time.time()))
-        params = {
-            "oauth_consumer_key": NS_CONSUMER_KEY,
-            "oauth_nonce": nonce,
+        async with NetSuiteAdapter() as ns:
+            invoices = await ns.get_invoices(limit=50)
+    """
+
+    def __init__(self, *, account: str | None = None, consumer_key: str | None = None,
+                 consumer_secret: str | None = None, token: str | None = None,
+                 token_secret: str | None = None, max_connections: int = 20,
+                 concurrency: int = 8, timeout: float = 30.0):
+        account = account if account is not None else NS_ACCOUNT
+        self._account = account.replace("-", "_").upper()
+        self._base = f"https://{account}.suitetalk.api.netsuite.com/services/rest"
+        self._suiteql_url = f"{self._base}/query/v1/suiteql"
+        self.concurrency = concurrency
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._timeout = timeout
+        self._client: httpx.AsyncClient | None = None
+        self._sync_client: httpx.Client | None = None
+
+        # Everything in a TBA signature except nonce, timestamp and query is
+        # fixed per adapter: encode it once. The HMAC-SHA256 state is keyed
+        # once and copied per request.
+        ck = consumer_key if consumer_key is not None else NS_CONSUMER_KEY
+        tk = token if token is not None else NS_TOKEN
+        cs = consumer_secret if consumer_secret is not None else NS_CONSUMER_SECRET
+        ts = token_secret if token_secret is not None else NS_TOKEN_SECRET
+        self._oauth_static = {
+            "oauth_consumer_key": _q(ck),
             "oauth_signature_method": "HMAC-SHA256",
-            "oauth_timestamp": ts,
-            "oauth_token": NS_TOKEN,
+            "oauth_token": _q(tk),
             "oauth_version": "1.0",
         }
-        param_str = "&".join(f"{k}={urllib.parse.quote(v, safe='')}" for k, v in sorted(params.items()))
-        base_str = f"{method}&{urllib.parse.quote(url, safe='')}&{urllib.parse.quote(param_str, safe='')}"
-        signing_key = f"{urllib.parse.quote(NS_CONSUMER_SECRET, safe='')}&{urllib.parse.quote(NS_TOKEN_SECRET, safe='')}"
-        sig = base64.b64encode(hmac.new(signing_key.encode(), base_str.encode(), hashlib.sha256).digest()).decode()
-        params["oauth_signature"] = sig
-        return "OAuth " + ", ".join(f'{k}="{urllib.parse.quote(v, safe="")}"' for k, v in params.items())
+        self._hmac = hmac.new(f"{_q(cs)}&{_q(ts)}".encode(), digestmod=hashlib.sha256)
+        self._header_prefix = f'OAuth realm="{self._account}", ' + ", ".join(
+            f'{k}="{v}"' for k, v in self._oauth_static.items())
+        self._quoted_urls: dict[str, str] = {}
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(limits=self._limits, timeout=self._timeout)
+        return self._client
+
+    def close(self) -> None:
+        """Close the blocking client behind ``iter_query``; ``aclose()`` closes both."""
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+
+    async def aclose(self) -> None:
+        self.close()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def __enter__(self) -> "NetSuiteAdapter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "NetSuiteAdapter":
+        self._http()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    # ── Auth ──────────────────────────────────────────────────────────────────
+
+    def _oauth_header(self, method: str, url: str, query: dict | None = None) -> str:
+        nonce = secrets.token_hex(16)
+        ts = str(int(time.time()))
+        params = {**self._oauth_static, "oauth_nonce": nonce, "oauth_timestamp": ts}
+        # Query-string parameters are part of the signature base string.
+        for k, v in (query or {}).items():
+            params[_q(k)] = _q(str(v))
+        param_str = "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+        quoted_url = self._quoted_urls.get(url)
+        if quoted_url is None:
+            quoted_url = self._quoted_urls[url] = _q(url)
+        mac = self._hmac.copy()
+        mac.update(f"{method}&{quoted_url}&{_q(param_str)}".encode())
+        sig = base64.b64encode(mac.digest()).decode()
+        return f'{self._header_prefix}, oauth_nonce="{nonce}", oauth_timestamp="{ts}", oauth_signature="{_q(sig)}"'
+
+    # ── SuiteQL ───────────────────────────────────────────────────────────────
 
     async def query(self, suiteql: str) -> list[dict[str, Any]]:
-        url = f"{self._base}/query/v1/suiteql"
+        """Every row of ``suiteql``, across as many pages as NetSuite returns."""
+        return [row async for row in self.aiter_query(suiteql, prefetch=False)]
+
+    async def query_many(self, statements: Iterable[str], *, concurrency: int | None = None,
+                         return_exceptions: bool = False) -> list:
+        """
+        Run SuiteQL ``statements`` in parallel, at most ``concurrency`` (default
+        ``self.concurrency``) at a time, on the shared client. Results come back
+        in statement order; with ``return_exceptions`` a failed statement
+        yields its exception instead of aborting the batch.
+        """
+        gate = asyncio.Semaphore(max(1, concurrency or self.concurrency))
+
+        async def run(q: str) -> list[dict[str, Any]]:
+            async with gate:
+                return await self.query(q)
+        return await asyncio.gather(*(run(q) for q in statements), return_exceptions=return_exceptions)
+
+    # ── Pagination (offset/hasMore) ───────────────────────────────────────────
+
+    def _page_request(self, suiteql: str, page_size: int, offset: int | None) -> tuple[str, dict, dict]:
+        url = self._suiteql_url
+        params = {"limit": min(page_size, SUITEQL_PAGE_LIMIT), "offset": offset or 0}
         headers = {
-            "Authorization": self._oauth_header("POST", url),
+            "Authorization": self._oauth_header("POST", url, params),
             "Content-Type": "application/json",
             "Prefer": "transient",
         }
-        async with httpx.AsyncClient() as client:
-            r = await client.post(url, json={"q": suiteql}, headers=headers)
-            r.raise_for_status()
-            return r.json().get("items", [])
+        return url, params, headers
+
+    @staticmethod
+    def _page(r: httpx.Response, offset: int | None) -> tuple[list[dict], int | None]:
+        r.raise_for_status()
+        data = r.json()
+        items = data.get("items", [])
+        return items, (offset or 0) + len(items) if data.get("hasMore") and items else None
+
+    def iter_query(self, suiteql: str, *, page_size: int = SUITEQL_PAGE_LIMIT,
+                   prefetch: bool = True) -> Iterator[dict]:
+        """Stream every row of ``suiteql``, paging by ``offset`` while ``hasMore``, one page ahead."""
+        if self._sync_client is None:
+            self._sync_client = httpx.Client(limits=self._limits, timeout=self._timeout)
+
+        def fetch(offset):
+            url, params, headers = self._page_request(suiteql, page_size, offset)
+            return self._page(self._sync_client.post(url, params=params, json={"q": suiteql},
+                                                     headers=headers), offset)
+        return iter_pages(fetch, prefetch=prefetch)
+
+    def aiter_query(self, suiteql: str, *, page_size: int = SUITEQL_PAGE_LIMIT,
+                    prefetch: bool = True) -> AsyncIterator[dict]:
+        """Async :meth:`iter_query` on the pooled client."""
+        async def fetch(offset):
+            url, params, headers = self._page_request(suiteql, page_size, offset)
+            r = await self._http().post(url, params=params, json={"q": suiteql}, headers=headers)
+            return self._page(r, offset)
+        return aiter_pages(fetch, prefetch=prefetch)
 
     async def get_customers(self, limit: int = 10) -> list[dict]:
         return await self.query(f"SELECT id, companyName, email, phone FROM Customer WHERE isInactive = 'F' LIMIT {limit}")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+BlackRoad Foundation — Adapter pagination drivers
+Stream every page of a paged CRM/ERP API as one flat iterator.
+
+Each adapter supplies ``fetch(cursor) -> (items, next_cursor)``: ``cursor`` is
+None for the first page and ``next_cursor`` is None after the last. While the
+caller consumes one page, the next is already being fetched (read-ahead of
+one page), so at most two pages are held in memory at a time.
+"""
+from __future__ import annotations
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional
+
+Page = tuple[list, Optional[Any]]
+
+
+def iter_pages(fetch: Callable[[Any], Page], cursor: Any = None, *, prefetch: bool = True) -> Iterator:
+    """Yield items from ``fetch`` page after page, fetching ahead on a helper thread."""
+    items, cursor = fetch(cursor)
+    if not prefetch:
+        while True:
+            yield from items
+            if cursor is None:
+                return
+            items, cursor = fetch(cursor)
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch") as pool:
+        while True:
+            ahead = pool.submit(fetch, cursor) if cursor is not None else None
+            try:
+                yield from items
+            except BaseException:   # consumer stopped early
+                if ahead is not None:
+                    ahead.cancel()
+                raise
+            if ahead is None:
+                return
+            items, cursor = ahead.result()
+
+
+async def aiter_pages(fetch: Callable[[Any], Awaitable[Page]], cursor: Any = None, *,
+                      prefetch: bool = True) -> AsyncIterator:
+    """Async counterpart of :func:`iter_pages`; the next page is fetched as a task."""
+    items, cursor = await fetch(cursor)
+    while True:
+        ahead = asyncio.ensure_future(fetch(cursor)) if prefetch and cursor is not None else None
+        try:
+            for item in items:
+                yield item
+        except BaseException:   # consumer stopped early or was cancelled
+            if ahead is not None:
+                ahead.cancel()
+            raise
+        if cursor is None:
+            return
+        items, cursor = await (ahead if ahead is not None else fetch(cursor))
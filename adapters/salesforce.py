@@ -5,20 +5,43 @@ Full REST API integration for Leads, Contacts, Opportunities, and Accounts.
 
 from __future__ import annotations
 
+import asyncio
+import gzip
+import http.client
 import os
+import queue
+import random
+import select
+import ssl
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Any, Optional
-from urllib.request import Request, urlopen
-from urllib.parse import urlencode
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+from urllib.parse import urlencode, urlsplit
 import json
 
+try:
+    from .bulk import BulkResult, chunks
+    from .pagination import aiter_pages, iter_pages
+except ImportError:  # run as a script from adapters/
+    from bulk import BulkResult, chunks
+    from pagination import aiter_pages, iter_pages
+
+RETRY_STATUSES = (429, 503)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"})
+COLLECTION_LIMIT = 200   # records per composite sObject collection call
+
 
 @dataclass
 class SalesforceConfig:
     instance_url: str = field(default_factory=lambda: os.getenv("SALESFORCE_INSTANCE_URL", ""))
     access_token: str = field(default_factory=lambda: os.getenv("SALESFORCE_ACCESS_TOKEN", ""))
     api_version: str = "v59.0"
+    timeout: float = 30.0       # seconds, per connect and per read
+    pool_size: int = 8          # idle keep-alive connections kept per adapter
+    max_retries: int = 4        # on 429/503, honouring Retry-After
+    idle_ttl: float = 30.0      # seconds an idle connection is reused; keep below the server's keep-alive
 
     def validate(self):
         if not self.instance_url or not self.access_token:
@@ -27,6 +50,141 @@ class SalesforceConfig:
             )
 
 
+class SalesforceAPIError(RuntimeError):
+    """Non-2xx response from Salesforce; ``errors`` is the decoded error body."""
+
+    def __init__(self, status: int, reason: str, errors: Any):
+        super().__init__(f"{status} {reason}: {errors}")
+        self.status = status
+        self.errors = errors
+
+
+class _Transport:
+    """
+    Keep-alive HTTP/1.1 connection pool on ``http.client`` (stdlib only).
+
+    Connections are reused across calls and threads, responses may be
+    gzip-encoded, and 429/503 responses are retried with exponential
+    backoff, waiting out ``Retry-After`` when the server sends one.
+
+    Idle connections older than ``idle_ttl``, or that the server has already
+    closed (readable while idle), are dropped before reuse. If a reused
+    connection still fails while the request is being sent, any method is
+    resent on a fresh one; once the request is out and the response fails,
+    only ``IDEMPOTENT_METHODS`` are, since the server may have applied it.
+    """
+
+    def __init__(self, base_url: str, *, pool_size: int = 8, timeout: float = 30.0,
+                 max_retries: int = 4, backoff: float = 0.5, idle_ttl: float = 30.0):
+        parts = urlsplit(base_url)
+        self.secure = parts.scheme != "http"
+        self.host = parts.hostname or ""
+        self.port = parts.port
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.idle_ttl = idle_ttl
+        self._idle: queue.LifoQueue = queue.LifoQueue(maxsize=pool_size)
+        self._ssl = ssl.create_default_context() if self.secure else None
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None,
+                headers: Optional[dict] = None) -> tuple[int, str, bytes]:
+        headers = {"Accept-Encoding": "gzip", **(headers or {})}
+        attempt = 0
+        while True:
+            status, reason, resp_headers, data = self._send(method, path, body, headers)
+            if status not in RETRY_STATUSES or attempt >= self.max_retries:
+                return status, reason, data
+            time.sleep(self._retry_after(resp_headers.get("Retry-After"), attempt))
+            attempt += 1
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait()[0].close()
+            except queue.Empty:
+                return
+
+    def _send(self, method, path, body, headers):
+        conn, reused = self._acquire()
+        try:
+            try:
+                conn.request(method, path, body=body, headers=headers)
+            except (ConnectionResetError, ConnectionAbortedError, BrokenPipeError):
+                if not reused:
+                    raise
+                # Failed while sending: the server never got a whole request,
+                # so it cannot have acted on it; any method may go again.
+                conn.close()
+                conn, reused = self._connect(), False
+                conn.request(method, path, body=body, headers=headers)
+            try:
+                resp = conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError):
+                if not reused or method not in IDEMPOTENT_METHODS:
+                    raise
+                # The request went out and may have been applied; only
+                # repeatable methods are resent, once, on a fresh connection.
+                conn.close()
+                conn = self._connect()
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+            data = resp.read()
+        except BaseException:
+            conn.close()
+            raise
+        if resp.getheader("Content-Encoding", "").lower() == "gzip":
+            data = gzip.decompress(data)
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+        return resp.status, resp.reason, resp.headers, data
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.secure:
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout, context=self._ssl)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _acquire(self) -> tuple[http.client.HTTPConnection, bool]:
+        while True:
+            try:
+                conn, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect(), False
+            if self._usable(conn, idle_since):
+                return conn, True
+            conn.close()
+
+    def _usable(self, conn: http.client.HTTPConnection, idle_since: float) -> bool:
+        if conn.sock is None or time.monotonic() - idle_since > self.idle_ttl:
+            return False
+        # An idle keep-alive socket has nothing to read; readable means the
+        # server closed it (EOF/RST) or sent something unsolicited.
+        try:
+            readable, _, _ = select.select([conn.sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        try:
+            self._idle.put_nowait((conn, time.monotonic()))
+        except queue.Full:
+            conn.close()
+
+    def _retry_after(self, value: Optional[str], attempt: int) -> float:
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                try:
+                    return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        return self.backoff * 2 ** attempt * (0.5 + random.random())
+
+
 class SalesforceAdapter:
     """
     Lightweight Salesforce REST adapter — zero external dependencies.
@@ -36,31 +194,111 @@ class SalesforceAdapter:
         from adapters.salesforce import SalesforceAdapter, SalesforceConfig
         sf = SalesforceAdapter(SalesforceConfig())
         lead = sf.create_lead(first="Jane", last="Doe", email="j@blackroad.io", company="BlackRoad")
+
+    Calls share a pool of keep-alive connections; ``close()`` (or using the
+    adapter as a context manager) releases them.
     """
 
     def __init__(self, cfg: Optional[SalesforceConfig] = None):
         self.cfg = cfg or SalesforceConfig()
         self.cfg.validate()
-        self._base = f"{self.cfg.instance_url}/services/data/{self.cfg.api_version}"
+        self._base = f"/services/data/{self.cfg.api_version}"
         self._headers = {
             "Authorization": f"Bearer {self.cfg.access_token}",
             "Content-Type": "application/json",
         }
+        self._transport = _Transport(self.cfg.instance_url, pool_size=self.cfg.pool_size,
+                                     timeout=self.cfg.timeout, max_retries=self.cfg.max_retries,
+                                     idle_ttl=self.cfg.idle_ttl)
+
+    def close(self) -> None:
+        self._transport.close()
+
+    def __enter__(self) -> "SalesforceAdapter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
 
     # ── Core HTTP ─────────────────────────────────────────────────────────────
 
     def _req(self, method: str, path: str, body: Optional[dict] = None) -> Any:
-        url = f"{self._base}{path}"
+        # Paths Salesforce hands back (e.g. nextRecordsUrl) already carry the prefix.
+        url = path if path.startswith("/services/") else f"{self._base}{path}"
         data = json.dumps(body).encode() if body else None
-        req = Request(url, data=data, headers=self._headers, method=method)
-        with urlopen(req) as resp:
-            raw = resp.read()
-            return json.loads(raw) if raw else {}
+        status, reason, raw = self._transport.request(method, url, data, self._headers)
+        try:
+            payload = json.loads(raw) if raw else {}
+        except ValueError:
+            if status < 400:
+                raise
+            payload = raw.decode("utf-8", "replace")
+        if status >= 400:
+            raise SalesforceAPIError(status, reason, payload)
+        return payload
 
     def _query(self, soql: str) -> list[dict]:
-        encoded = urlencode({"q": soql})
-        result = self._req("GET", f"/query?{encoded}")
-        return result.get("records", [])
+        return list(self.iter_query(soql, prefetch=False))
+
+    def _query_page(self, soql: str, next_url: Optional[str]) -> tuple[list[dict], Optional[str]]:
+        result = self._req("GET", next_url or f"/query?{urlencode({'q': soql})}")
+        return result.get("records", []), None if result.get("done", True) else result.get("nextRecordsUrl")
+
+    def iter_query(self, soql: str, *, prefetch: bool = True) -> Iterator[dict]:
+        """Stream every record of ``soql``, following ``nextRecordsUrl`` with one page of read-ahead."""
+        return iter_pages(lambda cursor: self._query_page(soql, cursor), prefetch=prefetch)
+
+    def aiter_query(self, soql: str, *, prefetch: bool = True) -> AsyncIterator[dict]:
+        """Async :meth:`iter_query`; page fetches run on worker threads."""
+        return aiter_pages(lambda cursor: asyncio.to_thread(self._query_page, soql, cursor), prefetch=prefetch)
+
+    # ── Bulk writes (composite sObject collections) ──────────────────────────
+
+    def create_many(self, sobject: str, records: Sequence[dict], *, chunk_size: int = COLLECTION_LIMIT,
+                    concurrency: int = 4, all_or_none: bool = False) -> BulkResult:
+        """
+        Insert ``records`` of type ``sobject`` in collections of up to 200,
+        ``concurrency`` calls at a time. ``BulkResult.ids`` follows input
+        order; failed records are listed in ``BulkResult.errors``.
+        """
+        return self._collections("POST", sobject, records, chunk_size, concurrency, all_or_none)
+
+    def update_many(self, sobject: str, records: Sequence[dict], *, chunk_size: int = COLLECTION_LIMIT,
+                    concurrency: int = 4, all_or_none: bool = False) -> BulkResult:
+        """Update ``records`` (each carrying its ``Id``) like :meth:`create_many`."""
+        missing = [i for i, r in enumerate(records) if not r.get("Id")]
+        if missing:
+            raise ValueError(f"update_many: records {missing[:5]} have no Id")
+        return self._collections("PATCH", sobject, records, chunk_size, concurrency, all_or_none)
+
+    def _collections(self, method: str, sobject: str, records: Sequence[dict], chunk_size: int,
+                     concurrency: int, all_or_none: bool) -> BulkResult:
+        records = list(records)
+        result = BulkResult.sized(len(records))
+        size = max(1, min(chunk_size, COLLECTION_LIMIT))
+
+        def send(start, chunk):
+            body = {"allOrNone": all_or_none,
+                    "records": [{"attributes": {"type": sobject}, **r} for r in chunk]}
+            # Any failure stays in this chunk's records; other chunks' writes are still reported.
+            try:
+                outcomes = self._req(method, "/composite/sobjects", body)
+                if not isinstance(outcomes, list) or len(outcomes) != len(chunk):
+                    raise ValueError(f"unexpected composite response: {str(outcomes)[:200]}")
+            except (SalesforceAPIError, OSError, http.client.HTTPException, ValueError) as e:
+                result.fail_chunk(start, len(chunk), e)
+                return
+            for offset, outcome in enumerate(outcomes):
+                if outcome.get("success"):
+                    result.success(start + offset, outcome.get("id"))
+                else:
+                    result.failure(start + offset, outcome.get("errors", []))
+
+        batches = list(chunks(records, size))
+        result.calls = len(batches)
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(batches) or 1))) as pool:
+            list(pool.map(lambda b: send(*b), batches))
+        return result
 
     # ── Leads ─────────────────────────────────────────────────────────────────
 
@@ -5,10 +5,28 @@ Connects to SAP S/4HANA via OData v4 API.
 """
 from __future__ import annotations
 import os
-from typing import Any
+from typing import Any, AsyncIterator, Iterator
+from urllib.parse import urljoin, urlsplit
 import httpx
 
+try:
+    from .pagination import aiter_pages, iter_pages
+except ImportError:  # run as a script from adapters/
+    from pagination import aiter_pages, iter_pages
+
 SAP_BASE = os.getenv("SAP_INSTANCE_URL", "https://your-sap-instance.ondemand.com")
+ODATA_PREFIX = "/sap/opu/odata/sap/"
+
+# Unified object types → (OData entity set, fixed query options). Each sets
+# "$orderby" to the entity key: $skip/$top pages over an unordered set can
+# repeat or skip rows.
+ENTITIES = {
+    "sales_orders": ("API_SALES_ORDER_SRV/A_SalesOrder", {"$orderby": "SalesOrder"}),
+    "materials": ("API_PRODUCT_SRV/A_Product",
+                  {"$select": "Material,MaterialName,BaseUnit", "$orderby": "Product"}),
+    "customers": ("API_BUSINESS_PARTNER/A_BusinessPartner",
+                  {"$filter": "BusinessPartnerCategory eq '1'", "$orderby": "BusinessPartner"}),
+}
 
 
 class SAPAdapter:
@@ -17,19 +35,119 @@ class SAPAdapter:
         self._base = (base_url or SAP_BASE).rstrip("/")
         user = username or os.getenv("SAP_USERNAME", "")
         pwd = password or os.getenv("SAP_PASSWORD", "")
-        self._client = httpx.AsyncClient(
-            base_url=self._base,
-            auth=(user, pwd),
-            headers={"Accept": "application/json", "Content-Type": "application/json"},
-            timeout=30,
-        )
+        self._auth = (user, pwd)
+        self._headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        self._client = httpx.AsyncClient(base_url=self._base, auth=self._auth, headers=self._headers, timeout=30)
+        self._sync_client: httpx.Client | None = None
 
-    async def _get(self, path: str, params: dict | None = None) -> Any:
-        r = await self._client.get(f"/sap/opu/odata/sap/{path}", params=params)
+    def _sync(self) -> httpx.Client:
+        # Blocking twin of _client for iter_query; created on first use.
+        if self._sync_client is None:
+            self._sync_client = httpx.Client(base_url=self._base, auth=self._auth,
+                                             headers=self._headers, timeout=30)
+        return self._sync_client
+
+    def close(self) -> None:
+        """Close the blocking client behind ``iter_query``; ``aclose()`` closes both."""
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+
+    async def aclose(self) -> None:
+        self.close()
+        await self._client.aclose()
+
+    def __enter__(self) -> "SAPAdapter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "SAPAdapter":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    @staticmethod
+    def _results(r: httpx.Response) -> Any:
         r.raise_for_status()
         data = r.json()
         return data.get("d", {}).get("results", data.get("d", data))
 
+    async def _get(self, path: str, params: dict | None = None) -> Any:
+        return self._results(await self._client.get(f"{ODATA_PREFIX}{path}", params=params))
+
+    # ── Pagination (server-driven __next, else $skip/$top) ────────────────────
+
+    @staticmethod
+    def _entity(object_type: str) -> tuple[str, dict]:
+        # Known unified names, or a raw "SERVICE/EntitySet" path.
+        return ENTITIES.get(object_type.lower(), (object_type, {}))
+
+    def _page_params(self, options: dict, page_size: int, skip: int | None) -> dict:
+        return {**options, "$top": page_size, "$skip": skip or 0, "$format": "json"}
+
+    def _link_auth(self, url: str) -> Any:
+        """Client credentials for a next link on our own origin, none elsewhere."""
+        def origin(u: str) -> tuple:
+            p = urlsplit(u)
+            return p.scheme, p.hostname, p.port or {"http": 80, "https": 443}.get(p.scheme)
+        return httpx.USE_CLIENT_DEFAULT if origin(url) == origin(self._base) else None
+
+    @staticmethod
+    def _page(r: httpx.Response, page_size: int, cursor: int | str | None) -> tuple[list, int | str | None]:
+        """
+        Items of one page and the next cursor: the server's next link
+        (``d.__next``, or ``@odata.nextLink`` in v4) when it sends one, which
+        also covers servers capping pages below ``$top``. Without a link, a
+        full page means "try the next ``$skip``"; after following links, it
+        means the end.
+        """
+        r.raise_for_status()
+        data = r.json()
+        body = data.get("d", data)
+        items = body.get("results", body.get("value", [])) if isinstance(body, dict) else body
+        link = (body.get("__next") if isinstance(body, dict) else None) or data.get("@odata.nextLink")
+        if link:
+            return items, urljoin(str(r.url), link)
+        if isinstance(cursor, str) or len(items) < page_size:
+            return items, None
+        return items, (cursor or 0) + len(items)
+
+    def iter_query(self, object_type: str, *, page_size: int = 500, prefetch: bool = True,
+                   **options) -> Iterator[dict]:
+        """
+        Stream every entity of ``object_type`` page by page, reading one page
+        ahead. Known types page in key order; for a raw entity-set path, pass
+        ``**{"$orderby": key}`` so $skip paging is stable.
+        """
+        path, fixed = self._entity(object_type)
+        opts = {**fixed, **options}
+
+        def fetch(cursor):
+            if isinstance(cursor, str):
+                return self._page(self._sync().get(cursor, auth=self._link_auth(cursor)), page_size, cursor)
+            return self._page(self._sync().get(f"{ODATA_PREFIX}{path}",
+                                               params=self._page_params(opts, page_size, cursor)),
+                              page_size, cursor)
+        return iter_pages(fetch, prefetch=prefetch)
+
+    def aiter_query(self, object_type: str, *, page_size: int = 500, prefetch: bool = True,
+                    **options) -> AsyncIterator[dict]:
+        """Async :meth:`iter_query` on the shared async client."""
+        path, fixed = self._entity(object_type)
+        opts = {**fixed, **options}
+
+        async def fetch(cursor):
+            if isinstance(cursor, str):
+                return self._page(await self._client.get(cursor, auth=self._link_auth(cursor)),
+                                  page_size, cursor)
+            return self._page(await self._client.get(f"{ODATA_PREFIX}{path}",
+                                                     params=self._page_params(opts, page_size, cursor)),
+                              page_size, cursor)
+        return aiter_pages(fetch, prefetch=prefetch)
+
     async def get_sales_orders(self, top: int = 10, select: str | None = None) -> list[dict]:
         params: dict = {"$top": top, "$format": "json"}
         if select:
@@ -37,16 +155,12 @@ class SAPAdapter:
         return await self._get("API_SALES_ORDER_SRV/A_SalesOrder", params)
 
     async def get_materials(self, top: int = 10) -> list[dict]:
-        return await self._get(
-            "API_PRODUCT_SRV/A_Product",
-            {"$top": top, "$format": "json", "$select": "Material,MaterialName,BaseUnit"}
-        )
+        path, options = ENTITIES["materials"]
+        return await self._get(path, {"$top": top, "$format": "json", **options})
 
     async def get_customers(self, top: int = 10) -> list[dict]:
-        return await self._get(
-            "API_BUSINESS_PARTNER/A_BusinessPartner",
-            {"$top": top, "$format": "json", "$filter": "BusinessPartnerCategory eq '1'"}
-        )
+        path, options = ENTITIES["customers"]
+        return await self._get(path, {"$top": top, "$format": "json", **options})
 
     async def query(self, object_type: str, filters: dict | None = None, limit: int = 10) -> list[dict]:
         """Unified CRM interface."""
@@ -1,30 +1,628 @@
 #!/usr/bin/env python3
 """BlackRoad Compliance Scanner — audit repos and services for policy violations"""
-import json, sys, subprocess
-
-POLICIES = [
-    {"id": "BR-001", "name": "No API keys in code", "severity": "critical", "check": "grep -r 'sk-\\|AKIA\\|ghp_' --include='*.js' --include='*.py' --include='*.ts'"},
-    {"id": "BR-002", "name": "Branch protection enabled", "severity": "high", "check": "gh api repos/{org}/{repo}/branches/main/protection"},
-    {"id": "BR-003", "name": "CODEOWNERS present", "severity": "medium", "check": "gh api repos/{org}/{repo}/contents/CODEOWNERS"},
-    {"id": "BR-004", "name": "LICENSE file exists", "severity": "medium", "check": "gh api repos/{org}/{repo}/contents/LICENSE"},
-    {"id": "BR-005", "name": "No .env files committed", "severity": "critical", "check": "gh api repos/{org}/{repo}/contents/.env"},
-    {"id": "BR-006", "name": "README exists", "severity": "low", "check": "gh api repos/{org}/{repo}/contents/README.md"},
+import json, sys, os, re, mmap, fnmatch, subprocess, hashlib, threading, argparse, datetime, tarfile, tempfile
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import ClassVar
+
+CACHE_PATH = os.path.expanduser("~/.blackroad/compliance-cache.json")
+SECRETS_STATE_DIR = os.path.expanduser("~/.blackroad/secret-scan")
+SEVERITIES = ("critical", "high", "medium", "low")   # most severe first
+
+
+# ── Policies ──────────────────────────────────────────────────────────────────
+# A policy is a typed check over one data source. ``source`` names a backend
+# method (plus arguments); the engine fetches each distinct source once per
+# repo and hands the result to every policy that reads it.
+
+@dataclass(frozen=True)
+class Policy(ABC):
+    id: str
+    name: str
+    severity: str
+    kind: ClassVar[str] = "policy"
+    cost: ClassVar[int] = 1      # relative source cost; cheaper checks run first within a severity
+
+    @property
+    @abstractmethod
+    def source(self) -> tuple:
+        """Backend data source this policy reads: (method name, *args)."""
+
+    @abstractmethod
+    def evaluate(self, data) -> tuple[str, str]:
+        """(status, detail) for this policy given its source's data; status is pass/fail."""
+
+    def to_dict(self) -> dict:
+        return {"kind": self.kind, "source": list(self.source), **asdict(self)}
+
+
+@dataclass(frozen=True)
+class PathPolicy(Policy):
+    """A path must be present in (or, with ``expect="absent"``, missing from) the repo tree."""
+    path: str = ""
+    expect: str = "present"
+    kind: ClassVar[str] = "path"
+
+    @property
+    def source(self) -> tuple:
+        return ("tree",)
+
+    def evaluate(self, tree: set[str]) -> tuple[str, str]:
+        found = self.path in tree
+        return ("pass" if found == (self.expect == "present") else "fail"), f"{self.path} {'found' if found else 'missing'}"
+
+
+@dataclass(frozen=True)
+class BranchProtectionPolicy(Policy):
+    branch: str = "main"
+    kind: ClassVar[str] = "branch_protection"
+
+    @property
+    def source(self) -> tuple:
+        return ("protection", self.branch)
+
+    def evaluate(self, protected: bool) -> tuple[str, str]:
+        return ("pass" if protected else "fail"), f"{self.branch} {'protected' if protected else 'unprotected'}"
+
+
+@dataclass(frozen=True)
+class SecretsPolicy(Policy):
+    kind: ClassVar[str] = "secrets"
+    cost: ClassVar[int] = 10
+
+    @property
+    def source(self) -> tuple:
+        return ("secrets",)
+
+    def evaluate(self, found: list[dict]) -> tuple[str, str]:
+        shown = ", ".join(f"{f['path']}:{f['line']} {f['rule']}" for f in found[:5])
+        return ("fail" if found else "pass"), (f"{len(found)} secret(s): {shown}" if found else "no secrets")
+
+
+POLICIES: list[Policy] = [
+    SecretsPolicy("BR-001", "No API keys in code", "critical"),
+    BranchProtectionPolicy("BR-002", "Branch protection enabled", "high", branch="main"),
+    PathPolicy("BR-003", "CODEOWNERS present", "medium", path="CODEOWNERS"),
+    PathPolicy("BR-004", "LICENSE file exists", "medium", path="LICENSE"),
+    PathPolicy("BR-005", "No .env files committed", "critical", path=".env", expect="absent"),
+    PathPolicy("BR-006", "README exists", "low", path="README.md"),
 ]
+REGISTRY: dict[str, Policy] = {p.id: p for p in POLICIES}
+
+
+def register(policy: Policy) -> Policy:
+    """Add ``policy`` to the default set; ids are unique."""
+    if policy.id in REGISTRY:
+        raise ValueError(f"policy {policy.id} already registered")
+    if policy.severity not in SEVERITIES:
+        raise ValueError(f"unknown severity {policy.severity!r}")
+    POLICIES.append(policy)
+    REGISTRY[policy.id] = policy
+    return policy
+
+
+# ── Secret scanning (BR-001) ──────────────────────────────────────────────────
+# One compiled alternation: each file is read once whatever the rule count.
+
+SECRET_RULES = {
+    "openai_key": rb"sk-(?:proj-|ant-)?[A-Za-z0-9_-]{20,}",
+    "aws_access_key": rb"(?:AKIA|ASIA)[0-9A-Z]{16}",
+    "github_token": rb"gh[pousr]_[A-Za-z0-9]{36,}",
+}
+SECRET_PATTERN = re.compile(b"|".join(b"(?P<%s>%s)" % (k.encode(), v) for k, v in SECRET_RULES.items()))
+BINARY_SNIFF = 8192
+
+
+def _blob_hash(path: str) -> str:
+    """Git blob id of a file's current contents (what `git hash-object` prints)."""
+    h = hashlib.sha1(b"blob %d\0" % os.path.getsize(path))
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _scan_file(root: str, rel: str) -> list[dict] | None:
+    """Findings in one file, or None if it is binary/unreadable."""
+    try:
+        with open(os.path.join(root, rel), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if b"\0" in mm[:BINARY_SNIFF]:
+                    return None
+                found, line, pos = [], 1, 0
+                for m in SECRET_PATTERN.finditer(mm):
+                    line += mm[pos:m.start()].count(b"\n")
+                    pos = m.start()
+                    secret = m.group().decode("ascii", "replace")
+                    found.append({"path": rel, "line": line, "rule": m.lastgroup,
+                                  "match": secret[:4] + "…" + secret[-4:]})
+                return found
+    except OSError:
+        return None
+
+
+def _scan_batch(root: str, rels: list[str]) -> list[tuple[str, list[dict] | None]]:
+    return [(rel, _scan_file(root, rel)) for rel in rels]
+
+
+class SecretScanner:
+    """
+    Scan a checkout for credentials. Files come from git (tracked plus
+    untracked-but-not-ignored) or, outside git, a walk that honours the root
+    .gitignore; an explicit ``paths`` list (e.g. an archive's members)
+    overrides both. Binaries are skipped. With a ``state`` file, only files
+    whose git blob hash changed since the last run are rescanned.
+    """
+
+    def __init__(self, root: str, state: str | None = None, *, workers: int | None = None,
+                 parallel_threshold: int = 256, paths: list[str] | None = None):
+        self.root = os.path.abspath(root)
+        self.state = state
+        self.workers = workers or os.cpu_count() or 1
+        self.parallel_threshold = parallel_threshold
+        self.paths = paths
+        self.stats: dict[str, int] = {}
+
+    def files(self) -> dict[str, str | None]:
+        """Relative path → git blob hash (None when git must be asked to hash it)."""
+        if self.paths is not None:
+            return {rel: None for rel in self.paths if os.path.isfile(os.path.join(self.root, rel))}
+        try:
+            staged = self._git("ls-files", "-s", "-z")
+        except (OSError, subprocess.CalledProcessError):
+            return {rel: None for rel in self._walk()}
+        blobs = {}
+        for rec in staged.split(b"\0"):
+            if rec:
+                meta, rel = rec.split(b"\t", 1)
+                if not meta.startswith(b"160000"):          # submodules have no content here
+                    blobs[rel.decode()] = meta.split()[1].decode()
+        for rel in self._git("ls-files", "-m", "-z").split(b"\0"):
+            if rel:
+                blobs[rel.decode()] = None                   # modified: index blob is stale
+        for rel in self._git("ls-files", "-o", "--exclude-standard", "-z").split(b"\0"):
+            if rel:
+                blobs[rel.decode()] = None
+        return {rel: h for rel, h in blobs.items() if os.path.isfile(os.path.join(self.root, rel))}
+
+    def scan(self, incremental: bool = True) -> list[dict]:
+        previous = self._load() if incremental and self.state else {}
+        current: dict[str, dict] = {}
+        todo: list[str] = []
+        for rel, blob in self.files().items():
+            blob = blob or _blob_hash(os.path.join(self.root, rel))
+            old = previous.get(rel)
+            if old and old["blob"] == blob:
+                current[rel] = old
+            else:
+                current[rel] = {"blob": blob, "findings": None}
+                todo.append(rel)
+        for rel, findings in self._run(todo):
+            current[rel]["findings"] = findings
+        self.stats = {"files": len(current), "scanned": len(todo), "reused": len(current) - len(todo),
+                      "binary": sum(e["findings"] is None for e in current.values())}
+        if self.state:
+            self._save(current)
+        return [f for rel in sorted(current) for f in current[rel]["findings"] or ()]
+
+    def _run(self, rels: list[str]):
+        if len(rels) < self.parallel_threshold or self.workers == 1:
+            return _scan_batch(self.root, rels)
+        size = max(16, len(rels) // (self.workers * 4))
+        batches = [rels[i:i + size] for i in range(0, len(rels), size)]
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            return [r for batch in pool.map(_scan_batch, [self.root] * len(batches), batches) for r in batch]
+
+    def _git(self, *args: str) -> bytes:
+        return subprocess.run(["git", "-C", self.root, *args], capture_output=True, check=True).stdout
+
+    def _walk(self):
+        try:
+            with open(os.path.join(self.root, ".gitignore"), encoding="utf-8") as f:
+                ignores = [l.strip() for l in f if l.strip() and not l.startswith(("#", "!"))]
+        except FileNotFoundError:
+            ignores = []
+
+        def ignored(rel: str, is_dir: bool) -> bool:
+            name = os.path.basename(rel)
+            for pat in ignores:
+                if pat.endswith("/") and not is_dir:
+                    continue
+                pat = pat.rstrip("/")
+                target = rel if "/" in pat else name
+                if fnmatch.fnmatch(target, pat.lstrip("/")):
+                    return True
+            return False
+
+        for dirpath, dirs, files in os.walk(self.root):
+            base = os.path.relpath(dirpath, self.root)
+            base = "" if base == "." else base + "/"
+            dirs[:] = sorted(d for d in dirs if d != ".git" and not ignored(base + d, True))
+            for name in sorted(files):
+                if not ignored(base + name, False):
+                    yield base + name
+
+    def _load(self) -> dict:
+        try:
+            with open(self.state, encoding="utf-8") as f:
+                data = json.load(f)
+            return data["files"] if data.get("root") == self.root else {}
+        except (FileNotFoundError, ValueError, KeyError):
+            return {}
+
+    def _save(self, files: dict) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.state)), exist_ok=True)
+        tmp = f"{self.state}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "root": self.root, "files": files}, f, separators=(",", ":"))
+        os.replace(tmp, self.state)
+
+
+# ── Backends ──────────────────────────────────────────────────────────────────
+# A backend provides the data sources policies read: ``tree`` (every path in
+# the repo, one listing), ``protection`` (is a branch protected?) and
+# ``secrets`` (credentials found in a checkout). Only content sources are a
+# function of the commit; protection is repo settings and can change without one.
 
-def scan(org="BlackRoad-OS-Inc", repo="blackroad-operator"):
+CONTENT_SOURCES = frozenset({"tree", "secrets"})
+
+class GitHubBackend:
+    """
+    Live checks through the `gh` CLI. Secret scans download the default
+    branch's tarball into a temporary directory and scan every file in it.
+    """
+
+    def head(self, org: str, repo: str) -> str:
+        return self._gh(f"repos/{org}/{repo}/commits/HEAD", "--jq", ".sha").strip()
+
+    def tree(self, org: str, repo: str) -> set[str]:
+        out = self._gh(f"repos/{org}/{repo}/git/trees/HEAD?recursive=1", "--jq", ".tree[].path")
+        return set(out.splitlines())
+
+    def protection(self, org: str, repo: str, branch: str) -> bool:
+        try:
+            self._gh(f"repos/{org}/{repo}/branches/{branch}/protection")
+            return True
+        except LookupError:
+            return False
+
+    def secrets(self, org: str, repo: str) -> list[dict]:
+        with tempfile.TemporaryDirectory(prefix="br-secrets-") as tmp:
+            archive = os.path.join(tmp, "repo.tar.gz")
+            self._tarball(org, repo, archive)
+            with tarfile.open(archive) as tar:
+                members = [m for m in tar.getmembers() if m.isfile()]
+                tar.extractall(os.path.join(tmp, "src"), members=members, filter="data")
+            # Tarballs wrap everything in one "<org>-<repo>-<sha>/" directory.
+            top = members[0].name.split("/", 1)[0] if members else ""
+            rels = [os.path.relpath(m.name, top) for m in members]
+            return SecretScanner(os.path.join(tmp, "src", top), paths=rels).scan()
+
+    def _tarball(self, org: str, repo: str, dest: str) -> None:
+        with open(dest, "wb") as out:
+            proc = subprocess.run(["gh", "api", f"repos/{org}/{repo}/tarball"], stdout=out,
+                                  stderr=subprocess.PIPE, text=False, timeout=600)
+        if proc.returncode:
+            err = proc.stderr.decode(errors="replace").strip()
+            if "404" in err or "Not Found" in err:
+                raise LookupError(f"repos/{org}/{repo}/tarball")
+            raise RuntimeError(f"gh api repos/{org}/{repo}/tarball: {err}")
+
+    @staticmethod
+    def _gh(path: str, *args: str) -> str:
+        proc = subprocess.run(["gh", "api", path, *args], capture_output=True, text=True, timeout=60)
+        if proc.returncode == 0:
+            return proc.stdout
+        if "404" in proc.stderr or "Not Found" in proc.stderr:
+            raise LookupError(path)
+        raise RuntimeError(f"gh api {path}: {proc.stderr.strip()}")
+
+
+class LocalBackend:
+    """
+    Stand-in for GitHub over local checkouts at ``root/<org>/<repo>``.
+    The tree is what git tracks (or, outside git, the non-ignored working
+    tree); branch protection is represented by
+    ``.github/branch-protection.json``. With a
+    ``secrets_state`` directory, secret scans are incremental per repo.
+    """
+
+    def __init__(self, root: str, secrets_state: str | None = None):
+        self.root = os.path.expanduser(root)
+        self.secrets_state = secrets_state
+
+    def path(self, org: str, repo: str) -> str:
+        return os.path.join(self.root, org, repo)
+
+    def repos(self, org: str) -> list[str]:
+        base = os.path.join(self.root, org)
+        return sorted(d for d in os.listdir(base) if os.path.isdir(os.path.join(base, d)))
+
+    def head(self, org: str, repo: str) -> str:
+        path = self.path(org, repo)
+        if not os.path.isdir(path):
+            raise LookupError(f"{org}/{repo}")
+        proc = subprocess.run(["git", "-C", path, "rev-parse", "HEAD"], capture_output=True, text=True)
+        if proc.returncode == 0:
+            dirty = subprocess.run(["git", "-C", path, "status", "--porcelain"], capture_output=True, text=True).stdout
+            return proc.stdout.strip() + ("+" + self._worktree_digest(path) if dirty else "")
+        # Not a git checkout: fingerprint the tree so edits still invalidate the cache.
+        h = hashlib.sha1()
+        for dirpath, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                st = os.stat(os.path.join(dirpath, name))
+                h.update(f"{os.path.relpath(os.path.join(dirpath, name), path)}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+        return "tree-" + h.hexdigest()
+
+    @staticmethod
+    def _worktree_digest(path: str) -> str:
+        # Content of the uncommitted changes, not just which files changed:
+        # editing an already-modified file must still change the cache key.
+        h = hashlib.sha1(subprocess.run(["git", "-C", path, "diff", "HEAD", "--binary"],
+                                        capture_output=True, check=True).stdout)
+        untracked = subprocess.run(["git", "-C", path, "ls-files", "-o", "--exclude-standard", "-z"],
+                                   capture_output=True, check=True).stdout
+        for rel in sorted(filter(None, untracked.split(b"\0"))):
+            h.update(rel + b"\0" + _blob_hash(os.path.join(path, os.fsdecode(rel))).encode())
+        return h.hexdigest()[:12]
+
+    def tree(self, org: str, repo: str) -> set[str]:
+        paths = set()
+        for rel in SecretScanner(self.path(org, repo)).files():
+            paths.add(rel)
+            while "/" in rel:
+                rel = rel.rsplit("/", 1)[0]
+                paths.add(rel)
+        return paths
+
+    def protection(self, org: str, repo: str, branch: str) -> bool:
+        return os.path.exists(os.path.join(self.path(org, repo), ".github", "branch-protection.json"))
+
+    def secrets(self, org: str, repo: str) -> list[dict]:
+        state = os.path.join(self.secrets_state, f"{org}__{repo}.json") if self.secrets_state else None
+        return SecretScanner(self.path(org, repo), state).scan()
+
+
+# ── Result cache ──────────────────────────────────────────────────────────────
+
+class ScanCache:
+    """
+    Policy results keyed by (org/repo, commit SHA, policy id), stored as
+    JSON and written atomically. A repo whose HEAD has not moved is not
+    re-checked, except for policies reading a source outside
+    ``CONTENT_SOURCES`` (branch protection), which are never cached.
+    """
+
+    def __init__(self, path: str = CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.dirty = False
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f).get("entries", {})
+        except FileNotFoundError:
+            self.entries = {}
+
+    @staticmethod
+    def key(org: str, repo: str, sha: str, policy_id: str) -> str:
+        return f"{org}/{repo}@{sha}:{policy_id}"
+
+    def get(self, key: str):
+        return self.entries.get(key)
+
+    def put(self, key: str, result: dict) -> None:
+        with self._lock:
+            self.entries[key] = result
+            self.dirty = True
+
+    def retain(self, org: str, repo: str, sha: str) -> None:
+        """Drop entries for ``org/repo`` at any commit other than ``sha``."""
+        prefix, keep = f"{org}/{repo}@", f"{org}/{repo}@{sha}:"
+        with self._lock:
+            stale = [k for k in self.entries if k.startswith(prefix) and not k.startswith(keep)]
+            for k in stale:
+                del self.entries[k]
+            self.dirty = self.dirty or bool(stale)
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "entries": self.entries}, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+            self.dirty = False
+
+
+# ── Engine ────────────────────────────────────────────────────────────────────
+
+def fetch(backend, source: tuple, org: str, repo: str):
+    """Load one data source for a repo: ``backend.<name>(org, repo, *args)``."""
+    name, *args = source
+    return getattr(backend, name)(org, repo, *args)
+
+
+def evaluate_repo(backend, org: str, repo: str, sha: str | None, policies, *,
+                  cache: ScanCache | None = None, fail_fast: str | None = None) -> list[dict]:
+    """
+    Run ``policies`` against one repo. Each data source is fetched at most
+    once and only when a policy still needs it. Policies run most severe
+    (then cheapest) first; with ``fail_fast``, the first failure at or above that severity
+    marks the rest "skipped". Cached results for ``sha`` are reused for
+    policies over ``CONTENT_SOURCES``; the others are always re-fetched.
+    """
+    threshold = SEVERITIES.index(fail_fast) if fail_fast else -1
+    ordered = sorted(policies, key=lambda p: (SEVERITIES.index(p.severity), p.cost, p.source, p.id))
+    sources: dict[tuple, tuple] = {}
+    results, stop = [], None
+    for p in ordered:
+        if stop:
+            results.append(_result(org, repo, sha, p, "skipped", f"early exit after {stop}"))
+            continue
+        cacheable = cache is not None and sha and p.source[0] in CONTENT_SOURCES
+        key = ScanCache.key(org, repo, sha, p.id) if cacheable else None
+        hit = cache.get(key) if key else None
+        if hit:
+            result = {**hit, "cached": True}
+        else:
+            if p.source not in sources:
+                try:
+                    sources[p.source] = (fetch(backend, p.source, org, repo), None)
+                except Exception as e:
+                    sources[p.source] = (None, f"{type(e).__name__}: {e}")
+            data, err = sources[p.source]
+            status, detail = ("error", err) if err else p.evaluate(data)
+            result = _result(org, repo, sha, p, status, detail)
+            if key and status != "error":
+                cache.put(key, result)
+        results.append(result)
+        if result["status"] == "fail" and SEVERITIES.index(p.severity) <= threshold:
+            stop = p.id
+    return results
+
+
+def scan_many(targets, backend=None, *, policies=None, workers: int = 8, cache: ScanCache | None = None,
+              fail_fast: str | None = None) -> list[dict]:
+    """
+    Check ``policies`` (default: every registered policy) against every
+    (org, repo) in ``targets``, one repo per task on a bounded pool of
+    ``workers`` threads. Results already cached for a repo's current commit
+    are reused (``"cached": true``); errors and skips are never cached.
+    """
+    backend = backend or GitHubBackend()
+    policies = list(policies or POLICIES)
+    targets = list(dict.fromkeys(targets))
+    results: list[dict] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="compliance") as pool:
+        heads = dict(zip(targets, pool.map(lambda t: _head(backend, *t), targets)))
+        jobs = []
+        for (org, repo), (sha, err) in heads.items():
+            if err:
+                results += [_result(org, repo, None, p, "error", err) for p in policies]
+                continue
+            if cache is not None:
+                cache.retain(org, repo, sha)
+            jobs.append(pool.submit(evaluate_repo, backend, org, repo, sha, policies,
+                                    cache=cache, fail_fast=fail_fast))
+        for f in jobs:
+            results += f.result()
+    if cache is not None:
+        cache.save()
+    results.sort(key=lambda r: (r["org"], r["repo"], r["policy"]))
+    return results
+
+
+def _head(backend, org, repo):
+    try:
+        return backend.head(org, repo), None
+    except Exception as e:
+        return None, f"cannot resolve HEAD: {type(e).__name__}: {e}"
+
+
+def _result(org, repo, sha, policy: Policy, status, detail) -> dict:
+    return {"org": org, "repo": repo, "sha": sha, "policy": policy.id, "name": policy.name,
+            "severity": policy.severity, "status": status, "detail": detail, "cached": False}
+
+
+def report(results: list[dict], policies=None) -> dict:
+    """
+    Machine-readable scan report: per-status totals, failures per severity,
+    each repo's failing policy ids and worst failed severity, the policy
+    definitions, and every individual result.
+    """
+    totals = {s: sum(r["status"] == s for r in results) for s in ("pass", "fail", "error", "skipped")}
+    repos: dict[str, dict] = {}
+    for r in results:
+        entry = repos.setdefault(f"{r['org']}/{r['repo']}", {"sha": r["sha"], "failed": [], "worst": None})
+        if r["status"] == "fail":
+            entry["failed"].append(r["policy"])
+            if entry["worst"] is None or SEVERITIES.index(r["severity"]) < SEVERITIES.index(entry["worst"]):
+                entry["worst"] = r["severity"]
+    return {"generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "repos": len(repos), "checks": len(results),
+            "cached": sum(r["cached"] for r in results), **totals,
+            "failures_by_severity": {s: sum(r["status"] == "fail" and r["severity"] == s for r in results)
+                                     for s in SEVERITIES},
+            "by_repo": repos,
+            "policies": [p.to_dict() for p in (policies or POLICIES)],
+            "results": results}
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def scan(org="BlackRoad-OS-Inc", repo="blackroad-operator", backend=None):
     print(f"Scanning {org}/{repo}...")
-    for p in POLICIES:
-        # Simulate check
-        passed = p["id"] != "BR-005"  # .env should not exist
-        icon = "✓" if passed else "✗"
-        print(f"  {icon} [{p['severity']:8s}] {p['id']} {p['name']}")
+    results = scan_many([(org, repo)], backend)
+    for r in results:
+        icon = {"pass": "✓", "fail": "✗", "skipped": "-"}.get(r["status"], "?")
+        print(f"  {icon} [{r['severity']:8s}] {r['policy']} {r['name']}" + (f"  ({r['detail']})" if r["status"] == "error" else ""))
     print(f"\n{len(POLICIES)} policies checked.")
+    return results
+
+def audit(argv):
+    ap = argparse.ArgumentParser(prog="governance.py audit", description="Scan many repos; JSON results")
+    ap.add_argument("targets", nargs="*", help="org/repo, or just org to audit all of its repos")
+    ap.add_argument("--local", metavar="ROOT", default=os.getenv("BLACKROAD_COMPLIANCE_LOCAL"),
+                    help="check local checkouts under ROOT/<org>/<repo> instead of the GitHub API")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--cache", default=CACHE_PATH, help="result cache file ('' disables caching)")
+    ap.add_argument("--json", metavar="PATH", default="-", help="write the report here ('-' for stdout)")
+    ap.add_argument("--policy", action="append", choices=sorted(REGISTRY), help="only these policies (repeatable)")
+    ap.add_argument("--fail-fast", choices=SEVERITIES, help="stop a repo's scan at its first failure this severe")
+    args = ap.parse_args(argv)
+    backend = LocalBackend(args.local, SECRETS_STATE_DIR) if args.local else GitHubBackend()
+    policies = [REGISTRY[i] for i in args.policy] if args.policy else POLICIES
+    targets = []
+    for t in args.targets:
+        if "/" in t:
+            targets.append(tuple(t.split("/", 1)))
+        elif args.local:
+            targets += [(t, r) for r in backend.repos(t)]
+        else:
+            out = subprocess.run(["gh", "repo", "list", t, "--limit", "1000", "--json", "name", "--jq", ".[].name"],
+                                 capture_output=True, text=True, check=True).stdout
+            targets += [(t, r) for r in out.split()]
+    results = scan_many(targets, backend, policies=policies, workers=args.workers,
+                        cache=ScanCache(args.cache) if args.cache else None, fail_fast=args.fail_fast)
+    out = report(results, policies)
+    if args.json == "-":
+        json.dump(out, sys.stdout, indent=2); print()
+    else:
+        with open(args.json, "w") as f:
+            json.dump(out, f, indent=2)
+        print(f"{out['checks']} checks over {out['repos']} repos: {out['fail']} failed, {out['error']} errors, {out['cached']} cached", file=sys.stderr)
+    return 1 if out["fail"] or out["error"] else 0
+
+def secrets(argv):
+    ap = argparse.ArgumentParser(prog="governance.py secrets", description="BR-001 secret scan of a checkout")
+    ap.add_argument("path", nargs="?", default=".")
+    ap.add_argument("--state", help="incremental state file (only changed blobs are rescanned)")
+    ap.add_argument("--workers", type=int)
+    ap.add_argument("--json", action="store_true", help="print findings as JSON")
+    args = ap.parse_args(argv)
+    scanner = SecretScanner(args.path, args.state, workers=args.workers)
+    found = scanner.scan()
+    if args.json:
+        json.dump({"stats": scanner.stats, "findings": found}, sys.stdout, indent=2); print()
+    else:
+        for f in found:
+            print(f"  ✗ {f['path']}:{f['line']} {f['rule']} {f['match']}")
+        print(f"{scanner.stats['files']} files, {scanner.stats['scanned']} scanned, {len(found)} finding(s)", file=sys.stderr)
+    return 1 if found else 0
 
 def list_policies():
     for p in POLICIES:
-        print(f"  {p['id']} [{p['severity']:8s}] {p['name']}")
+        print(f"  {p.id} [{p.severity:8s}] {p.name}")
 
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "scan": scan(*(sys.argv[2:4] if len(sys.argv) > 3 else []))
+    elif len(sys.argv) > 1 and sys.argv[1] == "audit": sys.exit(audit(sys.argv[2:]))
+    elif len(sys.argv) > 1 and sys.argv[1] == "secrets": sys.exit(secrets(sys.argv[2:]))
     elif len(sys.argv) > 1 and sys.argv[1] == "policies": list_policies()
-    else: print("Usage: compliance.py [scan [org repo]|policies]"); list_policies()
+    else: print("Usage: compliance.py [scan [org repo]|audit [org/repo|org ...] [--local ROOT] [--json PATH]|secrets [path]|policies]"); list_policies()
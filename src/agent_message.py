@@ -3,43 +3,148 @@
 BlackRoad Foundation — Agent Communication Protocol
 Python reference implementation of RFC-0002: Agent Message Format
 """
+import asyncio
+import functools
 import hashlib
+import hmac
+import inspect
 import json
+import logging
+import math
+import struct
 import time
 import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field, asdict
-from typing import Any, Literal, Optional
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator, Literal, Optional
+
+try:
+    import msgpack
+except ImportError:  # optional: only needed for the binary wire codec
+    msgpack = None
 
 MessageType = Literal["request", "response", "event", "broadcast", "error"]
+OverflowPolicy = Literal["block", "drop_oldest", "drop_newest"]
+SignatureScheme = Literal["hmac-sha256", "sha256"]
+WireCodec = Literal["json", "msgpack"]
+
+# Compact wire format: short keys in a fixed order, None-valued fields omitted.
+WIRE_KEYS = (
+    ("i", "id"), ("v", "version"), ("f", "from_agent"), ("t", "to_agent"),
+    ("y", "type"), ("p", "topic"), ("d", "payload"), ("r", "reply_to"),
+    ("l", "ttl"), ("s", "timestamp"), ("g", "signature"),
+)
+_CODEC_TAG = {"json": b"J", "msgpack": b"M"}
+FRAME_HEADER = struct.Struct(">I")   # big-endian body length
+MAX_FRAME = 16 * 1024 * 1024         # FrameDecoder's default bound on one frame body
+
+logger = logging.getLogger("blackroad.bus")
+
+
+@functools.lru_cache(maxsize=64)
+def _hmac_key(secret: str):
+    # Keyed HMAC state with the key already padded; copy() per message is cheap.
+    return hmac.new(secret.encode(), digestmod=hashlib.sha256)
+
+
+def _new_id() -> str:
+    return f"msg_{uuid.uuid4().hex[:12]}"
 
 
-@dataclass
-class AgentMessage:
-    """RFC-0002 compliant agent message."""
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+class _MessageCache:
+    # Non-field slots for AgentMessage; dataclass(slots=True) only slots fields.
+    __slots__ = ("_epoch",)
+
+
+@dataclass(slots=True)
+class AgentMessage(_MessageCache):
+    """
+    RFC-0002 compliant agent message.
+
+    Slotted (no per-instance ``__dict__``) so large histories and replay logs
+    stay compact. ``id`` and ``timestamp`` are generated only when absent.
+    """
     from_agent: str          # e.g. "agent/alice-001"
     to_agent: str            # e.g. "agent/octavia-001" or "broadcast"
     type: MessageType
     topic: str               # e.g. "tasks.assign", "memory.store"
     payload: dict = field(default_factory=dict)
     reply_to: Optional[str] = None
-    ttl: int = 300           # seconds
+    ttl: Optional[int] = 300  # seconds; None or 0 never expires
 
-    id: str = field(default_factory=lambda: f"msg_{uuid.uuid4().hex[:12]}")
+    id: str = field(default_factory=_new_id)
     version: str = "1.0"
-    timestamp: str = field(default_factory=lambda: time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+    timestamp: str = field(default_factory=_now)
     signature: Optional[str] = None
 
-    def sign(self, secret: str = "GENESIS") -> "AgentMessage":
-        """Compute message signature for integrity."""
-        content = f"{self.id}:{self.from_agent}:{self.to_agent}:{json.dumps(self.payload, sort_keys=True)}"
-        self.signature = hashlib.sha256(f"{secret}:{content}".encode()).hexdigest()
+    @property
+    def epoch(self) -> float:
+        """``timestamp`` as epoch seconds, parsed once and cached until it changes."""
+        try:
+            cached = self._epoch
+        except AttributeError:
+            cached = None
+        if cached is None or cached[0] != self.timestamp:
+            dt = datetime.fromisoformat(self.timestamp.replace("Z", "+00:00"))
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            cached = self._epoch = (self.timestamp, dt.timestamp())
+        return cached[1]
+
+    @property
+    def expires_at(self) -> Optional[float]:
+        return self.epoch + self.ttl if self.ttl else None
+
+    def expired(self, now: Optional[float] = None) -> bool:
+        if not self.ttl:
+            return False
+        return (time.time() if now is None else now) >= self.epoch + self.ttl
+
+    def _content(self) -> bytes:
+        # Serialized on every call: a nested edit after sign() must change the bytes.
+        return f"{self.id}:{self.from_agent}:{self.to_agent}:".encode() \
+            + json.dumps(self.payload, sort_keys=True).encode()
+
+    def _digest(self, secret: str, scheme: SignatureScheme) -> str:
+        if scheme == "hmac-sha256":
+            mac = _hmac_key(secret).copy()
+            mac.update(self._content())
+            return mac.hexdigest()
+        if scheme == "sha256":
+            # Original scheme, kept so older agents' signatures still verify.
+            return hashlib.sha256(f"{secret}:".encode() + self._content()).hexdigest()
+        raise ValueError(f"unknown signature scheme: {scheme}")
+
+    def sign(self, secret: str = "GENESIS", scheme: SignatureScheme = "hmac-sha256") -> "AgentMessage":
+        """
+        Compute message signature for integrity. HMAC signatures are tagged
+        ``hmac-sha256:<hex>``; ``scheme="sha256"`` writes the original bare
+        hex digest that agents predating the tag can still verify.
+        """
+        digest = self._digest(secret, scheme)
+        self.signature = digest if scheme == "sha256" else f"{scheme}:{digest}"
         return self
 
-    def verify(self, secret: str = "GENESIS") -> bool:
-        """Verify message signature."""
-        content = f"{self.id}:{self.from_agent}:{self.to_agent}:{json.dumps(self.payload, sort_keys=True)}"
-        expected = hashlib.sha256(f"{secret}:{content}".encode()).hexdigest()
-        return self.signature == expected
+    def verify(self, secret: str = "GENESIS", scheme: Optional[SignatureScheme] = None) -> bool:
+        """
+        Verify message signature, picking the scheme from its tag: tagged
+        signatures are HMAC-SHA256, bare hex ones the original prefixed-secret
+        SHA-256, so upgraded and older agents can share a mesh. Pass
+        ``scheme`` to accept only that scheme (e.g. to refuse legacy ones).
+        """
+        if self.signature is None:
+            return False
+        tag, sep, digest = self.signature.rpartition(":")
+        found = tag if sep else "sha256"
+        if found not in ("hmac-sha256", "sha256") or (scheme is not None and scheme != found):
+            return False
+        return hmac.compare_digest(digest, self._digest(secret, found))
 
     def to_json(self) -> str:
         d = asdict(self)
@@ -54,33 +159,687 @@ class AgentMessage:
         d["to_agent"] = d.pop("to")
         return cls(**{k: v for k, v in d.items() if k in cls.__dataclass_fields__})
 
+    def to_wire(self) -> dict:
+        """Short-key dict in ``WIRE_KEYS`` order; shares the payload, no copies."""
+        d = {}
+        for short, name in WIRE_KEYS:
+            value = getattr(self, name)
+            if value is not None:
+                d[short] = value
+        return d
 
-class MessageBus:
-    """In-process agent message bus (reference implementation)."""
+    @classmethod
+    def from_wire(cls, d: dict) -> "AgentMessage":
+        """
+        Build a message straight from a decoded wire dict, bypassing
+        ``__init__``. The decoded payload is adopted as-is, not copied.
+        """
+        msg = cls.__new__(cls)
+        msg.from_agent = d["f"]
+        msg.to_agent = d["t"]
+        msg.type = d["y"]
+        msg.topic = d["p"]
+        msg.payload = d.get("d", {})
+        msg.reply_to = d.get("r")
+        msg.ttl = d.get("l")
+        msg.id = d.get("i") or _new_id()
+        msg.version = d.get("v", "1.0")
+        msg.timestamp = d.get("s") or _now()
+        msg.signature = d.get("g")
+        return msg
+
+    def to_bytes(self, codec: WireCodec = "json") -> bytes:
+        """Compact encoding for inter-node traffic; ``to_json`` stays the human format."""
+        return _CODEC_TAG[codec] + _dumps(self.to_wire(), codec)
+
+    @classmethod
+    def from_bytes(cls, data) -> "AgentMessage":
+        """Decode ``to_bytes`` output from any bytes-like object (memoryview slices included)."""
+        view = memoryview(data)
+        tag = bytes(view[:1])
+        if tag == b"J":
+            return cls.from_wire(json.loads(str(view[1:], "utf-8")))
+        if tag == b"M":
+            return cls.from_wire(_require_msgpack().unpackb(view[1:], raw=False))
+        raise ValueError(f"unknown wire codec tag: {tag!r}")
+
+
+def _require_msgpack():
+    if msgpack is None:
+        raise RuntimeError("msgpack codec requested but the msgpack package is not installed")
+    return msgpack
+
+
+def _dumps(obj: dict, codec: WireCodec) -> bytes:
+    if codec == "json":
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+    if codec == "msgpack":
+        return _require_msgpack().packb(obj, use_bin_type=True)
+    raise ValueError(f"unknown wire codec: {codec}")
+
+
+def encode_frame(msg: AgentMessage, codec: WireCodec = "json") -> bytes:
+    """``msg.to_bytes()`` prefixed with its 4-byte length."""
+    body = msg.to_bytes(codec)
+    return FRAME_HEADER.pack(len(body)) + body
+
+
+def iter_frames(buf, offset: int = 0) -> Iterator[AgentMessage]:
+    """
+    Decode consecutive length-prefixed frames from ``buf`` starting at
+    ``offset``. Frames are decoded from memoryview slices, never copied;
+    a trailing partial frame is left alone (see ``FrameDecoder``).
+    """
+    view = memoryview(buf)
+    end = len(view)
+    while offset + FRAME_HEADER.size <= end:
+        (size,) = FRAME_HEADER.unpack_from(view, offset)
+        start = offset + FRAME_HEADER.size
+        if start + size > end:
+            break
+        yield AgentMessage.from_bytes(view[start:start + size])
+        offset = start + size
+
+
+class FrameDecoder:
+    """
+    Incremental decoder for a stream of length-prefixed frames (e.g. a socket).
+
+    A header announcing more than ``max_frame`` bytes raises ValueError
+    instead of buffering toward it. A frame that fails to decode is dropped
+    from the buffer before its error propagates, so the next ``feed`` goes
+    on with the frame after it; messages decoded ahead of the bad frame come
+    back from that next ``feed``.
+    """
+
+    def __init__(self, max_frame: int = MAX_FRAME):
+        self.max_frame = max_frame
+        self._buf = bytearray()
+        self._pos = 0
+        self._ready: list[AgentMessage] = []
+
+    def feed(self, data) -> list[AgentMessage]:
+        """Append ``data`` and return every message completed by it."""
+        self._buf += data
+        view = memoryview(self._buf)
+        out, self._ready = self._ready, []
+        try:
+            end = len(view)
+            while self._pos + FRAME_HEADER.size <= end:
+                (size,) = FRAME_HEADER.unpack_from(view, self._pos)
+                if size > self.max_frame:
+                    raise ValueError(f"frame of {size} bytes exceeds max_frame={self.max_frame}")
+                start = self._pos + FRAME_HEADER.size
+                if start + size > end:
+                    break
+                try:
+                    msg = AgentMessage.from_bytes(view[start:start + size])
+                finally:
+                    self._pos = start + size
+                out.append(msg)
+        except Exception:
+            self._ready = out
+            raise
+        finally:
+            view.release()
+        # Compact once the consumed prefix dominates, keeping appends amortized O(1).
+        if self._pos and self._pos * 2 >= len(self._buf):
+            del self._buf[:self._pos]
+            self._pos = 0
+        return out
+
+    @property
+    def pending(self) -> int:
+        """Bytes buffered for a frame that has not fully arrived yet."""
+        return len(self._buf) - self._pos
+
+
+def verify_many(messages: Iterable[AgentMessage], secret: str = "GENESIS",
+                scheme: Optional[SignatureScheme] = None, workers: Optional[int] = None,
+                chunk: int = 256) -> list[bool]:
+    """
+    Verify a batch of messages, in order. Batches larger than ``chunk`` are
+    split across a thread pool; hashlib releases the GIL while hashing.
+    """
+    msgs = list(messages)
+    if workers == 1 or len(msgs) <= chunk:
+        return [m.verify(secret, scheme) for m in msgs]
+
+    def run(part: list[AgentMessage]) -> list[bool]:
+        return [m.verify(secret, scheme) for m in part]
+
+    parts = [msgs[i:i + chunk] for i in range(0, len(msgs), chunk)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return [ok for part in pool.map(run, parts) for ok in part]
+
+
+class _TopicNode:
+    __slots__ = ("children", "handlers")
+
+    def __init__(self):
+        self.children: dict[str, "_TopicNode"] = {}
+        self.handlers: list = []
+
+
+class TopicRouter:
+    """
+    Trie of dot-separated topic patterns (RFC-0002 namespaces).
+
+    ``*`` matches exactly one segment and ``#`` matches zero or more, so
+    ``tasks.*`` receives ``tasks.assign`` and ``memory.#`` receives every
+    ``memory`` topic. Match lists are cached per topic and the cache is
+    dropped whenever a subscription changes.
+    """
+
+    CACHE_SIZE = 4096
 
     def __init__(self):
-        self._subscribers: dict[str, list] = {}
-        self._log: list[AgentMessage] = []
+        self._root = _TopicNode()
+        self._cache: dict[str, tuple] = {}
+        self._all: Optional[tuple] = None
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, pattern: str, handler) -> None:
+        node = self._root
+        for seg in pattern.split("."):
+            node = node.children.setdefault(seg, _TopicNode())
+        node.handlers.append(handler)
+        self._count += 1
+        self._invalidate()
+
+    def remove(self, pattern: str, handler) -> bool:
+        path = [self._root]
+        for seg in pattern.split("."):
+            node = path[-1].children.get(seg)
+            if node is None:
+                return False
+            path.append(node)
+        try:
+            path[-1].handlers.remove(handler)
+        except ValueError:
+            return False
+        # Prune branches left empty so the trie does not keep dead topics.
+        for seg, parent, node in zip(reversed(pattern.split(".")), reversed(path[:-1]), reversed(path[1:])):
+            if node.handlers or node.children:
+                break
+            del parent.children[seg]
+        self._count -= 1
+        self._invalidate()
+        return True
+
+    def match(self, topic: str) -> tuple:
+        """Handlers subscribed to any pattern matching ``topic``."""
+        hit = self._cache.get(topic)
+        if hit is None:
+            seen: set[int] = set()
+            out: list = []
+            self._collect(self._root, topic.split("."), 0, seen, out)
+            hit = tuple(out)
+            if len(self._cache) >= self.CACHE_SIZE:
+                self._cache.clear()
+            self._cache[topic] = hit
+        return hit
+
+    def all_handlers(self) -> tuple:
+        """Every subscription, once per subscribed pattern (used for broadcast)."""
+        if self._all is None:
+            out: list = []
+            stack = [self._root]
+            while stack:
+                node = stack.pop()
+                out.extend(node.handlers)
+                stack.extend(node.children.values())
+            self._all = tuple(out)
+        return self._all
+
+    def _invalidate(self) -> None:
+        self._cache.clear()
+        self._all = None
+
+    def _collect(self, node: _TopicNode, parts: list[str], i: int, seen: set, out: list) -> None:
+        if i == len(parts):
+            if node.handlers and id(node) not in seen:
+                seen.add(id(node))
+                out.extend(node.handlers)
+            tail = node.children.get("#")
+            if tail is not None:
+                self._collect(tail, parts, i, seen, out)
+            return
+        child = node.children.get(parts[i])
+        if child is not None:
+            self._collect(child, parts, i + 1, seen, out)
+        child = node.children.get("*")
+        if child is not None:
+            self._collect(child, parts, i + 1, seen, out)
+        child = node.children.get("#")
+        if child is not None:
+            for j in range(i, len(parts) + 1):
+                self._collect(child, parts, j, seen, out)
+
+
+class MessageLog:
+    """
+    Bounded message history: a fixed-capacity ring buffer with per-topic and
+    per-agent secondary indexes.
+
+    Retention is enforced on append by count (``capacity``), approximate
+    encoded size (``max_bytes``) and age in seconds (``max_age``). Entries are
+    evicted oldest-first, so every index stays in log order and eviction pops
+    from the left of each index in O(1).
+    """
+
+    def __init__(self, capacity: int = 10_000, max_bytes: Optional[int] = None,
+                 max_age: Optional[float] = None):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._slots: list = [None] * capacity   # (msg | None, logged_at, size, index keys)
+        self._head = 0                          # seq of the oldest entry
+        self._tail = 0                          # seq the next entry will get
+        self._dead = 0                          # discarded entries not yet evicted
+        self._bytes = 0
+        self._last_at = 0.0
+        self._by_topic: dict[str, deque] = {}
+        self._by_from: dict[str, deque] = {}
+        self._by_to: dict[str, deque] = {}
+
+    def __len__(self) -> int:
+        return self._tail - self._head - self._dead
+
+    def __iter__(self):
+        for seq in range(self._head, self._tail):
+            msg = self._slots[seq % self.capacity][0]
+            if msg is not None:
+                yield msg
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def append(self, msg: AgentMessage) -> int:
+        """Log ``msg`` and return its sequence number."""
+        # Clamp so logged times never go backwards; time-range queries rely on it.
+        now = self._last_at = max(time.time(), self._last_at)
+        size = self._sizeof(msg) if self.max_bytes is not None else 0
+        if self._tail - self._head == self.capacity:
+            self._evict()
+        seq = self._tail
+        keys = (msg.topic, msg.from_agent, msg.to_agent)
+        self._slots[seq % self.capacity] = (msg, now, size, keys)
+        self._tail += 1
+        self._bytes += size
+        self._by_topic.setdefault(msg.topic, deque()).append(seq)
+        self._by_from.setdefault(msg.from_agent, deque()).append(seq)
+        self._by_to.setdefault(msg.to_agent, deque()).append(seq)
+        self.trim(now)
+        return seq
+
+    def discard(self, seq: int) -> bool:
+        """
+        Drop the entry ``seq`` in O(1), e.g. when it expires. The slot keeps
+        only its index keys until normal eviction reclaims it.
+        """
+        if not self._head <= seq < self._tail:
+            return False
+        slot = seq % self.capacity
+        msg, at, size, keys = self._slots[slot]
+        if msg is None:
+            return False
+        self._slots[slot] = (None, at, 0, keys)
+        self._bytes -= size
+        self._dead += 1
+        return True
+
+    def trim(self, now: Optional[float] = None) -> int:
+        """Apply byte and age retention. Returns the number of evicted entries."""
+        evicted = 0
+        if self.max_bytes is not None:
+            while self._bytes > self.max_bytes and len(self) > 1:
+                self._evict()
+                evicted += 1
+        if self.max_age is not None:
+            cutoff = (time.time() if now is None else now) - self.max_age
+            while self._head < self._tail and self._slots[self._head % self.capacity][1] < cutoff:
+                self._evict()
+                evicted += 1
+        return evicted
+
+    def query(self, topic: Optional[str] = None, limit: int = 50, *,
+              from_agent: Optional[str] = None, to_agent: Optional[str] = None,
+              since: Optional[float] = None, until: Optional[float] = None) -> list[AgentMessage]:
+        """
+        Newest ``limit`` messages matching every given filter, oldest first.
+        ``since``/``until`` are epoch seconds compared against the time the
+        message was logged.
+        """
+        if limit <= 0:
+            return []
+        # Walk the most selective index; the others become cheap predicate checks.
+        candidates = [ix.get(key, ()) for ix, key in
+                      ((self._by_topic, topic), (self._by_from, from_agent), (self._by_to, to_agent))
+                      if key is not None]
+        seqs = reversed(min(candidates, key=len)) if candidates else range(self._tail - 1, self._head - 1, -1)
+        out: list[AgentMessage] = []
+        for seq in seqs:
+            msg, at, _, _ = self._slots[seq % self.capacity]
+            if msg is None:
+                continue
+            if until is not None and at > until:
+                continue
+            if since is not None and at < since:
+                break
+            if ((topic is None or msg.topic == topic)
+                    and (from_agent is None or msg.from_agent == from_agent)
+                    and (to_agent is None or msg.to_agent == to_agent)):
+                out.append(msg)
+                if len(out) == limit:
+                    break
+        out.reverse()
+        return out
+
+    def _evict(self) -> None:
+        seq = self._head
+        slot = seq % self.capacity
+        msg, _, size, keys = self._slots[slot]
+        self._slots[slot] = None
+        self._head += 1
+        self._bytes -= size
+        if msg is None:
+            self._dead -= 1
+        for ix, key in zip((self._by_topic, self._by_from, self._by_to), keys):
+            q = ix[key]
+            q.popleft()
+            if not q:
+                del ix[key]
+
+    @staticmethod
+    def _sizeof(msg: AgentMessage) -> int:
+        # Approximate wire size; only computed when byte retention is enabled.
+        return (len(json.dumps(msg.payload, separators=(",", ":"), default=str))
+                + len(msg.id) + len(msg.from_agent) + len(msg.to_agent) + len(msg.topic)
+                + len(msg.timestamp) + len(msg.signature or "") + 64)
+
+
+class ExpiryWheel:
+    """
+    Hashed timer wheel for message expiry.
+
+    Items are bucketed by ``resolution``-second tick; ``advance`` releases
+    every bucket whose tick has passed. Scheduling and releasing are O(1) per
+    item, and a long idle gap costs at most one pass over the live buckets.
+    """
+
+    def __init__(self, resolution: float = 1.0):
+        self.resolution = resolution
+        self._buckets: dict[int, list] = {}
+        self._tick: Optional[int] = None   # last tick released
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def schedule(self, deadline: float, item) -> None:
+        # Round up so an item is never released before its deadline.
+        tick = math.ceil(deadline / self.resolution)
+        if self._tick is not None and tick <= self._tick:
+            tick = self._tick + 1
+        self._buckets.setdefault(tick, []).append(item)
+        self._size += 1
+
+    def advance(self, now: Optional[float] = None) -> list:
+        """Return every item whose deadline is at or before ``now``."""
+        current = math.floor((time.time() if now is None else now) / self.resolution)
+        last, self._tick = self._tick, current
+        if not self._buckets or (last is not None and current <= last):
+            return []
+        if last is not None and current - last <= len(self._buckets):
+            ticks = range(last + 1, current + 1)
+        else:
+            ticks = sorted(t for t in self._buckets if t <= current)
+        due: list = []
+        for t in ticks:
+            bucket = self._buckets.pop(t, None)
+            if bucket:
+                due.extend(bucket)
+        self._size -= len(due)
+        return due
+
+
+class MessageBus:
+    """
+    In-process agent message bus (reference implementation).
+
+    ``journal`` is an optional persistence layer: any object with
+    ``append(msg)`` and ``replay(from_seq=, after_id=, since=)``, such as
+    ``message_journal.MessageJournal``. Published messages are journaled
+    before delivery so subscribers can ``replay`` after a restart.
+    """
+
+    def __init__(self, history_size: int = 10_000, history_bytes: Optional[int] = None,
+                 history_age: Optional[float] = None, journal=None):
+        self._router = TopicRouter()
+        self._log = MessageLog(history_size, max_bytes=history_bytes, max_age=history_age)
+        self._expiry = ExpiryWheel()
+        self._journal = journal
 
     def subscribe(self, topic: str, handler) -> None:
-        self._subscribers.setdefault(topic, []).append(handler)
+        """Subscribe to an exact topic or a wildcard pattern (``tasks.*``, ``memory.#``)."""
+        self._router.add(topic, handler)
+
+    def unsubscribe(self, topic: str, handler) -> bool:
+        return self._router.remove(topic, handler)
 
     def publish(self, msg: AgentMessage) -> int:
         """Publish message to all subscribers. Returns delivery count."""
-        self._log.append(msg)
-        handlers = self._subscribers.get(msg.topic, [])
+        now = time.time()
+        self.expire(now)
+        if msg.expired(now):
+            return 0
+        if self._journal is not None:
+            self._journal.append(msg)
+        seq = self._log.append(msg)
+        if msg.ttl:
+            self._expiry.schedule(msg.expires_at, seq)
         if msg.to_agent == "broadcast":
-            for topic_handlers in self._subscribers.values():
-                for h in topic_handlers:
-                    h(msg)
-            return sum(len(v) for v in self._subscribers.values())
+            handlers = self._router.all_handlers()
+        else:
+            handlers = self._router.match(msg.topic)
         for h in handlers:
             h(msg)
         return len(handlers)
 
-    def history(self, topic: str = None, limit: int = 50) -> list[AgentMessage]:
-        msgs = self._log if topic is None else [m for m in self._log if m.topic == topic]
-        return msgs[-limit:]
+    def replay(self, topic: str, handler, *, after_id: Optional[str] = None,
+               since: Optional[float] = None, from_seq: Optional[int] = None) -> int:
+        """
+        Re-deliver journaled messages matching ``topic`` (wildcards allowed) to
+        ``handler``, e.g. to catch a subscriber up after a crash. Expired
+        messages are skipped. Returns the number delivered.
+        """
+        if self._journal is None:
+            raise RuntimeError("MessageBus has no journal to replay from")
+        router = TopicRouter()
+        router.add(topic, handler)
+        now = time.time()
+        delivered = 0
+        for msg in self._journal.replay(from_seq=from_seq, after_id=after_id, since=since):
+            if msg.expired(now):
+                continue
+            if msg.to_agent == "broadcast" or router.match(msg.topic):
+                handler(msg)
+                delivered += 1
+        return delivered
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Evict messages whose TTL has elapsed from history. Returns the count."""
+        return sum(self._log.discard(seq) for seq in self._expiry.advance(now))
+
+    def history(self, topic: str = None, limit: int = 50, *, from_agent: str = None,
+                to_agent: str = None, since: float = None, until: float = None) -> list[AgentMessage]:
+        self.expire()
+        return self._log.query(topic, limit, from_agent=from_agent, to_agent=to_agent,
+                               since=since, until=until)
+
+
+class Subscription:
+    """One AsyncMessageBus subscriber: its bounded queue, worker task and counters."""
+
+    def __init__(self, topic: str, handler, maxsize: int, overflow: OverflowPolicy):
+        self.topic = topic
+        self.handler = handler
+        self.overflow = overflow
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.task: Optional[asyncio.Task] = None
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.expired = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    async def offer(self, msg: AgentMessage) -> bool:
+        """Enqueue ``msg`` according to the overflow policy. False if it was dropped."""
+        item = (time.monotonic(), msg)
+        if self.overflow == "block":
+            await self.queue.put(item)
+            return True
+        if self.queue.full():
+            self.dropped += 1
+            if self.overflow == "drop_newest":
+                return False
+            self.queue.get_nowait()
+            self.queue.task_done()
+        self.queue.put_nowait(item)
+        return True
+
+    async def run(self) -> None:
+        while True:
+            queued_at, msg = await self.queue.get()
+            try:
+                if msg.expired():
+                    self.expired += 1
+                    continue
+                lag = time.monotonic() - queued_at
+                self.last_lag = lag
+                self.max_lag = max(self.max_lag, lag)
+                result = self.handler(msg)
+                if inspect.isawaitable(result):
+                    await result
+                self.delivered += 1
+            except Exception:
+                self.errors += 1
+                logger.exception("handler %r failed on %s", self.handler, msg.id)
+            finally:
+                self.queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "topic": self.topic,
+            "handler": getattr(self.handler, "__qualname__", repr(self.handler)),
+            "queued": self.queue.qsize(),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "expired": self.expired,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+        }
+
+
+class AsyncMessageBus:
+    """
+    Asyncio message bus: every subscriber gets its own bounded queue and
+    worker task, so a slow (or I/O-bound async) handler only delays itself.
+
+    ``overflow`` decides what a full queue does with a new message: ``block``
+    the publisher, ``drop_oldest`` queued message, or ``drop_newest``.
+    """
+
+    def __init__(self, maxsize: int = 1000, overflow: OverflowPolicy = "block",
+                 history_size: int = 10_000, history_bytes: Optional[int] = None,
+                 history_age: Optional[float] = None):
+        if overflow not in ("block", "drop_oldest", "drop_newest"):
+            raise ValueError(f"unknown overflow policy: {overflow}")
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self._router = TopicRouter()
+        self._subs: list[Subscription] = []
+        self._log = MessageLog(history_size, max_bytes=history_bytes, max_age=history_age)
+        self._expiry = ExpiryWheel()
+
+    def subscribe(self, topic: str, handler, *, maxsize: Optional[int] = None,
+                  overflow: Optional[OverflowPolicy] = None) -> Subscription:
+        """Subscribe a sync or async handler. Its worker starts on first delivery."""
+        sub = Subscription(topic, handler, self.maxsize if maxsize is None else maxsize,
+                           overflow or self.overflow)
+        self._router.add(topic, sub)
+        self._subs.append(sub)
+        return sub
+
+    async def unsubscribe(self, topic: str, handler) -> bool:
+        for sub in self._subs:
+            if sub.topic == topic and sub.handler is handler:
+                self._router.remove(topic, sub)
+                self._subs.remove(sub)
+                await self._stop(sub)
+                return True
+        return False
+
+    async def publish(self, msg: AgentMessage) -> int:
+        """Queue ``msg`` for every matching subscriber. Returns how many accepted it."""
+        now = time.time()
+        self.expire(now)
+        if msg.expired(now):
+            return 0
+        seq = self._log.append(msg)
+        if msg.ttl:
+            self._expiry.schedule(msg.expires_at, seq)
+        subs = self._router.all_handlers() if msg.to_agent == "broadcast" else self._router.match(msg.topic)
+        accepted = 0
+        for sub in subs:
+            if sub.task is None:
+                sub.task = asyncio.get_running_loop().create_task(sub.run())
+            if await sub.offer(msg):
+                accepted += 1
+        return accepted
+
+    async def join(self) -> None:
+        """Wait until every queued message has been handled."""
+        await asyncio.gather(*(sub.queue.join() for sub in self._subs))
+
+    async def close(self) -> None:
+        """Drain queues, then stop all worker tasks."""
+        await self.join()
+        for sub in self._subs:
+            await self._stop(sub)
+
+    def stats(self) -> list[dict]:
+        """Per-subscriber queue depth, delivery/drop/error counts and lag (seconds)."""
+        return [sub.stats() for sub in self._subs]
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Evict messages whose TTL has elapsed from history. Returns the count."""
+        return sum(self._log.discard(seq) for seq in self._expiry.advance(now))
+
+    def history(self, topic: str = None, limit: int = 50, *, from_agent: str = None,
+                to_agent: str = None, since: float = None, until: float = None) -> list[AgentMessage]:
+        self.expire()
+        return self._log.query(topic, limit, from_agent=from_agent, to_agent=to_agent,
+                               since=since, until=until)
+
+    @staticmethod
+    async def _stop(sub: Subscription) -> None:
+        if sub.task is not None:
+            sub.task.cancel()
+            try:
+                await sub.task
+            except asyncio.CancelledError:
+                pass
+            sub.task = None
 
 
 if __name__ == "__main__":
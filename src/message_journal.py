@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+BlackRoad Foundation — Durable Message Journal
+Append-only, hash-chained JSONL journal for MessageBus (RFC-0003 tier 2).
+
+Layout of a journal directory::
+
+    00000000000000000000.log   one record per line: {"n": seq, "h": chain hash, "m": wire msg}
+    00000000000000000000.idx   sparse index, struct (seq, time watermark, byte offset)
+    00000000000000000000.ids   "message-id seq offset" per record, for seek-by-id
+
+Segments are named after the first sequence number they hold and are sealed
+once they reach ``segment_bytes``. Writes are group-committed: records are
+buffered and fsync'd every ``sync_every`` records or ``sync_interval``
+seconds, whichever comes first; a background thread enforces the interval
+when no further appends arrive. Replay memory-maps segments and uses the
+sparse index to start near the requested position instead of scanning.
+
+Seek-by-id looks the active segment up in memory; a sealed segment's
+``.ids`` file is rewritten sorted by message id and binary-searched.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import weakref
+from bisect import bisect_left, bisect_right
+from typing import Iterator, Optional
+
+try:
+    from .agent_message import AgentMessage
+except ImportError:  # run as a script from src/
+    from agent_message import AgentMessage
+
+GENESIS_HASH = "0" * 64
+INDEX_ENTRY = struct.Struct(">QdQ")   # seq, max epoch before this record, byte offset
+
+
+def _chain(prev: str, body: bytes) -> str:
+    return hashlib.sha256(prev.encode() + body).hexdigest()
+
+
+class _Segment:
+    __slots__ = ("base", "path", "index", "size", "ids_sorted")
+
+    def __init__(self, directory: str, base: int):
+        self.base = base
+        self.path = os.path.join(directory, f"{base:020d}")
+        self.index: list[tuple[int, float, int]] = []
+        self.size = 0
+        self.ids_sorted: Optional[bool] = None   # unknown for segments sealed by older versions
+
+    def load_index(self) -> None:
+        try:
+            with open(self.path + ".idx", "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return
+        usable = len(raw) - len(raw) % INDEX_ENTRY.size
+        self.index = [INDEX_ENTRY.unpack_from(raw, off) for off in range(0, usable, INDEX_ENTRY.size)]
+
+
+def _id_key(line: bytes) -> bytes:
+    return line.rsplit(b" ", 2)[0]
+
+
+def _bisect_ids(mm, needle: bytes) -> Optional[int]:
+    """Seq for ``needle`` in an id-sorted ``.ids`` mapping, by binary search over lines."""
+    lo, hi = 0, len(mm)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        start = mm.rfind(b"\n", lo, mid) + 1 or lo
+        end = mm.find(b"\n", start)
+        end = len(mm) if end < 0 else end
+        if _id_key(mm[start:end]) < needle:
+            lo = end + 1
+        else:
+            hi = start
+    end = mm.find(b"\n", lo)
+    line = mm[lo:len(mm) if end < 0 else end]
+    if line and _id_key(line) == needle:
+        return int(line.rsplit(b" ", 2)[1])
+    return None
+
+
+def _flush_loop(ref, closed: threading.Event, interval: float) -> None:
+    # Keeps the ``sync_interval`` promise when appends stop arriving. Holds
+    # only a weak reference, so an unclosed journal can still be collected.
+    while not closed.wait(interval):
+        journal = ref()
+        if journal is None:
+            return
+        with journal._lock:
+            if journal._unsynced:
+                journal._sync()
+        del journal
+
+
+class MessageJournal:
+    """Segmented append-only message journal with group commit and indexed replay."""
+
+    def __init__(self, directory: str, *, segment_bytes: int = 64 * 1024 * 1024,
+                 index_every: int = 256, sync_every: int = 128, sync_interval: float = 0.05):
+        self.directory = os.path.expanduser(directory)
+        self.segment_bytes = segment_bytes
+        self.index_every = index_every
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._segments: list[_Segment] = []
+        self._next_seq = 0
+        self._head = GENESIS_HASH
+        self._watermark = 0.0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._log = self._idx = self._ids = None
+        self._since_index = 0
+        self._active_ids: dict[str, tuple[int, int]] = {}   # active segment: id → (seq, offset)
+        self._recover()
+        self._closed = threading.Event()
+        self._flusher = None
+        if sync_interval and sync_interval > 0:
+            self._flusher = threading.Thread(target=_flush_loop, name="journal-sync", daemon=True,
+                                             args=(weakref.ref(self), self._closed, sync_interval))
+            self._flusher.start()
+
+    # ── Write path ────────────────────────────────────────────────────────────
+
+    def append(self, msg: AgentMessage) -> int:
+        """Journal ``msg`` and return its sequence number."""
+        body = json.dumps(msg.to_wire(), separators=(",", ":"), ensure_ascii=False).encode()
+        with self._lock:
+            seg = self._segments[-1]
+            if seg.size >= self.segment_bytes:
+                seg = self._roll()
+            seq = self._next_seq
+            self._head = _chain(self._head, body)
+            line = b'{"n":%d,"h":"%s","m":%s}\n' % (seq, self._head.encode(), body)
+            offset = seg.size
+            if self._since_index == 0 or self._since_index >= self.index_every:
+                entry = (seq, self._watermark, offset)
+                seg.index.append(entry)
+                self._idx.write(INDEX_ENTRY.pack(*entry))
+                self._since_index = 0
+            self._since_index += 1
+            self._log.write(line)
+            self._ids.write(b"%s %d %d\n" % (msg.id.encode(), seq, offset))
+            self._active_ids[msg.id] = (seq, offset)
+            seg.size += len(line)
+            self._next_seq += 1
+            self._watermark = max(self._watermark, msg.epoch)
+            self._unsynced += 1
+            if (self._unsynced >= self.sync_every
+                    or time.monotonic() - self._last_sync >= self.sync_interval):
+                self._sync()
+            return seq
+
+    def sync(self) -> None:
+        """Force buffered records to disk."""
+        with self._lock:
+            self._sync()
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._flusher is not None and self._flusher is not threading.current_thread():
+            self._flusher.join()
+        with self._lock:
+            if self._log is not None:
+                self._sync()
+                for f in (self._log, self._idx, self._ids):
+                    f.close()
+                self._log = self._idx = self._ids = None
+
+    def __enter__(self) -> "MessageJournal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._next_seq - (self._segments[0].base if self._segments else 0)
+
+    @property
+    def head(self) -> str:
+        """Chain hash of the newest record."""
+        return self._head
+
+    # ── Read path ─────────────────────────────────────────────────────────────
+
+    def replay(self, *, from_seq: Optional[int] = None, after_id: Optional[str] = None,
+               since: Optional[float] = None) -> Iterator[AgentMessage]:
+        """
+        Yield journaled messages in order, starting at ``from_seq``, just after
+        the message ``after_id``, or at the first message timestamped at or
+        after ``since`` (epoch seconds). With no arguments, replays everything.
+        """
+        self.sync()
+        if after_id is not None:
+            found = self._find_id(after_id)
+            if found is None:
+                raise KeyError(f"message {after_id} not in journal")
+            from_seq = found + 1
+        segments = list(self._segments)
+        if from_seq is not None:
+            start = max(0, bisect_right([s.base for s in segments], from_seq) - 1)
+        elif since is not None:
+            # First index entry of a segment carries the watermark of everything before it.
+            start = 0
+            for i, seg in enumerate(segments):
+                if seg.index and seg.index[0][1] < since:
+                    start = i
+        else:
+            start = 0
+        for seg in segments[start:]:
+            yield from self._scan(seg, from_seq, since)
+
+    def verify_chain(self) -> bool:
+        """Recompute every chain hash; False if any record was altered or dropped."""
+        self.sync()
+        prev = GENESIS_HASH
+        for seg in self._segments:
+            for _, h, body in self._records(seg, 0):
+                prev = _chain(prev, body)
+                if prev != h:
+                    return False
+        return True
+
+    def _scan(self, seg: _Segment, from_seq: Optional[int], since: Optional[float]) -> Iterator[AgentMessage]:
+        pos = 0
+        if seg.index:
+            if from_seq is not None:
+                k = bisect_right([e[0] for e in seg.index], from_seq) - 1
+            elif since is not None:
+                # Everything before entry k is older than its watermark, so start
+                # at the last entry whose watermark is still below ``since``.
+                k = bisect_left([e[1] for e in seg.index], since) - 1
+            else:
+                k = 0
+            pos = seg.index[max(k, 0)][2]
+        for seq, _, body in self._records(seg, pos):
+            if from_seq is not None and seq < from_seq:
+                continue
+            msg = AgentMessage.from_wire(json.loads(body))
+            if since is not None and msg.epoch < since:
+                continue
+            yield msg
+
+    def _records(self, seg: _Segment, pos: int) -> Iterator[tuple[int, str, bytes]]:
+        if seg.size == 0:
+            return
+        with open(seg.path + ".log", "rb") as f, \
+                mmap.mmap(f.fileno(), seg.size, access=mmap.ACCESS_READ) as mm:
+            while pos < seg.size:
+                end = mm.find(b"\n", pos)
+                if end < 0:
+                    break
+                # Fixed record prefix: {"n":<seq>,"h":"<64 hex>","m":<body>}
+                comma = mm.find(b",", pos)
+                seq = int(mm[pos + 5:comma])
+                h = mm[comma + 6:comma + 70].decode()
+                yield seq, h, mm[comma + 76:end - 1]
+                pos = end + 1
+
+    def _find_id(self, msg_id: str) -> Optional[int]:
+        with self._lock:
+            hit = self._active_ids.get(msg_id)
+            sealed = self._segments[:-1]
+        if hit is not None:
+            return hit[0]
+        needle = msg_id.encode()
+        for seg in reversed(sealed):
+            if not seg.ids_sorted:
+                with self._lock:   # one-off migration of a segment sealed unsorted
+                    self._sort_ids(seg)
+            try:
+                with open(seg.path + ".ids", "rb") as f:
+                    if os.fstat(f.fileno()).st_size == 0:
+                        continue
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        seq = _bisect_ids(mm, needle)
+            except FileNotFoundError:
+                continue
+            if seq is not None:
+                return seq
+        return None
+
+    @staticmethod
+    def _sort_ids(seg: _Segment, entries: Optional[dict] = None) -> None:
+        """Rewrite a sealed segment's ``.ids`` sorted by id (atomically), from ``entries`` or the file."""
+        if entries is not None:
+            lines = [b"%s %d %d\n" % (k.encode(), seq, off) for k, (seq, off) in entries.items()]
+        else:
+            try:
+                with open(seg.path + ".ids", "rb") as f:
+                    lines = f.read().splitlines(keepends=True)
+            except FileNotFoundError:
+                lines = []
+            if all(_id_key(a) <= _id_key(b) for a, b in zip(lines, lines[1:])):
+                seg.ids_sorted = True
+                return
+        lines.sort(key=_id_key)
+        tmp = seg.path + ".ids.tmp"
+        with open(tmp, "wb") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, seg.path + ".ids")
+        seg.ids_sorted = True
+
+    # ── Segments & recovery ───────────────────────────────────────────────────
+
+    def _sync(self) -> None:
+        if self._log is None:
+            return
+        for f in (self._log, self._idx, self._ids):
+            f.flush()
+        os.fsync(self._log.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _open(self, seg: _Segment) -> None:
+        self._log = open(seg.path + ".log", "ab")
+        self._idx = open(seg.path + ".idx", "ab")
+        self._ids = open(seg.path + ".ids", "ab")
+
+    def _roll(self) -> _Segment:
+        self._sync()
+        os.fsync(self._idx.fileno())
+        os.fsync(self._ids.fileno())
+        for f in (self._log, self._idx, self._ids):
+            f.close()
+        self._sort_ids(self._segments[-1], self._active_ids)
+        self._active_ids = {}
+        seg = _Segment(self.directory, self._next_seq)
+        self._segments.append(seg)
+        self._since_index = 0
+        self._open(seg)
+        return seg
+
+    def _recover(self) -> None:
+        bases = sorted(int(name[:-4]) for name in os.listdir(self.directory)
+                       if name.endswith(".log") and name[:-4].isdigit())
+        for base in bases:
+            seg = _Segment(self.directory, base)
+            seg.size = os.path.getsize(seg.path + ".log")
+            seg.load_index()
+            self._segments.append(seg)
+        if not self._segments:
+            self._segments.append(_Segment(self.directory, 0))
+        else:
+            self._rebuild_tail(self._segments[-1])
+        self._open(self._segments[-1])
+
+    def _rebuild_tail(self, seg: _Segment) -> None:
+        # The active segment may end in a torn write and its side files may lag
+        # the log; rescan it (bounded by segment_bytes) and rewrite both.
+        with open(seg.path + ".log", "rb") as f:
+            data = f.read()
+        good = data.rfind(b"\n") + 1
+        if good < len(data):
+            with open(seg.path + ".log", "r+b") as f:
+                f.truncate(good)
+        seg.size = good
+        seg.index = []
+        self._next_seq = seg.base
+        self._since_index = 0
+        if len(self._segments) > 1:
+            prev = self._segments[-2]
+            self._head = self._last_hash(prev)
+            self._watermark = self._max_epoch(prev)
+        ids = bytearray()
+        pos = 0
+        for line in data[:good].splitlines(keepends=True):
+            rec = json.loads(line)
+            msg = AgentMessage.from_wire(rec["m"])
+            if self._since_index == 0 or self._since_index >= self.index_every:
+                seg.index.append((rec["n"], self._watermark, pos))
+                self._since_index = 0
+            self._since_index += 1
+            ids += b"%s %d %d\n" % (msg.id.encode(), rec["n"], pos)
+            self._active_ids[msg.id] = (rec["n"], pos)
+            self._watermark = max(self._watermark, msg.epoch)
+            self._head = rec["h"]
+            self._next_seq = rec["n"] + 1
+            pos += len(line)
+        with open(seg.path + ".idx", "wb") as f:
+            f.write(b"".join(INDEX_ENTRY.pack(*e) for e in seg.index))
+        with open(seg.path + ".ids", "wb") as f:
+            f.write(ids)
+
+    def _max_epoch(self, seg: _Segment) -> float:
+        # The last index entry bounds everything before it; only the records
+        # after it (fewer than index_every) need decoding.
+        top, pos = (seg.index[-1][1], seg.index[-1][2]) if seg.index else (0.0, 0)
+        for _, _, body in self._records(seg, pos):
+            top = max(top, AgentMessage.from_wire(json.loads(body)).epoch)
+        return top
+
+    @staticmethod
+    def _last_hash(seg: _Segment) -> str:
+        with open(seg.path + ".log", "rb") as f:
+            f.seek(max(0, seg.size - 64 * 1024))
+            tail = f.read().rstrip(b"\n")
+        last = tail[tail.rfind(b"\n") + 1:]
+        return json.loads(last)["h"] if last else GENESIS_HASH
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    path = sys.argv[1] if len(sys.argv) > 1 else tempfile.mkdtemp(prefix="br-journal-")
+    with MessageJournal(path) as journal:
+        for i in range(3):
+            journal.append(AgentMessage(from_agent="agent/alice-001", to_agent="agent/octavia-001",
+                                        type="event", topic="tasks.progress", payload={"step": i}))
+        print(f"✅ Journal at {path}: {len(journal)} record(s), chain ok={journal.verify_chain()}")
+        for msg in journal.replay():
+            print(f"   {msg.id} {msg.topic} {msg.payload}")
@@ -3,26 +3,334 @@ BlackRoad Notion Integration
 Sync docs, READMEs, and release notes to Notion.
 """
 from __future__ import annotations
-import os, re, glob, logging
+import os, re, glob, json, hashlib, logging, random, threading, time, inspect, difflib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from itertools import islice
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterable, Iterator, Optional, Union
 from notion_client import Client
+from notion_client.errors import APIErrorCode, RequestTimeoutError
 
 logger = logging.getLogger("blackroad.notion")
 
 NOTION_API_KEY = os.getenv("NOTION_API_KEY", "")
 NOTION_DATABASE_ID = os.getenv("NOTION_DATABASE_ID", "")
+MANIFEST_DIR = os.path.expanduser("~/.blackroad/notion-sync")
+NOTION_RATE_LIMIT = float(os.getenv("NOTION_RATE_LIMIT", "3"))   # requests/second per integration
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Calls that are not safe to repeat: a timeout or 5xx may hide a request that
+# was applied, so these are retried only on 429 (definitely not applied).
+NON_IDEMPOTENT = {"pages.create", "blocks.children.append"}
+APPEND_LIMIT = 100      # children per blocks.children.append / pages.create
+TEXT_LIMIT = 2000       # characters per rich_text object
+RICH_TEXT_LIMIT = 100   # rich_text objects per block
+# Bump when markdown → blocks output changes, so pages rendered by an older
+# converter (v1 truncated at 50 lines / 3000 chars / 100 blocks and dropped
+# code blocks) are re-synced even though their source file is unchanged.
+CONVERTER_VERSION = 2
+
+# Fence info strings → Notion code block languages; anything else is "plain text".
+CODE_LANGUAGES = {
+    "bash": "bash", "sh": "shell", "shell": "shell", "zsh": "shell", "console": "shell",
+    "c": "c", "cpp": "c++", "c++": "c++", "csharp": "c#", "cs": "c#", "css": "css",
+    "diff": "diff", "docker": "docker", "dockerfile": "docker", "go": "go",
+    "graphql": "graphql", "html": "html", "java": "java", "javascript": "javascript",
+    "js": "javascript", "json": "json", "kotlin": "kotlin", "makefile": "makefile",
+    "markdown": "markdown", "md": "markdown", "mermaid": "mermaid", "python": "python",
+    "py": "python", "ruby": "ruby", "rb": "ruby", "rust": "rust", "rs": "rust",
+    "sql": "sql", "swift": "swift", "toml": "toml", "typescript": "typescript",
+    "ts": "typescript", "xml": "xml", "yaml": "yaml", "yml": "yaml",
+}
+
+Content = Union[str, os.PathLike]
+
+
+class SyncManifest:
+    """
+    Local record of what was last synced: doc key → content hash, page id,
+    and the ``CONVERTER_VERSION`` that rendered it (absent means v1).
+
+    Stored as JSON (one file per Notion database) and written atomically, so an
+    interrupted sync never leaves a half-written manifest behind.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: dict[str, dict] = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f).get("entries", {})
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def digest_file(path: str, chunk: int = 1 << 20) -> str:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            while block := f.read(chunk):
+                h.update(block)
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.entries.get(key)
+
+    def current(self, key: str, content_hash: str) -> bool:
+        """Whether ``key`` was synced from this content by the current converter."""
+        entry = self.entries.get(key)
+        return bool(entry) and entry["hash"] == content_hash \
+            and entry.get("converter", 1) == CONVERTER_VERSION
+
+    def put(self, key: str, content_hash: str, page_id: str, title: str) -> None:
+        with self._lock:
+            self.entries[key] = {"hash": content_hash, "page_id": page_id, "title": title,
+                                 "converter": CONVERTER_VERSION}
+            self.dirty = True
+
+    def pop(self, key: str) -> Optional[dict]:
+        with self._lock:
+            self.dirty = True
+            return self.entries.pop(key, None)
+
+    def keys_for(self, repo: str) -> list[str]:
+        prefix = f"{repo}:"
+        return [k for k in self.entries if k.startswith(prefix)]
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "entries": self.entries}, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+            self.dirty = False
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: ``rate`` requests/second with bursts of up to
+    ``capacity``. Callers reserve a token and sleep outside the lock, so
+    waiters are served in arrival order.
+    """
+
+    def __init__(self, rate: float = NOTION_RATE_LIMIT, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, blocking as needed. Returns seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+@dataclass
+class SyncReport:
+    """Outcome and per-endpoint call metrics of one sync run."""
+
+    synced: int = 0
+    skipped: int = 0
+    failed: int = 0
+    archived: int = 0
+    retries: int = 0
+    throttled_s: float = 0.0
+    errors: dict[str, str] = field(default_factory=dict)
+    latency: dict[str, list[float]] = field(default_factory=dict)
+    started: float = field(default_factory=time.monotonic)
+    elapsed: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record_call(self, endpoint: str, seconds: float) -> None:
+        with self._lock:
+            self.latency.setdefault(endpoint, []).append(seconds)
+
+    def count(self, outcome: str, n: int = 1) -> None:
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + n)
+
+    def summary(self) -> dict:
+        """JSON-friendly view: counters plus call count and p50/p95/max ms per endpoint."""
+        calls = {}
+        for endpoint, samples in sorted(self.latency.items()):
+            ordered = sorted(samples)
+            pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+            calls[endpoint] = {"calls": len(ordered), "p50_ms": pick(0.50),
+                               "p95_ms": pick(0.95), "max_ms": round(ordered[-1] * 1000, 1)}
+        return {"synced": self.synced, "skipped": self.skipped, "failed": self.failed,
+                "archived": self.archived, "retries": self.retries,
+                "throttled_s": round(self.throttled_s, 3), "elapsed_s": round(self.elapsed, 3),
+                "errors": dict(self.errors), "calls": calls}
+
+
+class RateLimitedClient:
+    """
+    Proxy over ``notion_client.Client``. Every API method call (at any depth,
+    e.g. ``blocks.children.append``) takes a token from the shared bucket, is
+    timed into ``report``, and is retried with exponential backoff and jitter
+    on 429/5xx and timeouts, honouring ``Retry-After`` when Notion sends one.
+    ``NON_IDEMPOTENT`` endpoints are retried on 429 only.
+    """
+
+    def __init__(self, client, limiter: TokenBucket | None = None, *,
+                 max_retries: int = 5, backoff: float = 0.5, _root=None, _path: str = ""):
+        self._target = client
+        self._path = _path
+        self._root = _root or self
+        if _root is None:
+            self.limiter = limiter or TokenBucket()
+            self.max_retries = max_retries
+            self.backoff = backoff
+            self.report = SyncReport()
+
+    def __getattr__(self, name: str):
+        target = getattr(self._target, name)
+        path = f"{self._path}.{name}" if self._path else name
+        if inspect.ismethod(target) or inspect.isfunction(target):
+            return lambda *args, **kwargs: self._root._call(path, target, args, kwargs)
+        return RateLimitedClient(target, _root=self._root, _path=path)
+
+    def _call(self, endpoint: str, fn, args, kwargs):
+        for attempt in range(self.max_retries + 1):
+            waited = self.limiter.acquire()
+            report = self.report
+            if waited:
+                report.count("throttled_s", waited)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, endpoint in NON_IDEMPOTENT)
+                if delay is None:
+                    raise
+                report.count("retries")
+                logger.info("↻ %s: %s; retrying in %.2fs", endpoint, e, delay)
+                time.sleep(delay)
+            finally:
+                report.record_call(endpoint, time.perf_counter() - t0)
+
+    def _retry_delay(self, exc: Exception, attempt: int, only_429: bool = False) -> float | None:
+        status = getattr(exc, "status", None)
+        if only_429:
+            retryable = status == 429
+        else:
+            retryable = status in RETRY_STATUSES or isinstance(exc, RequestTimeoutError)
+        if attempt >= self.max_retries or not retryable:
+            return None
+        headers = getattr(exc, "headers", None) or {}
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return self.backoff * 2 ** attempt * (0.5 + random.random())
+
+
+# ── Markdown → blocks ──────────────────────────
+
+def _block(kind: str, text: str, **extra) -> Iterator[dict]:
+    """One block of ``kind``, split into several if ``text`` exceeds Notion's per-block limits."""
+    pieces = [text[i:i + TEXT_LIMIT] for i in range(0, len(text), TEXT_LIMIT)] or [""]
+    for i in range(0, len(pieces), RICH_TEXT_LIMIT):
+        rich = [{"type": "text", "text": {"content": p}} for p in pieces[i:i + RICH_TEXT_LIMIT]]
+        yield {"object": "block", "type": kind, kind: {"rich_text": rich, **extra}}
+
+
+_HEADING = re.compile(r"(#{1,6})\s+(.*)")
+_BULLET = re.compile(r"\s*[-*+]\s+(.*)")
+_NUMBERED = re.compile(r"\s*\d+[.)]\s+(.*)")
+_QUOTE = re.compile(r">\s?(.*)")
+_FENCE = re.compile(r"\s*(```|~~~)\s*([\w+#-]*)")
+_DIVIDER = re.compile(r"\s*([-*_])(\s*\1){2,}\s*")
+
+
+def iter_md_blocks(lines: Iterable[str]) -> Iterator[dict]:
+    """
+    Convert markdown to Notion blocks, one line at a time.
+
+    ``lines`` may be any iterable (an open file streams it), and blocks are
+    yielded as soon as they are complete, so memory is bounded by the
+    largest code block rather than the document.
+    """
+    fence = None
+    language = "plain text"
+    code: list[str] = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if fence:
+            if line.strip().startswith(fence):
+                yield from _block("code", "\n".join(code), language=language)
+                fence, code = None, []
+            else:
+                code.append(line)
+            continue
+        if m := _FENCE.match(line):
+            fence = m.group(1)
+            language = CODE_LANGUAGES.get(m.group(2).lower(), "plain text")
+        elif m := _HEADING.match(line):
+            yield from _block(f"heading_{min(len(m.group(1)), 3)}", m.group(2).strip())
+        elif _DIVIDER.fullmatch(line):
+            yield {"object": "block", "type": "divider", "divider": {}}
+        elif m := _BULLET.match(line):
+            yield from _block("bulleted_list_item", m.group(1))
+        elif m := _NUMBERED.match(line):
+            yield from _block("numbered_list_item", m.group(1))
+        elif m := _QUOTE.match(line):
+            yield from _block("quote", m.group(1))
+        elif line.strip():
+            yield from _block("paragraph", line)
+    if fence:   # unterminated fence: keep what we have
+        yield from _block("code", "\n".join(code), language=language)
+
+
+def _page_gone(exc: Exception) -> bool:
+    """Whether ``exc`` says the page no longer exists (404) or was archived."""
+    code = getattr(exc, "code", None)
+    if code == APIErrorCode.ObjectNotFound or getattr(exc, "status", None) == 404:
+        return True
+    return code == APIErrorCode.ValidationError and "archived" in str(exc).lower()
+
+
+def _block_key(block: dict) -> tuple:
+    """What makes two blocks equal for diffing: type, plain text and code language."""
+    kind = block["type"]
+    body = block.get(kind) or {}
+    text = "".join((rt.get("text") or {}).get("content", rt.get("plain_text", ""))
+                   for rt in body.get("rich_text", ()))
+    return kind, text, body.get("language")
 
 
 class BlackRoadNotionClient:
     """Sync BlackRoad docs to Notion workspace."""
 
-    def __init__(self, token: Optional[str] = None, db_id: Optional[str] = None):
+    workers = 8             # files synced concurrently
+    delete_workers = 4      # per-page concurrent block deletions
+    diff_blocks = True      # update pages by block diff rather than delete-all/append-all
+    last_report: SyncReport | None = None
+
+    def __init__(self, token: Optional[str] = None, db_id: Optional[str] = None, *,
+                 rate_limit: float = NOTION_RATE_LIMIT, workers: int | None = None):
         self.token = token or NOTION_API_KEY
         self.db_id = db_id or NOTION_DATABASE_ID
         if not self.token:
             raise ValueError("NOTION_API_KEY env var not set")
-        self.client = Client(auth=self.token)
+        self.client = RateLimitedClient(Client(auth=self.token), TokenBucket(rate_limit))
+        if workers:
+            self.workers = workers
 
     # ──────────────────────────────────────────────
     # Core Sync
@@ -31,20 +339,32 @@ class BlackRoadNotionClient:
     def upsert_page(
         self,
         title: str,
-        content: str,
+        content: Content,
         *,
         tags: list[str] | None = None,
         repo: str = "",
+        page_id: str | None = None,
+        diff: bool | None = None,
     ) -> str:
-        """Create or update a Notion page in the configured database."""
-        # Check if exists
-        results = self.client.databases.query(
-            database_id=self.db_id,
-            filter={"property": "Name", "title": {"equals": title}}
-        )
+        """
+        Create or update a Notion page in the configured database. A known
+        ``page_id`` skips the title lookup query. Existing pages are patched
+        with a block-level diff unless ``diff`` (default ``diff_blocks``) is off.
+        ``content`` is markdown text or a path to a markdown file. New pages
+        are converted and uploaded in streamed batches of APPEND_LIMIT blocks,
+        in bounded memory. Updates are not streamed: the diff needs the whole
+        converted document and the page's current blocks in memory at once,
+        and the ``diff=False`` rewrite still lists every existing block.
+        """
+        if page_id:
+            results = {"results": [{"id": page_id}]}
+        else:
+            results = self.client.databases.query(
+                database_id=self.db_id,
+                filter={"property": "Name", "title": {"equals": title}}
+            )
 
-        # Build block children from markdown
-        blocks = self._md_to_blocks(content[:3000])
+        blocks = self._iter_blocks(content)
 
         properties: dict = {
             "Name": {"title": [{"text": {"content": title[:100]}}]},
@@ -57,40 +377,102 @@ class BlackRoadNotionClient:
         if results["results"]:
             page_id = results["results"][0]["id"]
             self.client.pages.update(page_id=page_id, properties=properties)
-            # Clear and replace blocks
-            existing = self.client.blocks.children.list(page_id)["results"]
-            for block in existing[:100]:
-                try:
-                    self.client.blocks.delete(block_id=block["id"])
-                except:
-                    pass
-            if blocks:
-                self.client.blocks.children.append(page_id, children=blocks)
-            logger.info("✓ Updated: %s", title)
+            existing = list(self._list_children(page_id))
+            if self.diff_blocks if diff is None else diff:
+                ops = self._patch_blocks(page_id, existing, list(blocks))
+            else:
+                ops = self._replace_blocks(page_id, existing, blocks)
+            logger.info("✓ Updated: %s (%d block ops)", title, ops)
             return page_id
         else:
             page = self.client.pages.create(
                 parent={"database_id": self.db_id},
                 properties=properties,
-                children=blocks,
+                children=list(islice(blocks, APPEND_LIMIT)),
             )
+            self._append_blocks(page["id"], blocks)
             logger.info("✓ Created: %s", title)
             return page["id"]
 
-    def sync_repo_docs(self, repo_path: str = ".", repo_name: str = "") -> int:
-        """Sync all .md files from a repo to Notion."""
-        synced = 0
+    def sync_repo_docs(
+        self,
+        repo_path: str = ".",
+        repo_name: str = "",
+        *,
+        manifest: SyncManifest | None = None,
+        prune: bool = True,
+        workers: int | None = None,
+        progress: Callable[[str, str], None] | None = None,
+    ) -> int:
+        """
+        Sync all .md files from a repo to Notion, incrementally and concurrently.
+
+        Files whose content hash and converter version match the manifest
+        are skipped; known pages
+        are updated by id without a title lookup; with ``prune``, pages whose
+        source file disappeared are archived. Changed files are synced on
+        ``workers`` threads sharing the client's rate limit. ``progress`` is
+        called with (key, outcome) as each file finishes. Returns the number
+        of pages created or updated; details land in ``self.last_report``.
+        """
+        manifest = manifest or self.manifest()
+        repo_key = repo_name or os.path.basename(os.path.abspath(repo_path))
+        report = self.last_report = SyncReport()
+        if isinstance(self.client, RateLimitedClient):
+            self.client.report = report
+        notify = progress or (lambda key, outcome: None)
+
+        pending: list[tuple[str, str, str, dict | None]] = []
+        seen: set[str] = set()
         for md_file in glob.glob(f"{repo_path}/**/*.md", recursive=True):
             if any(skip in md_file for skip in ["node_modules", ".git", "dist"]):
                 continue
+            key = f"{repo_key}:{os.path.relpath(md_file, repo_path)}"
+            seen.add(key)
             try:
-                content = Path(md_file).read_text(encoding="utf-8")
-                title = self._extract_title(content, md_file)
-                self.upsert_page(title, content, repo=repo_name)
-                synced += 1
-            except Exception as e:
-                logger.warning("⚠ %s: %s", md_file, e)
-        return synced
+                digest = manifest.digest_file(md_file)
+            except OSError as e:
+                self._failed(report, key, e, notify)
+                continue
+            entry = manifest.get(key)
+            if manifest.current(key, digest):
+                report.count("skipped")
+                notify(key, "skipped")
+                continue
+            pending.append((key, md_file, digest, entry))
+
+        def sync_one(key, md_file, digest, entry):
+            path = Path(md_file)
+            title = self._extract_title(path, md_file)
+            page_id = self._upsert_known(title, path, repo_name, entry)
+            manifest.put(key, digest, page_id, title)
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(workers or self.workers, len(pending)),
+                                    thread_name_prefix="notion-sync") as pool:
+                futures = {pool.submit(sync_one, *job): job[0] for job in pending}
+                for fut in as_completed(futures):
+                    key = futures[fut]
+                    try:
+                        fut.result()
+                    except Exception as e:
+                        self._failed(report, key, e, notify)
+                    else:
+                        report.count("synced")
+                        notify(key, "synced")
+        if prune:
+            for key in manifest.keys_for(repo_key):
+                if key not in seen and self._archive(manifest, key):
+                    report.count("archived")
+        manifest.save()
+        report.elapsed = time.monotonic() - report.started
+        logger.info("Synced %d, unchanged %d, failed %d in %.1fs",
+                    report.synced, report.skipped, report.failed, report.elapsed)
+        return report.synced
+
+    def manifest(self) -> SyncManifest:
+        """Default manifest for this client's database."""
+        return SyncManifest(os.path.join(MANIFEST_DIR, f"{self.db_id or 'default'}.json"))
 
     def create_release_page(self, version: str, notes: str, repo: str = "") -> str:
         """Create a release notes page in Notion."""
@@ -105,26 +487,152 @@ class BlackRoadNotionClient:
     # Helpers
     # ──────────────────────────────────────────────
 
-    def _extract_title(self, content: str, filepath: str) -> str:
-        match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
+    def _upsert_known(self, title: str, content: Content, repo: str, entry: dict | None) -> str:
+        # Reuse the recorded page id (a changed title just renames the page);
+        # if that page was deleted or archived in Notion meanwhile, fall back
+        # to a lookup. Any other error (throttling, 5xx, validation, a half
+        # applied patch) is re-raised: a lookup by a new title would create
+        # a duplicate page and leave the old one live.
+        if entry:
+            try:
+                return self.upsert_page(title, content, repo=repo, page_id=entry["page_id"])
+            except Exception as e:
+                if not _page_gone(e):
+                    raise
+                logger.info("Page %s for %s is gone (%s); looking it up", entry["page_id"], title, e)
+        return self.upsert_page(title, content, repo=repo)
+
+    def _archive(self, manifest: SyncManifest, key: str) -> bool:
+        entry = manifest.get(key)
+        try:
+            self.client.pages.update(page_id=entry["page_id"], archived=True)
+            logger.info("🗑 Archived: %s", entry["title"])
+        except Exception as e:
+            logger.warning("⚠ archive %s: %s", key, e)
+            return False
+        manifest.pop(key)
+        return True
+
+    @staticmethod
+    def _failed(report: SyncReport, key: str, exc: Exception, notify) -> None:
+        logger.warning("⚠ %s: %s", key, exc)
+        report.count("failed")
+        with report._lock:
+            report.errors[key] = str(exc)
+        notify(key, "failed")
+
+    def _list_children(self, block_id: str):
+        """Every child block of ``block_id``, following Notion's 100-per-page cursor."""
+        cursor = None
+        while True:
+            kwargs = {"start_cursor": cursor} if cursor else {}
+            page = self.client.blocks.children.list(block_id, page_size=100, **kwargs)
+            yield from page["results"]
+            cursor = page.get("next_cursor")
+            if not page.get("has_more") or not cursor:
+                return
+
+    def _append_blocks(self, page_id: str, blocks: Iterable[dict], after: str | None = None) -> int:
+        # Chunks go in order; each later chunk anchors on the last block just created.
+        calls = 0
+        it = iter(blocks)
+        while chunk := list(islice(it, APPEND_LIMIT)):
+            kwargs = {"after": after} if after else {}
+            resp = self.client.blocks.children.append(page_id, children=chunk, **kwargs)
+            if after:
+                after = resp["results"][-1]["id"]
+            calls += 1
+        return calls
+
+    def _replace_blocks(self, page_id: str, existing: list[dict], blocks: Iterable[dict]) -> int:
+        self._delete_blocks([b["id"] for b in existing])
+        return len(existing) + self._append_blocks(page_id, blocks)
+
+    def _patch_blocks(self, page_id: str, existing: list[dict], blocks: list[dict]) -> int:
+        """
+        Turn ``existing`` children into ``blocks`` with as few calls as possible:
+        unchanged blocks are kept, same-type changes become in-place updates,
+        and the rest are deletes plus anchored inserts. Returns calls issued.
+        """
+        old = [_block_key(b) for b in existing]
+        new = [_block_key(b) for b in blocks]
+        updates: list[tuple[str, dict]] = []
+        deletes: list[str] = []
+        inserts: list[tuple[str | None, list[dict]]] = []   # (anchor block id, run of new blocks)
+
+        def insert(anchor, block):
+            if inserts and inserts[-1][0] == anchor:
+                inserts[-1][1].append(block)
+            else:
+                inserts.append((anchor, [block]))
+
+        for op, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old, new, autojunk=False).get_opcodes():
+            if op == "equal":
+                continue
+            anchor = existing[i1 - 1]["id"] if i1 else None
+            for k in range(max(i2 - i1, j2 - j1)):
+                cur = existing[i1 + k] if i1 + k < i2 else None
+                want = blocks[j1 + k] if j1 + k < j2 else None
+                if cur and want and cur["type"] == want["type"]:
+                    updates.append((cur["id"], want))
+                    anchor = cur["id"]
+                    continue
+                if cur:
+                    deletes.append(cur["id"])
+                if want:
+                    insert(anchor, want)
+
+        if any(anchor is None for anchor, _ in inserts) and len(deletes) < len(existing):
+            # Notion can only insert *after* a block, so new leading blocks in
+            # front of surviving ones mean rewriting the page.
+            return self._replace_blocks(page_id, existing, blocks)
+
+        for block_id, want in updates:
+            kind = want["type"]
+            self.client.blocks.update(block_id=block_id, **{kind: want[kind]})
+        self._delete_blocks(deletes)
+        calls = sum(self._append_blocks(page_id, run, after=anchor) for anchor, run in inserts)
+        return len(updates) + len(deletes) + calls
+
+    def _delete_blocks(self, block_ids: list[str]) -> None:
+        """
+        Delete blocks on a small bounded pool. Every deletion is attempted;
+        if any failed, raises so the file counts as failed and keeps its old
+        manifest hash (the next sync retries instead of skipping a stale page).
+        """
+        def delete(block_id):
+            try:
+                self.client.blocks.delete(block_id=block_id)
+                return None
+            except Exception as e:
+                logger.warning("⚠ delete block %s: %s", block_id, e)
+                return e
+
+        if len(block_ids) <= 1:
+            errors = [e for e in map(delete, block_ids) if e]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.delete_workers, len(block_ids))) as pool:
+                errors = [e for e in pool.map(delete, block_ids) if e]
+        if errors:
+            raise RuntimeError(f"{len(errors)} of {len(block_ids)} block deletions failed: {errors[0]}")
+
+    def _extract_title(self, content: Content, filepath: str) -> str:
+        if isinstance(content, str):
+            match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
+        else:
+            with open(content, encoding="utf-8") as f:
+                match = next(filter(None, (re.match(r'#\s+(.+)$', line) for line in f)), None)
         if match:
             return match.group(1).strip()
         return Path(filepath).stem.replace('-', ' ').replace('_', ' ').title()
 
+    def _iter_blocks(self, content: Content) -> Iterator[dict]:
+        if isinstance(content, str):
+            yield from iter_md_blocks(content.splitlines())
+        else:
+            with open(content, encoding="utf-8") as f:
+                yield from iter_md_blocks(f)
+
     def _md_to_blocks(self, content: str) -> list[dict]:
-        """Convert markdown to basic Notion blocks."""
-        blocks = []
-        for line in content.split('\n')[:50]:
-            if line.startswith('# '):
-                blocks.append({"object":"block","type":"heading_1","heading_1":{"rich_text":[{"type":"text","text":{"content":line[2:100]}}]}})
-            elif line.startswith('## '):
-                blocks.append({"object":"block","type":"heading_2","heading_2":{"rich_text":[{"type":"text","text":{"content":line[3:100]}}]}})
-            elif line.startswith('### '):
-                blocks.append({"object":"block","type":"heading_3","heading_3":{"rich_text":[{"type":"text","text":{"content":line[4:100]}}]}})
-            elif line.startswith('- ') or line.startswith('* '):
-                blocks.append({"object":"block","type":"bulleted_list_item","bulleted_list_item":{"rich_text":[{"type":"text","text":{"content":line[2:100]}}]}})
-            elif line.startswith('```'):
-                pass  # Skip code fences
-            elif line.strip():
-                blocks.append({"object":"block","type":"paragraph","paragraph":{"rich_text":[{"type":"text","text":{"content":line[:200]}}]}})
-        return blocks[:100]  # Notion limit
+        """Convert markdown to Notion blocks."""
+        return list(iter_md_blocks(content.splitlines()))
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+BlackRoad Foundation — Multi-process MessageBus
+Fans messages out to worker processes over shared-memory ring buffers so
+CPU-heavy handlers (signature checks, compliance scans, markdown conversion)
+are not serialized on one GIL. Single Linux host, no external broker.
+
+Each worker owns one single-producer/single-consumer ring. A message is
+encoded once with the compact wire codec, written to the ring of the worker
+its topic hashes to, and decoded once there. Every topic always lands on
+the same worker, so per-topic ordering is preserved.
+"""
+import logging
+import multiprocessing as mp
+import os
+import struct
+import time
+import zlib
+from multiprocessing import shared_memory
+from typing import Callable, Optional
+
+try:
+    from .agent_message import AgentMessage, TopicRouter
+except ImportError:  # run as a script from src/
+    from agent_message import AgentMessage, TopicRouter
+
+# Ring header: head (bytes written), tail (bytes read), delivered, errors.
+_HEADER = struct.Struct("<QQQQ")
+_LEN = struct.Struct("<I")
+_WRAP = 0xFFFFFFFF     # rest of the ring is padding, continue at offset 0
+_STOP = 0xFFFFFFFE     # worker should exit
+
+logger = logging.getLogger("blackroad.bus")
+
+
+class _Ring:
+    """SPSC byte ring in shared memory; semaphores carry the memory barriers."""
+
+    def __init__(self, ctx, size: int):
+        self.size = size
+        self.shm = shared_memory.SharedMemory(create=True, size=_HEADER.size + size)
+        _HEADER.pack_into(self.shm.buf, 0, 0, 0, 0, 0)
+        self.items = ctx.Semaphore(0)   # frames ready to read
+        self.space = ctx.Semaphore(0)   # signalled whenever the reader frees bytes
+
+    def counters(self) -> tuple[int, int, int, int]:
+        return _HEADER.unpack_from(self.shm.buf, 0)
+
+    def write(self, body: bytes, marker: Optional[int] = None,
+              alive: Optional[Callable[[], bool]] = None) -> None:
+        """Append one frame, waiting for space; raises if ``alive()`` says the reader is gone."""
+        need = _LEN.size + len(body)
+        if need > self.size // 2:
+            raise ValueError(f"message of {len(body)} bytes exceeds ring capacity")
+        buf = self.shm.buf
+        head, tail, _, _ = self.counters()
+        pos = head % self.size
+        pad = self.size - pos if self.size - pos < need else 0
+        while self.size - (head - tail) < need + pad:
+            if not self.space.acquire(timeout=0.05) and alive is not None and not alive():
+                raise RuntimeError("ring is full and its worker process has exited")
+            tail = self.counters()[1]
+        if pad:
+            if pad >= _LEN.size:
+                _LEN.pack_into(buf, _HEADER.size + pos, _WRAP)
+            head += pad
+            pos = 0
+        start = _HEADER.size + pos
+        _LEN.pack_into(buf, start, len(body) if marker is None else marker)
+        buf[start + _LEN.size:start + need] = body
+        struct.pack_into("<Q", buf, 0, head + need)
+        self.items.release()
+
+    def close(self, unlink: bool) -> None:
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _worker(ring: _Ring, router: TopicRouter) -> None:
+    buf = ring.shm.buf
+    size = ring.size
+    while True:
+        ring.items.acquire()
+        head, tail, delivered, errors = ring.counters()
+        pos = tail % size
+        if size - pos < _LEN.size:
+            tail += size - pos
+            pos = 0
+        (length,) = _LEN.unpack_from(buf, _HEADER.size + pos)
+        if length == _WRAP:
+            tail += size - pos
+            pos = 0
+            (length,) = _LEN.unpack_from(buf, _HEADER.size)
+        if length == _STOP:
+            return
+        start = _HEADER.size + pos + _LEN.size
+        msg = AgentMessage.from_bytes(buf[start:start + length])
+        handlers = router.all_handlers() if msg.to_agent == "broadcast" else router.match(msg.topic)
+        for h in handlers:
+            try:
+                h(msg)
+                delivered += 1
+            except Exception:
+                errors += 1
+                logger.exception("worker %d: handler %r failed on %s", os.getpid(), h, msg.id)
+        # Advance tail only once handled, so join() means "delivered", not "dequeued".
+        struct.pack_into("<QQQ", buf, 8, tail + _LEN.size + length, delivered, errors)
+        ring.space.release()
+
+
+class ProcessMessageBus:
+    """
+    MessageBus that runs handlers in ``workers`` forked processes.
+
+    Subscribe everything first, then ``start()``: handlers are inherited by
+    the forked workers, so closures and lambdas work. ``publish`` returns the
+    number of matching subscriptions; delivery itself is asynchronous.
+    """
+
+    def __init__(self, workers: Optional[int] = None, ring_bytes: int = 4 * 1024 * 1024):
+        self.workers = workers or os.cpu_count() or 1
+        self.ring_bytes = ring_bytes
+        self._router = TopicRouter()
+        self._ctx = mp.get_context("fork")
+        self._rings: list[_Ring] = []
+        self._procs: list = []
+
+    def subscribe(self, topic: str, handler) -> None:
+        if self._procs:
+            raise RuntimeError("subscribe before start(); workers fork with a fixed subscription set")
+        self._router.add(topic, handler)
+
+    def start(self) -> "ProcessMessageBus":
+        for _ in range(self.workers):
+            ring = _Ring(self._ctx, self.ring_bytes)
+            proc = self._ctx.Process(target=_worker, args=(ring, self._router), daemon=True)
+            proc.start()
+            self._rings.append(ring)
+            self._procs.append(proc)
+        return self
+
+    def shard(self, topic: str) -> int:
+        """Worker index for ``topic``; stable across runs and processes."""
+        return zlib.crc32(topic.encode()) % self.workers
+
+    def publish(self, msg: AgentMessage) -> int:
+        if not self._procs:
+            raise RuntimeError("ProcessMessageBus not started")
+        if msg.expired():
+            return 0
+        handlers = self._router.all_handlers() if msg.to_agent == "broadcast" else self._router.match(msg.topic)
+        if handlers:
+            i = self.shard(msg.topic)
+            self._rings[i].write(msg.to_bytes(), alive=self._procs[i].is_alive)
+        return len(handlers)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every worker has consumed its ring. False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for ring, proc in zip(self._rings, self._procs):
+            while True:
+                head, tail, _, _ = ring.counters()
+                if head == tail or not proc.is_alive():
+                    break
+                if deadline is not None and time.monotonic() > deadline:
+                    return False
+                time.sleep(0.001)
+        return True
+
+    def stats(self) -> list[dict]:
+        out = []
+        for i, (ring, proc) in enumerate(zip(self._rings, self._procs)):
+            head, tail, delivered, errors = ring.counters()
+            out.append({"worker": i, "pid": proc.pid, "alive": proc.is_alive(),
+                        "backlog_bytes": head - tail, "delivered": delivered, "errors": errors})
+        return out
+
+    def close(self, timeout: float = 5.0) -> list[dict]:
+        """Drain, stop workers and release shared memory. Returns final stats."""
+        self.join(timeout)
+        for ring, proc in zip(self._rings, self._procs):
+            try:
+                ring.write(b"", marker=_STOP, alive=proc.is_alive)
+            except RuntimeError:
+                pass        # worker already gone; nothing to stop
+        for proc in self._procs:
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+        stats = self.stats()
+        for ring in self._rings:
+            ring.close(unlink=True)
+        self._rings, self._procs = [], []
+        return stats
+
+    def __enter__(self) -> "ProcessMessageBus":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        if self._procs:
+            self.close()
+
+
+if __name__ == "__main__":
+    def check(msg):
+        msg.verify()
+
+    bus = ProcessMessageBus(workers=2)
+    bus.subscribe("tasks.#", check)
+    bus.start()
+    n = 2000
+    t0 = time.perf_counter()
+    for i in range(n):
+        bus.publish(AgentMessage(from_agent="agent/alice-001", to_agent="agent/octavia-001",
+                                 type="request", topic=f"tasks.t{i % 8}", payload={"i": i}).sign())
+    final = bus.close()
+    dt = time.perf_counter() - t0
+    print(f"✅ {sum(s['delivered'] for s in final)} deliveries across {len(final)} workers in {dt:.2f}s")
@@ -1,49 +1,419 @@
 #!/usr/bin/env python3
 """BlackRoad Governance — RFC proposal tracker and voting system."""
-import sqlite3, json, datetime, os
+import sqlite3, json, datetime, os, threading, uuid, asyncio, functools, queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, NamedTuple, Optional
 
 DB_PATH = os.path.expanduser("~/.blackroad/governance.db")
 
+SCHEMA = """CREATE TABLE IF NOT EXISTS proposals (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    author TEXT,
+    status TEXT DEFAULT 'draft',
+    body TEXT,
+    votes_yes INTEGER DEFAULT 0,
+    votes_no INTEGER DEFAULT 0,
+    created_at TEXT
+)"""
+
+# Listing is newest-first with id as tie-breaker; each index matches one filter.
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_proposals_created ON proposals (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_proposals_status ON proposals (status, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_proposals_author ON proposals (author, created_at, id);
+"""
+
+# One row per (proposal, voter); re-voting replaces the earlier choice.
+LEDGER_SCHEMA = """CREATE TABLE IF NOT EXISTS votes (
+    proposal_id TEXT NOT NULL REFERENCES proposals(id),
+    voter TEXT NOT NULL,
+    vote INTEGER NOT NULL CHECK (vote IN (0, 1)),
+    cast_at TEXT,
+    PRIMARY KEY (proposal_id, voter)
+) WITHOUT ROWID"""
+
+# proposals.votes_yes/votes_no are maintained incrementally from the ledger.
+LEDGER_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS votes_ai AFTER INSERT ON votes BEGIN
+    UPDATE proposals SET votes_yes = votes_yes + NEW.vote, votes_no = votes_no + 1 - NEW.vote
+    WHERE id = NEW.proposal_id;
+END;
+CREATE TRIGGER IF NOT EXISTS votes_au AFTER UPDATE OF vote ON votes WHEN OLD.vote != NEW.vote BEGIN
+    UPDATE proposals SET votes_yes = votes_yes + NEW.vote - OLD.vote, votes_no = votes_no + OLD.vote - NEW.vote
+    WHERE id = NEW.proposal_id;
+END;
+CREATE TRIGGER IF NOT EXISTS votes_ad AFTER DELETE ON votes BEGIN
+    UPDATE proposals SET votes_yes = votes_yes - OLD.vote, votes_no = votes_no - 1 + OLD.vote
+    WHERE id = OLD.proposal_id;
+END;
+"""
+
+# Databases created before the ledger only have counters: give each counted
+# vote a placeholder voter so recomputing from the ledger keeps the totals.
+LEDGER_BACKFILL = """
+WITH RECURSIVE n(i) AS (
+    SELECT 1 UNION ALL SELECT i + 1 FROM n
+    WHERE i < (SELECT max(max(votes_yes), max(votes_no)) FROM proposals)
+)
+INSERT INTO votes (proposal_id, voter, vote, cast_at)
+SELECT p.id, 'legacy:yes:' || n.i, 1, p.created_at FROM proposals p JOIN n ON n.i <= p.votes_yes
+UNION ALL
+SELECT p.id, 'legacy:no:' || n.i, 0, p.created_at FROM proposals p JOIN n ON n.i <= p.votes_no
+"""
+
+# Constant SQL text so sqlite3's per-connection statement cache reuses the
+# prepared statements instead of re-parsing them on every call.
+SQL_INSERT = "INSERT OR IGNORE INTO proposals VALUES (?,?,?,?,?,0,0,?)"
+SQL_VOTE = """INSERT INTO votes (proposal_id, voter, vote, cast_at)
+SELECT ?1, ?2, ?3, ?4 WHERE EXISTS (SELECT 1 FROM proposals WHERE id = ?1)
+ON CONFLICT (proposal_id, voter) DO UPDATE SET vote = excluded.vote, cast_at = excluded.cast_at
+WHERE vote != excluded.vote"""
+SQL_RETRACT = "DELETE FROM votes WHERE proposal_id = ? AND voter = ?"
+SQL_VOTES = "SELECT voter, vote, cast_at FROM votes WHERE proposal_id = ? ORDER BY cast_at"
+SQL_RECOMPUTE = """UPDATE proposals SET
+    votes_yes = (SELECT count(*) FROM votes WHERE proposal_id = proposals.id AND vote = 1),
+    votes_no = (SELECT count(*) FROM votes WHERE proposal_id = proposals.id AND vote = 0)"""
+SQL_COLUMNS = "SELECT id, title, author, status, votes_yes, votes_no, created_at FROM proposals"
+
+
+class ProposalRow(NamedTuple):
+    id: str
+    title: str
+    author: str
+    status: str
+    votes_yes: int
+    votes_no: int
+    created_at: str
+
+
+class Page(NamedTuple):
+    rows: list[ProposalRow]
+    next_cursor: Optional[tuple[str, str]]   # pass back as ``cursor`` for the next page
+
+
+def _now() -> str:
+    return datetime.datetime.utcnow().isoformat()
+
+
+# Write operations take the connection and leave transaction control to the
+# caller, so GovernanceStore (one commit each) and AsyncGovernanceStore
+# (group commit) share them.
+
+def _create(con, id: str, title: str, body: str, author: str = "blackroad") -> bool:
+    return con.execute(SQL_INSERT, (id, title, author, "draft", body, _now())).rowcount == 1
+
+def _vote(con, proposal_id: str, yes: bool = True, voter: str = None) -> bool:
+    voter = voter or f"anon:{uuid.uuid4().hex}"
+    return con.execute(SQL_VOTE, (proposal_id, voter, int(yes), _now())).rowcount == 1
+
+def _vote_many(con, votes) -> int:
+    cast_at = _now()
+    return con.executemany(SQL_VOTE, ((pid, voter, int(yes), cast_at) for pid, voter, yes in votes)).rowcount
+
+def _retract(con, proposal_id: str, voter: str) -> bool:
+    return con.execute(SQL_RETRACT, (proposal_id, voter)).rowcount == 1
+
+
+class GovernanceStore:
+    """
+    Long-lived SQLite storage for proposals.
+
+    Each thread gets one persistent connection (a small per-thread pool),
+    tuned for WAL journaling with synchronous=NORMAL; the schema is applied
+    once when the store opens.
+    """
+
+    def __init__(self, path: str = None, *, synchronous: str = "NORMAL", busy_timeout_ms: int = 5000):
+        self.path = path or DB_PATH
+        self.synchronous = synchronous
+        self.busy_timeout_ms = busy_timeout_ms
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._local = threading.local()
+        self._conns: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        con = self.connection()
+        with con:
+            con.execute(SCHEMA)
+            fresh_ledger = con.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'votes'").fetchone() is None
+            con.execute(LEDGER_SCHEMA)
+            if fresh_ledger:
+                con.execute(LEDGER_BACKFILL)
+        con.executescript(LEDGER_TRIGGERS + INDEXES)
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened and tuned on first use."""
+        con = getattr(self._local, "con", None)
+        if con is None:
+            # check_same_thread=False only so close() can run from any thread;
+            # each connection is still used by the thread that opened it.
+            con = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000,
+                                  cached_statements=256, check_same_thread=False)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(f"PRAGMA synchronous={self.synchronous}")
+            con.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            con.execute("PRAGMA temp_store=MEMORY")
+            self._local.con = con
+            with self._lock:
+                self._conns.append(con)
+        return con
+
+    def create_proposal(self, id: str, title: str, body: str, author: str = "blackroad") -> bool:
+        con = self.connection()
+        with con:
+            return _create(con, id, title, body, author)
+
+    def vote(self, proposal_id: str, yes: bool = True, voter: str = None) -> bool:
+        """Record or change ``voter``'s vote. False if unknown proposal or unchanged."""
+        con = self.connection()
+        with con:
+            return _vote(con, proposal_id, yes, voter)
+
+    def vote_many(self, votes) -> int:
+        """
+        Apply ``(proposal_id, voter, yes)`` tuples in one transaction. Later
+        entries for the same voter win. Returns how many votes were recorded
+        or changed.
+        """
+        con = self.connection()
+        with con:
+            return _vote_many(con, votes)
+
+    def retract_vote(self, proposal_id: str, voter: str) -> bool:
+        con = self.connection()
+        with con:
+            return _retract(con, proposal_id, voter)
+
+    def votes(self, proposal_id: str) -> list[tuple]:
+        return self.connection().execute(SQL_VOTES, (proposal_id,)).fetchall()
+
+    def recompute_tallies(self) -> None:
+        """Rebuild every proposal's counters from the ledger."""
+        con = self.connection()
+        with con:
+            con.execute(SQL_RECOMPUTE)
+
+    def query(self, *, status: str = None, author: str = None, since: str = None, until: str = None,
+              limit: int = 50, cursor: tuple[str, str] = None) -> Page:
+        """
+        One page of proposals, newest first, filtered by status, author and
+        ``created_at`` range (ISO strings, ``since`` inclusive, ``until``
+        exclusive). Keyset pagination: pass ``next_cursor`` back as ``cursor``.
+        """
+        where, args = [], []
+        for clause, value in (("status = ?", status), ("author = ?", author),
+                              ("created_at >= ?", since), ("created_at < ?", until)):
+            if value is not None:
+                where.append(clause)
+                args.append(value)
+        if cursor is not None:
+            where.append("(created_at, id) < (?, ?)")
+            args.extend(cursor)
+        sql = SQL_COLUMNS
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        rows = [ProposalRow._make(r) for r in self.connection().execute(sql, (*args, limit + 1))]
+        if len(rows) > limit:
+            rows.pop()
+            return Page(rows, (rows[-1].created_at, rows[-1].id))
+        return Page(rows, None)
+
+    def iter_proposals(self, *, page_size: int = 500, **filters) -> Iterator[ProposalRow]:
+        """Every matching proposal, fetched ``page_size`` rows at a time."""
+        cursor = None
+        while True:
+            page = self.query(limit=page_size, cursor=cursor, **filters)
+            yield from page.rows
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+    def get(self, proposal_id: str) -> Optional[ProposalRow]:
+        row = self.connection().execute(SQL_COLUMNS + " WHERE id = ?", (proposal_id,)).fetchone()
+        return ProposalRow._make(row) if row else None
+
+    def close(self) -> None:
+        with self._lock:
+            for con in self._conns:
+                con.close()
+            self._conns.clear()
+        self._local = threading.local()
+
+    def __enter__(self) -> "GovernanceStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class AsyncGovernanceStore:
+    """
+    Asyncio front end for GovernanceStore that never blocks the event loop.
+
+    Writes go through a request queue to one dedicated writer thread, which
+    drains whatever is waiting (up to ``max_batch``) and commits it as one
+    transaction; each request runs in its own savepoint, so one failure only
+    fails its own awaiter. Reads run on a small thread pool, each thread with
+    its own read connection (WAL lets them proceed alongside the writer).
+
+        async with AsyncGovernanceStore() as store:
+            await store.create("RFC-0005", "Mesh quotas", body)
+            await store.vote("RFC-0005", True, voter="agent/alice-001")
+            page = await store.list(status="draft")
+    """
+
+    def __init__(self, path: str = None, *, readers: int = 4, max_batch: int = 1024):
+        self._store = GovernanceStore(path)
+        self.max_batch = max_batch
+        self._requests: queue.SimpleQueue = queue.SimpleQueue()
+        self._readers = ThreadPoolExecutor(readers, thread_name_prefix="governance-reader")
+        self._writer = threading.Thread(target=self._write_loop, name="governance-writer", daemon=True)
+        self._writer.start()
+        self.commits = 0
+
+    # ── Writes ────────────────────────────────────────────────────────────────
+
+    async def create(self, id: str, title: str, body: str = "", author: str = "blackroad") -> bool:
+        return await self._write(_create, id, title, body, author)
+
+    async def vote(self, proposal_id: str, yes: bool = True, voter: str = None) -> bool:
+        return await self._write(_vote, proposal_id, yes, voter)
+
+    async def vote_many(self, votes) -> int:
+        return await self._write(_vote_many, list(votes))
+
+    async def retract_vote(self, proposal_id: str, voter: str) -> bool:
+        return await self._write(_retract, proposal_id, voter)
+
+    # ── Reads ─────────────────────────────────────────────────────────────────
+
+    async def get(self, proposal_id: str) -> Optional[ProposalRow]:
+        return await self._read(functools.partial(self._store.get, proposal_id))
+
+    async def votes(self, proposal_id: str) -> list[tuple]:
+        return await self._read(functools.partial(self._store.votes, proposal_id))
+
+    # Defined after the methods above: ``list`` shadows the builtin in annotations below it.
+    async def list(self, **filters) -> Page:
+        """See ``GovernanceStore.query`` for filters."""
+        return await self._read(functools.partial(self._store.query, **filters))
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    async def close(self) -> None:
+        """Finish queued writes, then stop the writer and reader threads."""
+        loop = asyncio.get_running_loop()
+        self._requests.put(None)
+        await loop.run_in_executor(None, self._writer.join)
+        # shutdown(wait=True) waits out in-flight reads; keep that off the loop.
+        await loop.run_in_executor(None, self._readers.shutdown)
+        self._store.close()
+
+    async def __aenter__(self) -> "AsyncGovernanceStore":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    async def _read(self, fn):
+        return await asyncio.get_running_loop().run_in_executor(self._readers, fn)
+
+    async def _write(self, op, *args):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._requests.put((op, args, loop, fut))
+        return await fut
+
+    def _write_loop(self) -> None:
+        con = self._store.connection()
+        stopping = False
+        while not stopping:
+            item = self._requests.get()
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(con, batch)
+
+    def _commit(self, con, batch) -> None:
+        outcomes = []
+        try:
+            con.execute("BEGIN")
+            for op, args, _, _ in batch:
+                con.execute("SAVEPOINT op")
+                try:
+                    outcomes.append((op(con, *args), None))
+                    con.execute("RELEASE op")
+                except Exception as e:
+                    con.execute("ROLLBACK TO op")
+                    con.execute("RELEASE op")
+                    outcomes.append((None, e))
+            con.commit()
+            self.commits += 1
+        except Exception as e:
+            con.rollback()
+            outcomes = [(None, e)] * len(batch)
+        for (_, _, loop, fut), (result, error) in zip(batch, outcomes):
+            loop.call_soon_threadsafe(_resolve, fut, result, error)
+
+
+def _resolve(fut, result, error) -> None:
+    if fut.cancelled():
+        return
+    if error is not None:
+        fut.set_exception(error)
+    else:
+        fut.set_result(result)
+
+
+_stores: dict[str, GovernanceStore] = {}
+
+def get_store(path: str = None) -> GovernanceStore:
+    """Shared store for ``path`` (default ``DB_PATH``), opened once per process."""
+    path = path or DB_PATH
+    store = _stores.get(path)
+    if store is None:
+        store = _stores[path] = GovernanceStore(path)
+    return store
+
 def init_db():
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    con = sqlite3.connect(DB_PATH)
-    con.execute("""CREATE TABLE IF NOT EXISTS proposals (
-        id TEXT PRIMARY KEY,
-        title TEXT NOT NULL,
-        author TEXT,
-        status TEXT DEFAULT 'draft',
-        body TEXT,
-        votes_yes INTEGER DEFAULT 0,
-        votes_no INTEGER DEFAULT 0,
-        created_at TEXT
-    )""")
-    con.commit()
-    return con
+    # Kept for callers that want their own connection (and close it); the
+    # functions below use the shared store instead.
+    get_store()
+    return sqlite3.connect(DB_PATH)
 
 def create_proposal(id: str, title: str, body: str, author: str = "blackroad"):
-    con = init_db()
-    con.execute("INSERT OR IGNORE INTO proposals VALUES (?,?,?,?,?,0,0,?)",
-        (id, title, author, "draft", body, datetime.datetime.utcnow().isoformat()))
-    con.commit()
+    get_store().create_proposal(id, title, body, author)
     print(f"✓ Created proposal {id}: {title}")
-    con.close()
-
-def vote(proposal_id: str, yes: bool = True):
-    con = init_db()
-    field = "votes_yes" if yes else "votes_no"
-    con.execute(f"UPDATE proposals SET {field} = {field} + 1 WHERE id = ?", (proposal_id,))
-    con.commit()
-    con.close()
+
+def vote(proposal_id: str, yes: bool = True, voter: str = None):
+    get_store().vote(proposal_id, yes, voter)
     print(f"✓ Vote recorded for {proposal_id}")
 
-def list_proposals():
-    con = init_db()
-    rows = con.execute("SELECT id, title, status, votes_yes, votes_no FROM proposals ORDER BY created_at DESC").fetchall()
-    print(f"\\n📋 BlackRoad Governance Proposals\\n")
-    for row in rows:
-        bar = "█" * row[3] + "░" * row[4]
-        print(f"  [{row[2].upper():<8}] {row[0]}: {row[1]}  YES:{row[3]} NO:{row[4]}")
-    con.close()
+def query_proposals(**filters) -> Page:
+    """Programmatic listing; see ``GovernanceStore.query`` for filters."""
+    return get_store().query(**filters)
+
+def list_proposals(status: str = None, limit: int = 50):
+    page = query_proposals(status=status, limit=limit)
+    print(f"\n📋 BlackRoad Governance Proposals\n")
+    for row in page.rows:
+        print(f"  [{row.status.upper():<8}] {row.id}: {row.title}  YES:{row.votes_yes} NO:{row.votes_no}")
+    if page.next_cursor:
+        print(f"\n  … showing newest {limit}")
 
 if __name__ == "__main__":
     import sys
@@ -51,7 +421,7 @@ if __name__ == "__main__":
     if cmd == "create":
         create_proposal(sys.argv[2], sys.argv[3], sys.argv[4] if len(sys.argv)>4 else "")
     elif cmd == "vote":
-        vote(sys.argv[2], sys.argv[3].lower() == "yes" if len(sys.argv)>3 else True)
+        vote(sys.argv[2], sys.argv[3].lower() == "yes" if len(sys.argv)>3 else True,
+             sys.argv[4] if len(sys.argv)>4 else None)
     else:
-        list_proposals()
-
+        list_proposals(sys.argv[2] if len(sys.argv)>2 else None)
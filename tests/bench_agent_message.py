@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+BlackRoad Foundation — MessageBus benchmark and profiling suite
+Measures the RFC-0002 reference implementation (src/agent_message.py).
+
+    python tests/bench_agent_message.py                  # full run, table to stdout
+    python tests/bench_agent_message.py --quick --json bench.json
+    python tests/bench_agent_message.py --check tests/bench_thresholds.json
+    python tests/bench_agent_message.py --baseline main.json --tolerance 0.3
+    python tests/bench_agent_message.py --only sign --profile
+
+Every result is keyed ``scenario[param=value,...]`` and reports ops/sec and
+µs/op. ``--baseline`` compares against a ``--json`` report from an earlier
+run *on the same machine* (e.g. the base branch, run just before) and exits 1
+when any case is more than ``--tolerance`` slower. ``--check`` compares
+against the absolute floors in a thresholds file; raw ops/sec only mean
+something on the machine that produced them, so the committed
+tests/bench_thresholds.json holds only there — regenerate it with
+``--update`` on the machine that enforces it.
+"""
+import argparse
+import cProfile
+import io
+import json
+import os
+import platform
+import pstats
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.agent_message import AgentMessage, MessageBus, verify_many  # noqa: E402
+
+
+def _msg(topic="tasks.assign", to="agent/octavia-001", payload=None):
+    return AgentMessage(from_agent="agent/alice-001", to_agent=to, type="request",
+                        topic=topic, payload=payload or {"task": "deploy"}, ttl=None)
+
+
+def _measure(fn, ops: int, repeat: int, setup=None) -> float:
+    """
+    Best-of-``repeat`` seconds per op for ``fn()``, which performs ``ops``
+    operations. With ``setup``, each repetition times ``fn(setup())`` on fresh
+    input, and ``setup`` itself is not timed.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        t0 = time.perf_counter()
+        fn(arg) if setup else fn()
+        best = min(best, time.perf_counter() - t0)
+    return best / ops
+
+
+# ── Scenarios ─────────────────────────────────────────────────────────────────
+# Each yields (params, fn, ops[, info]): fn runs ``ops`` operations of the
+# scenario; ``info`` is copied into the result untouched. ``fn`` may be a
+# (setup, body) pair when every repetition needs untouched input.
+
+def bench_publish(scale):
+    for topics in (1, 100, 500):
+        for subs in (1, 10):
+            bus = MessageBus(history_size=1_000)
+            for t in range(topics):
+                for _ in range(subs):
+                    bus.subscribe(f"tasks.t{t}", lambda m: None)
+            msgs = [_msg(topic=f"tasks.t{i % topics}") for i in range(scale)]
+            yield {"topics": topics, "subscribers": subs}, lambda b=bus, ms=msgs: [b.publish(m) for m in ms], scale
+
+
+def bench_broadcast(scale):
+    for subs in (10, 100, 1000):
+        bus = MessageBus(history_size=1_000)
+        for s in range(subs):
+            bus.subscribe(f"agents.a{s}", lambda m: None)
+        n = max(1, scale // subs)
+        msgs = [_msg(to="broadcast") for _ in range(n)]
+        # ops = deliveries, so the figure is cost per fan-out delivery
+        yield {"subscribers": subs}, lambda b=bus, ms=msgs: [b.publish(m) for m in ms], n * subs
+
+
+def bench_history(scale):
+    for size in (1_000, 10_000, 100_000):
+        bus = MessageBus(history_size=size)
+        for i in range(size):
+            bus.publish(_msg(topic=f"tasks.t{i % 10}"))
+        q = max(100, scale // 10)
+        yield {"log_size": size, "limit": 50}, lambda b=bus: [b.history(f"tasks.t{i % 10}", 50) for i in range(q)], q
+
+
+def bench_sign(scale):
+    for size in (100, 10_000, 1_000_000):
+        n = max(10, scale // max(1, size // 100))
+        payload = {"blob": "x" * size}
+        msgs = [_msg(payload=dict(payload)) for _ in range(n)]
+        wires = [m.sign().to_bytes() for m in msgs]
+        # Verify what a receiver holds: messages just decoded, never serialized.
+        received = lambda ws=wires: [AgentMessage.from_bytes(w) for w in ws]
+        yield {"op": "sign", "payload_bytes": size}, lambda ms=msgs: [m.sign() for m in ms], n
+        yield {"op": "verify", "payload_bytes": size}, (received, lambda ms: [m.verify() for m in ms]), n
+        yield {"op": "verify_many", "payload_bytes": size}, (received, lambda ms: verify_many(ms, chunk=64)), n
+        yield {"op": "decode+verify", "payload_bytes": size}, \
+            lambda ws=wires: [AgentMessage.from_bytes(w).verify() for w in ws], n
+
+
+def bench_codec(scale):
+    for size in (100, 10_000):
+        msg = _msg(payload={"blob": "x" * size, "n": 1}).sign()
+        n = max(10, scale // max(1, size // 100))
+        yield {"codec": "json", "payload_bytes": size}, \
+            lambda m=msg: [AgentMessage.from_json(m.to_json()) for _ in range(n)], n, \
+            {"encoded_bytes": len(msg.to_json().encode())}
+        yield {"codec": "wire", "payload_bytes": size}, \
+            lambda m=msg: [AgentMessage.from_bytes(m.to_bytes()) for _ in range(n)], n, \
+            {"encoded_bytes": len(msg.to_bytes())}
+
+
+SCENARIOS = {
+    "publish": bench_publish,
+    "broadcast": bench_broadcast,
+    "history": bench_history,
+    "sign": bench_sign,
+    "codec": bench_codec,
+}
+
+
+# ── Runner ────────────────────────────────────────────────────────────────────
+
+def key(scenario: str, params: dict) -> str:
+    return f"{scenario}[" + ",".join(f"{k}={v}" for k, v in params.items()) + "]"
+
+
+def run(only=None, quick=False, repeat=3, profile=False) -> list[dict]:
+    scale = 2_000 if quick else 20_000
+    results = []
+    for name, scenario in SCENARIOS.items():
+        if only and name not in only:
+            continue
+        for params, fn, ops, *info in scenario(scale):
+            setup, fn = fn if isinstance(fn, tuple) else (None, fn)
+            if profile:
+                prof = cProfile.Profile()
+                prof.runcall(fn, *((setup(),) if setup else ()))
+                out = io.StringIO()
+                pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(12)
+                print(f"── profile {key(name, params)}\n{out.getvalue()}", file=sys.stderr)
+            per_op = _measure(fn, ops, repeat, setup)
+            results.append({
+                "key": key(name, params), "scenario": name, "params": params,
+                "ops_per_sec": round(1 / per_op, 1) if per_op else None,
+                "us_per_op": round(per_op * 1e6, 3),
+                **(info[0] if info else {}),
+            })
+    return results
+
+
+def check(results: list[dict], thresholds: dict) -> list[str]:
+    """Regressions: results whose ops/sec fell below their floor in ``thresholds``."""
+    floors = thresholds.get("min_ops_per_sec", {})
+    failures = []
+    for r in results:
+        floor = floors.get(r["key"])
+        if floor is not None and r.get("ops_per_sec") is not None and r["ops_per_sec"] < floor:
+            failures.append(f"{r['key']}: {r['ops_per_sec']:.0f} ops/s < floor {floor:.0f}")
+    return failures
+
+
+def compare(results: list[dict], baseline: dict, tolerance: float) -> list[str]:
+    """Regressions: results more than ``tolerance`` slower than the same key in a baseline report."""
+    before = {r["key"]: r.get("ops_per_sec") for r in baseline.get("results", [])}
+    failures = []
+    for r in results:
+        ref = before.get(r["key"])
+        if ref and r.get("ops_per_sec") is not None and r["ops_per_sec"] < ref * (1 - tolerance):
+            failures.append(f"{r['key']}: {r['ops_per_sec']:.0f} ops/s is {1 - r['ops_per_sec'] / ref:.0%} "
+                            f"below baseline {ref:.0f}")
+    return failures
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    ap.add_argument("--only", nargs="*", choices=sorted(SCENARIOS), help="scenarios to run")
+    ap.add_argument("--quick", action="store_true", help="10x smaller workloads (CI smoke run)")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--json", metavar="PATH", help="write machine-readable results here ('-' for stdout)")
+    ap.add_argument("--baseline", metavar="REPORT", help="fail on slowdowns against this --json report "
+                                                         "from the same machine")
+    ap.add_argument("--tolerance", type=float, default=0.3, help="with --baseline: allowed slowdown (0.3 = 30%%)")
+    ap.add_argument("--check", metavar="THRESHOLDS", help="fail on ops/sec below these floors "
+                                                          "(absolute; valid only on the machine that wrote them)")
+    ap.add_argument("--update", action="store_true",
+                    help="with --check: rewrite floors as this run's ops/sec times --margin")
+    ap.add_argument("--margin", type=float, default=0.5)
+    ap.add_argument("--profile", action="store_true", help="print cProfile top functions per case to stderr")
+    args = ap.parse_args(argv)
+
+    results = run(args.only, args.quick, args.repeat, args.profile)
+    report = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "quick": args.quick,
+        "results": results,
+    }
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        for r in results:
+            extra = f"  {r['encoded_bytes']:,} B" if "encoded_bytes" in r else ""
+            print(f"  {r['key']:<60} {r['ops_per_sec']:>14,.0f} ops/s {r['us_per_op']:>12,.2f} µs/op{extra}")
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
+
+    failures = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures += compare(results, json.load(f), args.tolerance)
+    if not args.check:
+        for line in failures:
+            print(f"✗ {line}", file=sys.stderr)
+        if args.baseline and not failures:
+            print("✓ No regressions", file=sys.stderr)
+        return 1 if failures else 0
+    if args.update:
+        floors = {r["key"]: round(r["ops_per_sec"] * args.margin, 1)
+                  for r in results if r.get("ops_per_sec")}
+        with open(args.check, "w") as f:
+            json.dump({"machine": f"{platform.node()} {platform.machine()} python {sys.version.split()[0]}",
+                       "note": "absolute floors; only meaningful on the machine named above",
+                       "min_ops_per_sec": floors}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"✓ Wrote {len(floors)} floors to {args.check}", file=sys.stderr)
+        return 0
+    with open(args.check) as f:
+        failures += check(results, json.load(f))
+    for line in failures:
+        print(f"✗ {line}", file=sys.stderr)
+    if not failures:
+        print("✓ No regressions", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,91 @@
 """Tests for CRM/ERP adapters — Salesforce, HubSpot, SAP, NetSuite"""
+import asyncio
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
 
+class FakeAPI:
+    """Local HTTP/1.1 keep-alive server. ``routes`` maps (method, path) to a
+    handler returning (status, json body[, headers]); ``script`` queues
+    one-off responses that are served before any route ("drop" closes the
+    connection without answering). With ``close_idle``, the server closes
+    each connection after responding, without announcing it."""
+
+    def __init__(self):
+        self.routes = {}
+        self.script = []
+        self.requests = []
+        self.connections = set()
+        self.close_idle = False
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _serve(self):
+                api.connections.add(self.client_address)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                api.requests.append((self.command, self.path, body))
+                if api.script and api.script[0] == "drop":
+                    api.script.pop(0)
+                    self.close_connection = True
+                    return
+                if api.script:
+                    status, payload, *extra = api.script.pop(0)
+                else:
+                    route = api.routes.get((self.command, self.path.split("?")[0]))
+                    status, payload, *extra = route(self.path, body) if route else (404, [{"errorCode": "NOT_FOUND"}])
+                data = json.dumps(payload).encode()
+                headers = extra[0] if extra else {}
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    data = gzip.compress(data)
+                    headers = {**headers, "Content-Encoding": "gzip"}
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                if api.close_idle:
+                    self.close_connection = True
+
+            do_GET = do_POST = do_PATCH = do_DELETE = _serve
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def fake_api():
+    api = FakeAPI()
+    yield api
+    api.close()
+
+
+@pytest.fixture
+def salesforce(fake_api):
+    from adapters.salesforce import SalesforceAdapter, SalesforceConfig
+    cfg = SalesforceConfig(instance_url=fake_api.url, access_token="t", timeout=5)
+    with SalesforceAdapter(cfg) as sf:
+        sf._transport.backoff = 0.001
+        yield sf, fake_api
+
+
 # ── Salesforce ──────────────────────────────────────────────────────────────
 class TestSalesforceAdapter:
     @pytest.fixture
@@ -34,6 +117,385 @@ class TestSalesforceAdapter:
         adapter._session.post.assert_not_called()
 
 
+class TestSalesforceTransport:
+    def test_connections_are_reused_and_gzip_decoded(self, salesforce):
+        sf, api = salesforce
+        api.routes[("GET", "/services/data/v59.0/sobjects/Lead/00Q1")] = lambda path, body: (200, {"Id": "00Q1"})
+        for _ in range(5):
+            assert sf.get_lead("00Q1") == {"Id": "00Q1"}
+        assert len(api.requests) == 5 and len(api.connections) == 1
+
+    def test_retries_429_and_503_honouring_retry_after(self, salesforce):
+        sf, api = salesforce
+        api.script = [(429, [{"errorCode": "REQUEST_LIMIT_EXCEEDED"}], {"Retry-After": "0"}),
+                      (503, "unavailable")]
+        api.routes[("POST", "/services/data/v59.0/sobjects/Account")] = lambda path, body: (201, {"id": "001x"})
+        assert sf.create_account(name="BlackRoad") == {"id": "001x"}
+        assert len(api.requests) == 3
+
+    def test_errors_raise_with_decoded_body(self, salesforce):
+        from adapters.salesforce import SalesforceAPIError
+        sf, api = salesforce
+        with pytest.raises(SalesforceAPIError) as err:
+            sf.get_account("nope")
+        assert err.value.status == 404 and err.value.errors == [{"errorCode": "NOT_FOUND"}]
+
+    def test_post_after_server_closed_idle_connection(self, salesforce):
+        import time
+        sf, api = salesforce
+        api.routes[("GET", "/services/data/v59.0/sobjects/Lead/00Q1")] = lambda path, body: (200, {"Id": "00Q1"})
+        api.routes[("POST", "/services/data/v59.0/sobjects/Account")] = lambda path, body: (201, {"id": "001x"})
+        api.close_idle = True
+        sf.get_lead("00Q1")
+        time.sleep(0.1)                                        # server's keep-alive timeout passes
+        assert sf.create_account(name="BlackRoad") == {"id": "001x"}
+        assert [m for m, _, _ in api.requests] == ["GET", "POST"] and len(api.connections) == 2
+
+    def test_over_age_idle_connections_are_not_reused(self, salesforce):
+        sf, api = salesforce
+        api.routes[("GET", "/services/data/v59.0/sobjects/Lead/00Q1")] = lambda path, body: (200, {"Id": "00Q1"})
+        sf._transport.idle_ttl = 0
+        sf.get_lead("00Q1")
+        sf.get_lead("00Q1")
+        assert len(api.connections) == 2
+
+    def test_lost_response_resends_only_idempotent_methods(self, salesforce):
+        sf, api = salesforce
+        api.routes[("GET", "/services/data/v59.0/sobjects/Lead/00Q1")] = lambda path, body: (200, {"Id": "00Q1"})
+        api.routes[("POST", "/services/data/v59.0/sobjects/Account")] = lambda path, body: (201, {"id": "001x"})
+        sf.get_lead("00Q1")
+        api.script = ["drop"]
+        assert sf.get_lead("00Q1") == {"Id": "00Q1"}           # resent on a fresh connection
+        api.script = ["drop"]
+        with pytest.raises(OSError):
+            sf.create_account(name="BlackRoad")                # may have been applied: not resent
+        assert [m for m, _, _ in api.requests] == ["GET", "GET", "GET", "POST"]
+
+    def test_gives_up_after_max_retries(self, salesforce):
+        from adapters.salesforce import SalesforceAPIError
+        sf, api = salesforce
+        api.script = [(503, "down")] * (sf.cfg.max_retries + 1)
+        with pytest.raises(SalesforceAPIError):
+            sf.get_account("001x")
+        assert len(api.requests) == sf.cfg.max_retries + 1
+
+
+def _collect(aiterator):
+    async def run():
+        return [item async for item in aiterator]
+    return asyncio.run(run())
+
+
+def _mock_clients(adapter, handler, base_url):
+    httpx = pytest.importorskip("httpx")
+    adapter._client = httpx.AsyncClient(base_url=base_url, transport=httpx.MockTransport(handler))
+    adapter._sync_client = httpx.Client(base_url=base_url, transport=httpx.MockTransport(handler))
+    return httpx
+
+
+class TestPagination:
+    def test_iter_pages_reads_one_page_ahead(self):
+        from adapters.pagination import iter_pages
+        fetched = []
+        started = threading.Event()
+
+        def fetch(cursor):
+            fetched.append(cursor)
+            if cursor == 1:
+                started.set()
+            return [f"{cursor or 0}-{i}" for i in range(3)], (cursor or 0) + 1 if (cursor or 0) < 2 else None
+
+        it = iter_pages(fetch)
+        assert next(it) == "0-0"
+        assert started.wait(1) and fetched == [None, 1]        # page 2 requested before page 1 is consumed
+        assert list(it) == ["0-1", "0-2", "1-0", "1-1", "1-2", "2-0", "2-1", "2-2"]
+
+    def test_aiter_pages_matches_sync(self):
+        from adapters.pagination import aiter_pages, iter_pages
+        pages = {None: ([1, 2], "b"), "b": ([3], "c"), "c": ([], None)}
+
+        async def afetch(cursor):
+            return pages[cursor]
+        assert _collect(aiter_pages(afetch)) == list(iter_pages(pages.__getitem__)) == [1, 2, 3]
+
+    def test_salesforce_follows_next_records_url(self, salesforce):
+        sf, api = salesforce
+        pages = {"/services/data/v59.0/query/01g-2": (200, {"done": False, "records": [{"Id": 3}],
+                                                            "nextRecordsUrl": "/services/data/v59.0/query/01g-3"}),
+                 "/services/data/v59.0/query/01g-3": (200, {"done": True, "records": [{"Id": 4}]})}
+        api.routes[("GET", "/services/data/v59.0/query")] = lambda path, body: (
+            200, {"done": False, "records": [{"Id": 1}, {"Id": 2}], "nextRecordsUrl": "/services/data/v59.0/query/01g-2"})
+        for path, resp in pages.items():
+            api.routes[("GET", path)] = lambda p, b, resp=resp: resp
+        soql = "SELECT Id FROM Contact"
+        assert [r["Id"] for r in sf.iter_query(soql)] == [1, 2, 3, 4]
+        assert [r["Id"] for r in _collect(sf.aiter_query(soql))] == [1, 2, 3, 4]
+        assert len(sf.list_contacts(limit=10)) == 4
+
+    def test_hubspot_follows_after_cursor(self):
+        from adapters.hubspot import HubSpotAdapter
+        hs = HubSpotAdapter(access_token="t")
+        seen = []
+
+        def handler(request):
+            after = request.url.params.get("after")
+            seen.append(after)
+            page = {None: ([{"id": "1"}, {"id": "2"}], "2"), "2": ([{"id": "3"}], None)}[after]
+            paging = {"next": {"after": page[1]}} if page[1] else None
+            return httpx.Response(200, json={"results": page[0], "paging": paging})
+
+        httpx = _mock_clients(hs, handler, "https://api.hubapi.com")
+        assert [c["id"] for c in hs.iter_query("contacts", page_size=2)] == ["1", "2", "3"]
+        assert [c["id"] for c in _collect(hs.aiter_query("contacts", page_size=2))] == ["1", "2", "3"]
+        assert seen == [None, "2", None, "2"]
+
+    def test_sap_pages_with_skip_top(self):
+        from adapters.sap import SAPAdapter
+        sap = SAPAdapter(base_url="https://sap.test", username="u", password="p")
+        rows = [{"Material": str(i)} for i in range(5)]
+
+        def handler(request):
+            skip, top = int(request.url.params["$skip"]), int(request.url.params["$top"])
+            assert "$select" in request.url.params
+            return httpx.Response(200, json={"d": {"results": rows[skip:skip + top]}})
+
+        httpx = _mock_clients(sap, handler, "https://sap.test")
+        assert list(sap.iter_query("materials", page_size=2)) == rows
+        assert _collect(sap.aiter_query("materials", page_size=2)) == rows
+
+    def test_sap_follows_server_next_link_when_pages_are_capped(self):
+        from adapters.sap import SAPAdapter
+        sap = SAPAdapter(base_url="https://sap.test", username="u", password="p")
+        rows = [{"Material": str(i)} for i in range(7)]
+
+        def handler(request):
+            # Server caps every page at 3 rows whatever $top asks for.
+            token = int(request.url.params.get("$skiptoken", 0))
+            d = {"results": rows[token:token + 3]}
+            if token + 3 < len(rows):
+                d["__next"] = f"A_Product?$skiptoken={token + 3}"
+            return httpx.Response(200, json={"d": d})
+
+        httpx = _mock_clients(sap, handler, "https://sap.test")
+        assert list(sap.iter_query("materials", page_size=500)) == rows
+        assert _collect(sap.aiter_query("materials", page_size=500)) == rows
+
+    def test_sap_skip_paging_orders_by_key_unless_caller_does(self):
+        from adapters.sap import SAPAdapter
+        sap = SAPAdapter(base_url="https://sap.test")
+        seen = []
+
+        def handler(request):
+            seen.append(request.url.params.get("$orderby"))
+            return httpx.Response(200, json={"d": {"results": []}})
+
+        httpx = _mock_clients(sap, handler, "https://sap.test")
+        list(sap.iter_query("materials"))
+        list(sap.iter_query("customers", **{"$orderby": "CreationDate"}))
+        assert seen == ["Product", "CreationDate"]
+
+    def test_sap_sends_credentials_only_to_its_own_origin(self):
+        from adapters.sap import SAPAdapter
+        httpx = pytest.importorskip("httpx")
+        sap = SAPAdapter(base_url="https://sap.test", username="u", password="p")
+        auth = {}
+
+        def handler(request):
+            auth[request.url.host] = request.headers.get("Authorization")
+            if request.url.host == "sap.test" and "$skiptoken" not in request.url.params:
+                return httpx.Response(200, json={"d": {"results": [{"n": 1}], "__next": "A_Product?$skiptoken=1"}})
+            if request.url.host == "sap.test":
+                return httpx.Response(200, json={"d": {"results": [{"n": 2}], "__next": "https://cdn.other.test/p2"}})
+            return httpx.Response(200, json={"d": {"results": [{"n": 3}]}})
+
+        sap._sync_client = httpx.Client(base_url="https://sap.test", auth=("u", "p"),
+                                        transport=httpx.MockTransport(handler))
+        assert [r["n"] for r in sap.iter_query("materials", prefetch=False)] == [1, 2, 3]
+        assert auth["sap.test"].startswith("Basic ") and auth["cdn.other.test"] is None
+
+    def test_adapters_close_their_clients(self):
+        httpx = pytest.importorskip("httpx")
+        from adapters.hubspot import HubSpotAdapter
+        from adapters.netsuite import NetSuiteAdapter
+        from adapters.sap import SAPAdapter
+        for adapter in (HubSpotAdapter(access_token="t"), SAPAdapter(base_url="https://sap.test")):
+            with adapter:
+                sync = adapter._sync()
+            assert sync.is_closed and adapter._sync_client is None
+            async_client = adapter._client
+            asyncio.run(adapter.aclose())
+            assert async_client.is_closed
+        with NetSuiteAdapter() as ns:
+            sync = ns._sync_client = httpx.Client()
+        assert sync.is_closed and ns._sync_client is None
+
+    def test_netsuite_pages_with_offset_and_signs_query(self):
+        from adapters.netsuite import NetSuiteAdapter
+        ns = NetSuiteAdapter()
+        rows = [{"id": i} for i in range(5)]
+
+        def handler(request):
+            offset, limit = int(request.url.params["offset"]), int(request.url.params["limit"])
+            assert request.headers["Authorization"].startswith("OAuth ")
+            return httpx.Response(200, json={"items": rows[offset:offset + limit],
+                                             "hasMore": offset + limit < len(rows)})
+
+        httpx = _mock_clients(ns, handler, "https://ns.test")
+        assert list(ns.iter_query("SELECT id FROM Customer", page_size=2)) == rows
+
+
+class TestBulkWrites:
+    def test_salesforce_create_many_chunks_and_reports_per_record(self, salesforce):
+        sf, api = salesforce
+
+        def collection(path, body):
+            assert len(body["records"]) <= 200 and body["allOrNone"] is False
+            return 200, [{"success": False, "errors": [{"statusCode": "REQUIRED_FIELD_MISSING"}]}
+                         if not r.get("LastName") else {"success": True, "id": f"00Q{r['LastName']}"}
+                         for r in body["records"]]
+
+        api.routes[("POST", "/services/data/v59.0/composite/sobjects")] = collection
+        records = [{"LastName": str(i), "Company": "BlackRoad"} for i in range(450)]
+        records[7]["LastName"] = ""
+        result = sf.create_many("Lead", records)
+        assert result.calls == 3 and len(api.requests) == 3
+        assert (result.succeeded, result.failed) == (449, 1)
+        assert result.ids[8] == "00Q8" and result.ids[7] is None
+        assert result.errors[7][0]["statusCode"] == "REQUIRED_FIELD_MISSING"
+        assert all(r["attributes"] == {"type": "Lead"} for _, _, body in api.requests for r in body["records"])
+
+    def test_salesforce_update_many_requires_ids_and_fails_whole_chunk_on_http_error(self, salesforce):
+        sf, api = salesforce
+        with pytest.raises(ValueError):
+            sf.update_many("Contact", [{"Email": "x@blackroad.io"}])
+        api.script = [(400, [{"errorCode": "INVALID_FIELD"}])]
+        api.routes[("PATCH", "/services/data/v59.0/composite/sobjects")] = lambda path, body: (
+            200, [{"success": True, "id": r["Id"]} for r in body["records"]])
+        result = sf.update_many("Contact", [{"Id": f"003{i}", "Email": "x"} for i in range(300)], concurrency=1)
+        assert (result.succeeded, result.failed) == (100, 200)
+        assert result.ids[250] == "003250" and "INVALID_FIELD" in result.errors[0][0]["message"]
+
+    def test_salesforce_transport_and_decode_errors_fail_only_their_chunk(self, salesforce):
+        import http.client
+        sf, api = salesforce
+        api.routes[("POST", "/services/data/v59.0/composite/sobjects")] = lambda path, body: (
+            200, [{"success": True, "id": r["LastName"]} for r in body["records"]])
+        api.script = [(200, {"unexpected": "shape"})]
+        send = sf._req
+        calls = []
+
+        def flaky(method, path, body=None):
+            calls.append(body["records"][0]["LastName"])
+            if len(calls) == 2:
+                raise http.client.IncompleteRead(b"[")
+            return send(method, path, body)
+
+        sf._req = flaky
+        result = sf.create_many("Lead", [{"LastName": str(i)} for i in range(450)], concurrency=1)
+        assert (result.succeeded, result.failed) == (50, 400)
+        assert result.ids[449] == "449" and "unexpected" in result.errors[0][0]["message"]
+        assert result.errors[200][0]["type"] == "IncompleteRead"
+
+    def test_hubspot_batch_create_and_update(self):
+        from adapters.hubspot import HubSpotAdapter
+        hs = HubSpotAdapter(access_token="t")
+        calls = []
+
+        def handler(request):
+            body = json.loads(request.content)
+            calls.append((request.url.path, len(body["inputs"])))
+            if request.url.path.endswith("/batch/create"):
+                if any(i["properties"]["email"] == "bad" for i in body["inputs"]):
+                    return httpx.Response(400, json={"message": "Property values were not valid"})
+                results = [{"id": f"c{i['objectWriteTraceId']}", "objectWriteTraceId": i["objectWriteTraceId"]}
+                           for i in reversed(body["inputs"])]
+                return httpx.Response(201, json={"status": "COMPLETE", "results": results})
+            results = [{"id": i["id"]} for i in body["inputs"] if i["id"] != "404"]
+            errors = [{"status": "error", "message": "not found", "context": {"ids": ["404"]}}]
+            return httpx.Response(207, json={"status": "COMPLETE", "results": results, "errors": errors})
+
+        httpx = _mock_clients(hs, handler, "https://api.hubapi.com")
+        records = [{"email": f"u{i}@blackroad.io"} for i in range(250)]
+        records[220]["email"] = "bad"
+        created = asyncio.run(hs.create_many("contacts", records))
+        assert created.calls == 3 and sorted(n for _, n in calls) == [50, 100, 100]
+        assert created.ids[5] == "c5" and (created.succeeded, created.failed) == (200, 50)
+        assert 220 in created.errors and 199 not in created.errors
+
+        updated = asyncio.run(hs.update_many("contacts", [{"id": "1", "email": "a"}, {"id": "404", "email": "b"}]))
+        assert updated.ids == ["1", None] and list(updated.errors) == [1]
+
+    def test_hubspot_bad_batch_body_fails_only_its_chunk(self):
+        from adapters.hubspot import HubSpotAdapter
+        hs = HubSpotAdapter(access_token="t")
+
+        def handler(request):
+            inputs = json.loads(request.content)["inputs"]
+            if inputs[0]["id"] == "3":
+                return httpx.Response(200, text="<html>upstream timeout</html>")
+            # The second input of the first chunk is in neither results nor errors.
+            return httpx.Response(200, json={"status": "COMPLETE", "results": [{"id": inputs[0]["id"]}]})
+
+        httpx = _mock_clients(hs, handler, "https://api.hubapi.com")
+        records = [{"id": str(i), "email": "x"} for i in range(1, 5)]
+        updated = asyncio.run(hs.update_many("contacts", records, chunk_size=2))
+        assert updated.ids[0] == "1" and sorted(updated.errors) == [1, 2, 3]
+        assert updated.errors[1][0]["type"] == "MissingResult"
+        assert (updated.succeeded, updated.failed) == (1, 3)
+
+
+class TestNetSuiteClient:
+    @pytest.fixture
+    def ns(self):
+        from adapters.netsuite import NetSuiteAdapter
+        return NetSuiteAdapter(account="1234-sb1", consumer_key="ck", consumer_secret="c&s",
+                               token="tk", token_secret="ts", concurrency=3)
+
+    def test_signature_verifies_against_oauth_base_string(self, ns):
+        import base64, hashlib, hmac, urllib.parse
+        q = lambda v: urllib.parse.quote(v, safe="")
+        header = ns._oauth_header("POST", ns._suiteql_url, {"limit": 2, "offset": 4})
+        fields = dict(part.split("=", 1) for part in header[len("OAuth "):].split(", "))
+        fields = {k: urllib.parse.unquote(v.strip('"')) for k, v in fields.items()}
+        assert fields["realm"] == "1234_SB1" and fields["oauth_signature_method"] == "HMAC-SHA256"
+        signed = {k: v for k, v in fields.items() if k not in ("realm", "oauth_signature")}
+        signed.update(limit="2", offset="4")
+        base = "&".join(["POST", q(ns._suiteql_url), q("&".join(f"{k}={q(v)}" for k, v in sorted(signed.items())))])
+        expected = base64.b64encode(hmac.new(b"c%26s&ts", base.encode(), hashlib.sha256).digest()).decode()
+        assert fields["oauth_signature"] == expected
+        assert ns._oauth_header("POST", ns._suiteql_url) != ns._oauth_header("POST", ns._suiteql_url)
+
+    def test_one_client_pages_and_query_many(self, ns):
+        httpx = pytest.importorskip("httpx")
+        active = peak = 0
+
+        async def handler(request):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            n = int(json.loads(request.content)["q"].split()[-1])
+            offset, limit = int(request.url.params["offset"]), int(request.url.params["limit"])
+            rows = [{"n": n, "i": i} for i in range(n)]
+            return httpx.Response(200, json={"items": rows[offset:offset + limit], "hasMore": offset + limit < n})
+
+        async def scenario():
+            async with ns:
+                client = ns._client
+                ns._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+                await client.aclose()
+                rows = await ns.query("SELECT 2500")
+                many = await ns.query_many([f"SELECT {n}" for n in (1, 5, 3, 0, 2, 4)])
+                same = ns._client
+            return rows, many, same, ns._client
+
+        rows, many, used, after = asyncio.run(scenario())
+        assert len(rows) == 2500 and rows[-1] == {"n": 2500, "i": 2499}
+        assert [len(r) for r in many] == [1, 5, 3, 0, 2, 4]
+        assert peak <= 3 and used.is_closed and after is None
+
+
 # ── HubSpot ──────────────────────────────────────────────────────────────────
 class TestHubSpotAdapter:
     @pytest.fixture
@@ -0,0 +1,338 @@
+"""Tests for the RFC-0002 reference implementation — AgentMessage and MessageBus"""
+import asyncio
+
+import pytest
+
+from src.agent_message import (
+    AgentMessage, AsyncMessageBus, ExpiryWheel, FrameDecoder, MessageBus, MessageLog, TopicRouter,
+    encode_frame, iter_frames, verify_many,
+)
+
+
+def _msg(topic="tasks.assign", to="agent/octavia-001", **kw):
+    return AgentMessage(from_agent="agent/alice-001", to_agent=to, type="request", topic=topic, **kw)
+
+
+# ── Topic routing ────────────────────────────────────────────────────────────
+class TestTopicRouter:
+    def test_exact_and_wildcards(self):
+        r = TopicRouter()
+        exact, star, hash_ = object(), object(), object()
+        r.add("tasks.assign", exact)
+        r.add("tasks.*", star)
+        r.add("tasks.#", hash_)
+        assert set(r.match("tasks.assign")) == {exact, star, hash_}
+        assert r.match("tasks") == (hash_,)
+        assert r.match("tasks.assign.retry") == (hash_,)
+        assert r.match("memory.store") == ()
+
+    def test_hash_in_middle_matches_zero_segments(self):
+        r = TopicRouter()
+        h = object()
+        r.add("memory.#.done", h)
+        assert r.match("memory.done") == (h,)
+        assert r.match("memory.a.b.done") == (h,)
+        assert r.match("memory.a.b") == ()
+
+    def test_cache_invalidated_on_unsubscribe(self):
+        r = TopicRouter()
+        h = object()
+        r.add("system.*", h)
+        assert r.match("system.health") == (h,)
+        assert r.remove("system.*", h)
+        assert r.match("system.health") == ()
+        assert not r.remove("system.*", h)
+        assert len(r) == 0 and r._root.children == {}
+
+
+class TestMessageBus:
+    def test_wildcard_subscription_delivers(self):
+        bus = MessageBus()
+        got = []
+        bus.subscribe("tasks.*", got.append)
+        assert bus.publish(_msg()) == 1
+        assert got and got[0].topic == "tasks.assign"
+
+    def test_broadcast_reaches_every_subscription(self):
+        bus = MessageBus()
+        got = []
+        bus.subscribe("tasks.assign", got.append)
+        bus.subscribe("memory.#", got.append)
+        assert bus.publish(_msg(to="broadcast")) == 2
+        assert len(got) == 2
+
+
+# ── History ──────────────────────────────────────────────────────────────────
+class TestMessageLog:
+    def test_ring_buffer_evicts_oldest_and_indexes(self):
+        log = MessageLog(capacity=3)
+        msgs = [_msg(topic=f"tasks.t{i % 2}") for i in range(5)]
+        for m in msgs:
+            log.append(m)
+        assert len(log) == 3
+        assert list(log) == msgs[2:]
+        assert log.query("tasks.t0") == [msgs[2], msgs[4]]
+        assert log.query("tasks.t0", limit=1) == [msgs[4]]
+        assert log.query("tasks.t1") == [msgs[3]]
+
+    def test_agent_filters(self):
+        log = MessageLog()
+        a = _msg(to="agent/a")
+        b = _msg(to="agent/b")
+        log.append(a)
+        log.append(b)
+        assert log.query(to_agent="agent/b") == [b]
+        assert log.query(from_agent="agent/alice-001", to_agent="agent/a") == [a]
+        assert log.query(topic="tasks.assign", to_agent="agent/zzz") == []
+
+    def test_time_range(self, monkeypatch):
+        import src.agent_message as am
+        log = MessageLog()
+        msgs = [_msg() for _ in range(3)]
+        for t, m in zip((100.0, 200.0, 300.0), msgs):
+            monkeypatch.setattr(am.time, "time", lambda t=t: t)
+            log.append(m)
+        assert log.query(since=150, until=250) == [msgs[1]]
+        assert log.query(since=200) == msgs[1:]
+
+    def test_age_and_byte_retention(self, monkeypatch):
+        import src.agent_message as am
+        log = MessageLog(max_age=60)
+        monkeypatch.setattr(am.time, "time", lambda: 1000.0)
+        log.append(_msg())
+        monkeypatch.setattr(am.time, "time", lambda: 1100.0)
+        log.append(_msg())
+        assert len(log) == 1
+
+        log = MessageLog(max_bytes=1000)
+        for _ in range(50):
+            log.append(_msg(payload={"blob": "x" * 100}))
+        assert log.nbytes <= 1000 and 0 < len(log) < 50
+
+
+# ── Async bus ────────────────────────────────────────────────────────────────
+class TestAsyncMessageBus:
+    def test_async_and_sync_handlers(self):
+        async def scenario():
+            bus = AsyncMessageBus()
+            got = []
+
+            async def slow(m):
+                await asyncio.sleep(0)
+                got.append(("slow", m.id))
+
+            bus.subscribe("tasks.*", slow)
+            bus.subscribe("tasks.assign", lambda m: got.append(("sync", m.id)))
+            msg = _msg()
+            assert await bus.publish(msg) == 2
+            await bus.close()
+            return got, bus.stats(), msg
+
+        got, stats, msg = asyncio.run(scenario())
+        assert sorted(got) == [("slow", msg.id), ("sync", msg.id)]
+        assert [s["delivered"] for s in stats] == [1, 1]
+
+    def test_drop_policies(self):
+        async def scenario(policy):
+            bus = AsyncMessageBus(maxsize=2, overflow=policy)
+            got = []
+            bus.subscribe("tasks.assign", lambda m: got.append(m.payload["n"]))
+            # No await between publishes, so the worker never runs until join().
+            accepted = [await bus.publish(_msg(payload={"n": n})) for n in range(4)]
+            await bus.close()
+            return accepted, got, bus.stats()[0]
+
+        accepted, got, stats = asyncio.run(scenario("drop_newest"))
+        assert accepted == [1, 1, 0, 0] and got == [0, 1] and stats["dropped"] == 2
+        accepted, got, stats = asyncio.run(scenario("drop_oldest"))
+        assert accepted == [1, 1, 1, 1] and got == [2, 3] and stats["dropped"] == 2
+
+    def test_handler_error_does_not_stop_worker(self):
+        async def scenario():
+            bus = AsyncMessageBus()
+            got = []
+
+            def flaky(m):
+                if m.payload.get("boom"):
+                    raise RuntimeError("boom")
+                got.append(m)
+
+            bus.subscribe("tasks.assign", flaky)
+            await bus.publish(_msg(payload={"boom": True}))
+            await bus.publish(_msg())
+            await bus.close()
+            return got, bus.stats()[0]
+
+        got, stats = asyncio.run(scenario())
+        assert len(got) == 1 and stats["errors"] == 1
+
+
+# ── TTL ──────────────────────────────────────────────────────────────────────
+class TestExpiry:
+    def test_epoch_is_cached_and_tracks_timestamp(self):
+        m = _msg(timestamp="2026-02-23T02:00:00Z")
+        assert m.epoch == 1771812000.0
+        assert m._epoch == ("2026-02-23T02:00:00Z", m.epoch)
+        m.timestamp = "2026-02-23T02:00:10Z"
+        assert m.epoch == 1771812010.0
+        assert m.expires_at == m.epoch + 300
+
+    def test_expired_message_is_not_delivered(self):
+        bus = MessageBus()
+        got = []
+        bus.subscribe("tasks.assign", got.append)
+        assert bus.publish(_msg(timestamp="2020-01-01T00:00:00Z")) == 0
+        assert bus.publish(_msg(timestamp="2020-01-01T00:00:00Z", ttl=None)) == 1
+        assert len(got) == 1 and len(bus.history()) == 1
+
+    def test_sweeper_evicts_from_history(self):
+        bus = MessageBus()
+        short = _msg(ttl=5)
+        bus.publish(short)
+        bus.publish(_msg(ttl=3600))
+        assert bus.expire(short.epoch + 4) == 0
+        assert bus.expire(short.epoch + 7) == 1
+        assert short not in bus._log and len(bus._log) == 1
+
+    def test_wheel_releases_due_items_once(self):
+        wheel = ExpiryWheel(resolution=1.0)
+        wheel.schedule(10.5, "a")
+        wheel.schedule(12.0, "b")
+        wheel.schedule(500.0, "c")
+        assert wheel.advance(10.9) == []
+        assert wheel.advance(11.0) == ["a"]
+        assert wheel.advance(400.0) == ["b"]
+        assert len(wheel) == 1
+
+    def test_async_worker_skips_messages_that_expire_in_queue(self, monkeypatch):
+        import src.agent_message as am
+
+        async def scenario():
+            bus = AsyncMessageBus()
+            got = []
+            bus.subscribe("tasks.assign", got.append)
+            msg = _msg(ttl=5)
+            await bus.publish(msg)
+            monkeypatch.setattr(am.time, "time", lambda: msg.epoch + 10)
+            await bus.close()
+            return got, bus.stats()[0]
+
+        got, stats = asyncio.run(scenario())
+        assert got == [] and stats["expired"] == 1
+
+
+# ── Signing ──────────────────────────────────────────────────────────────────
+class TestSigning:
+    def test_hmac_round_trip_and_tamper(self):
+        m = _msg(payload={"task": "deploy"}).sign("s3cret")
+        assert m.verify("s3cret")
+        assert not m.verify("wrong")
+        m.payload["task"] = "destroy"
+        assert not m.verify("s3cret")
+
+    def test_nested_edit_after_sign_fails_verify(self):
+        m = _msg(payload={"cfg": {"env": "prod"}}).sign("k")
+        m.payload["cfg"]["env"] = "evil"
+        assert not m.verify("k")
+
+    def test_payload_is_shared_with_caller(self):
+        payload = {"task": "deploy"}
+        m = _msg(payload=payload)
+        payload["task"] = "destroy"
+        assert m.payload is payload and m.payload["task"] == "destroy"
+
+    def test_legacy_scheme_matches_original_digest(self):
+        import hashlib, json
+        m = _msg(payload={"x": 1}).sign("GENESIS", scheme="sha256")
+        content = f"{m.id}:{m.from_agent}:{m.to_agent}:{json.dumps({'x': 1}, sort_keys=True)}"
+        assert m.signature == hashlib.sha256(f"GENESIS:{content}".encode()).hexdigest()
+        assert m.verify() and m.verify(scheme="sha256") and not m.verify(scheme="hmac-sha256")
+
+    def test_hmac_signatures_are_tagged_and_picked_by_tag(self):
+        m = _msg(payload={"x": 1}).sign("k")
+        assert m.signature.startswith("hmac-sha256:") and len(m.signature) == 12 + 64
+        assert m.verify("k") and not m.verify("k", scheme="sha256")
+        m.signature = "md5:" + m.signature.split(":", 1)[1]
+        assert not m.verify("k")
+
+    def test_verify_many_preserves_order(self):
+        msgs = [_msg(payload={"n": n}).sign() for n in range(600)]
+        msgs[7].payload["n"] = -1
+        results = verify_many(msgs, chunk=100, workers=4)
+        assert results[7] is False and results.count(True) == 599
+
+
+# ── Wire codec ───────────────────────────────────────────────────────────────
+class TestWireCodec:
+    def test_bytes_round_trip_is_compact(self):
+        m = _msg(payload={"task": "deploy", "n": 3}).sign()
+        raw = m.to_bytes()
+        assert raw.startswith(b'J{"i":')
+        assert len(raw) < len(m.to_json()) * 0.75
+        back = AgentMessage.from_bytes(raw)
+        assert back == m and back.verify()
+
+    def test_msgpack_round_trip(self):
+        pytest.importorskip("msgpack")
+        m = _msg(payload={"blob": "x" * 10})
+        assert AgentMessage.from_bytes(m.to_bytes("msgpack")) == m
+
+    def test_iter_frames_stops_at_partial_frame(self):
+        msgs = [_msg(payload={"n": n}) for n in range(3)]
+        buf = b"".join(encode_frame(m) for m in msgs)
+        assert list(iter_frames(buf)) == msgs
+        assert list(iter_frames(buf[:-1])) == msgs[:2]
+
+    def test_frame_decoder_handles_split_writes(self):
+        msgs = [_msg(payload={"n": n}) for n in range(5)]
+        stream = b"".join(encode_frame(m) for m in msgs)
+        dec = FrameDecoder()
+        out = []
+        for i in range(0, len(stream), 7):
+            out.extend(dec.feed(stream[i:i + 7]))
+        assert out == msgs and dec.pending == 0
+
+    def test_frame_decoder_rejects_oversized_frames(self):
+        dec = FrameDecoder(max_frame=64)
+        with pytest.raises(ValueError, match="max_frame"):
+            dec.feed(b"\xff\xff\xff\xff")
+        assert dec.pending == 4
+
+    def test_frame_decoder_skips_a_bad_frame_after_raising(self):
+        good = [_msg(payload={"n": n}) for n in range(2)]
+        bad = b"X{}"
+        stream = encode_frame(good[0]) + len(bad).to_bytes(4, "big") + bad + encode_frame(good[1])
+        dec = FrameDecoder()
+        with pytest.raises(ValueError):
+            dec.feed(stream)
+        assert dec.feed(b"") == good and dec.pending == 0
+
+    def test_unknown_tag_rejected(self):
+        with pytest.raises(ValueError):
+            AgentMessage.from_bytes(b"X{}")
+
+    def test_message_is_slotted(self):
+        m = _msg()
+        assert not hasattr(m, "__dict__")
+        with pytest.raises(AttributeError):
+            m.extra = 1
+
+    def test_from_wire_adopts_payload_and_fills_absent_fields(self):
+        payload = {"task": "deploy"}
+        m = AgentMessage.from_wire({"f": "a", "t": "b", "y": "event", "p": "tasks.done", "d": payload})
+        assert m.payload is payload
+        assert m.id.startswith("msg_") and m.timestamp.endswith("Z") and m.ttl is None
+        assert m.sign().verify()
+
+
+# ── Benchmark harness ────────────────────────────────────────────────────────
+class TestBenchmarkHarness:
+    def test_quick_run_and_regression_check(self):
+        from tests.bench_agent_message import check, run
+        results = run(only=["codec"], quick=True, repeat=1)
+        assert {r["params"]["codec"] for r in results} == {"json", "wire"}
+        assert all(r["ops_per_sec"] > 0 and r["encoded_bytes"] > 0 for r in results)
+        floors = {r["key"]: r["ops_per_sec"] * 1000 for r in results[:1]}
+        assert check(results, {"min_ops_per_sec": floors}) == [
+            f"{results[0]['key']}: {results[0]['ops_per_sec']:.0f} ops/s < floor {floors[results[0]['key']]:.0f}"]
+        assert check(results, {"min_ops_per_sec": {}}) == []
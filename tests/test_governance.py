@@ -0,0 +1,209 @@
+"""Tests for the compliance scanner — run against local checkouts"""
+import json
+import subprocess
+
+import pytest
+
+import governance
+from governance import LocalBackend, ScanCache, SecretScanner, report, scan_many
+
+# Built at runtime so this file does not trip the scanner itself.
+GH_TOKEN = "ghp_" + "a1B2" * 9
+AWS_KEY = "AKIA" + "IOSFODNN7EXAMPLE"
+
+
+def _git(path, *args):
+    try:
+        return subprocess.run(["git", "-C", str(path), *args], check=True, capture_output=True).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        pytest.skip(f"git not usable: {e}")
+
+
+def _repo(root, org, name, files):
+    path = root / org / name
+    path.mkdir(parents=True)
+    for rel, text in files.items():
+        (path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (path / rel).write_text(text)
+    return path
+
+
+@pytest.fixture
+def fleet(tmp_path):
+    root = tmp_path / "repos"
+    _repo(root, "acme", "good", {"README.md": "# Good", "LICENSE": "MIT", "CODEOWNERS": "* @acme",
+                                 ".github/branch-protection.json": "{}", "app.py": "print('hi')"})
+    _repo(root, "acme", "leaky", {"README.md": "# Leaky", ".env": "X=1", "cfg.py": f"KEY = '{AWS_KEY}'"})
+    return LocalBackend(str(root))
+
+
+class CountingBackend(LocalBackend):
+    def __init__(self, root):
+        super().__init__(root)
+        self.calls = 0
+
+    def tree(self, org, repo):
+        self.calls += 1
+        return super().tree(org, repo)
+
+    def protection(self, org, repo, branch):
+        self.calls += 1
+        return super().protection(org, repo, branch)
+
+    def secrets(self, org, repo):
+        self.calls += 1
+        return super().secrets(org, repo)
+
+
+class TestScanner:
+    def test_policies_evaluated_per_repo(self, fleet):
+        results = scan_many([("acme", "good"), ("acme", "leaky")], fleet, workers=4)
+        status = {(r["repo"], r["policy"]): r["status"] for r in results}
+        assert all(status[("good", p.id)] == "pass" for p in governance.POLICIES)
+        assert {p for (repo, p), s in status.items() if repo == "leaky" and s == "fail"} == \
+            {"BR-001", "BR-002", "BR-003", "BR-004", "BR-005"}
+
+    def test_unknown_repo_reports_errors(self, fleet):
+        results = scan_many([("acme", "missing")], fleet)
+        assert len(results) == len(governance.POLICIES) and {r["status"] for r in results} == {"error"}
+
+    def test_cache_skips_unchanged_repos(self, fleet, tmp_path):
+        backend = CountingBackend(fleet.root)
+        cache = ScanCache(str(tmp_path / "cache.json"))
+        scan_many([("acme", "good"), ("acme", "leaky")], backend, cache=cache)
+        first = backend.calls
+        again = scan_many([("acme", "good"), ("acme", "leaky")], backend, cache=ScanCache(cache.path))
+        assert first == 2 * 3                                  # tree, protection, secrets per repo
+        assert backend.calls == first + 2                      # protection is settings: always re-fetched
+        assert all(r["cached"] == (r["policy"] != "BR-002") for r in again)
+
+        (tmp_path / "repos" / "acme" / "leaky" / ".env").unlink()
+        results = scan_many([("acme", "good"), ("acme", "leaky")], backend, cache=ScanCache(cache.path))
+        assert backend.calls == first + 2 + 4
+        assert next(r for r in results if r["repo"] == "leaky" and r["policy"] == "BR-005")["status"] == "pass"
+
+    def test_branch_protection_is_not_served_from_cache(self, fleet, tmp_path):
+        cache = ScanCache(str(tmp_path / "cache.json"))
+        fleet.head = lambda org, repo: "same-sha"              # settings change, no new commit
+        first = {r["policy"]: r for r in scan_many([("acme", "good")], fleet, cache=cache)}
+        fleet.protection = lambda org, repo, branch: False
+        again = {r["policy"]: r for r in scan_many([("acme", "good")], fleet, cache=cache)}
+        assert first["BR-002"]["status"] == "pass" and again["BR-002"]["status"] == "fail"
+        assert not again["BR-002"]["cached"] and again["BR-003"]["cached"]
+
+    def test_git_head_keys_cache(self, fleet):
+        path = fleet.path("acme", "good")
+        _git(path, "init", "-q")
+        _git(path, "add", "-A")
+        _git(path, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init")
+        assert fleet.head("acme", "good") == _git(path, "rev-parse", "HEAD").decode().strip()
+
+    def test_edits_to_already_modified_files_invalidate_cache(self, fleet, tmp_path):
+        path = tmp_path / "repos" / "acme" / "good"
+        _git(path, "init", "-q")
+        _git(path, "add", "-A")
+        _git(path, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init")
+        cache = ScanCache(str(tmp_path / "cache.json"))
+        br001 = lambda: next(r for r in scan_many([("acme", "good")], fleet, cache=cache) if r["policy"] == "BR-001")
+        (path / "app.py").write_text("print('changed')\n")
+        assert br001()["status"] == "pass"
+        (path / "app.py").write_text(f"KEY = '{AWS_KEY}'\n")       # still just " M app.py"
+        assert br001()["status"] == "fail"
+        (path / "notes.txt").write_text("draft\n")
+        first = fleet.head("acme", "good")
+        (path / "notes.txt").write_text(f"{AWS_KEY}\n")
+        assert fleet.head("acme", "good") != first
+
+    def test_audit_cli_writes_json(self, fleet, tmp_path):
+        out = tmp_path / "report.json"
+        code = governance.audit(["acme", "--local", fleet.root, "--json", str(out), "--cache", ""])
+        data = json.loads(out.read_text())
+        assert code == 1 and data["repos"] == 2 and data["fail"] == 5
+        assert data == {**report(data["results"]), "generated_at": data["generated_at"]}
+        assert data["by_repo"]["acme/leaky"]["worst"] == "critical"
+        assert data["failures_by_severity"] == {"critical": 2, "high": 1, "medium": 2, "low": 0}
+        assert {p["id"]: p["kind"] for p in data["policies"]}["BR-005"] == "path"
+
+
+class TestPolicyEngine:
+    def test_one_fetch_per_data_source(self, fleet):
+        backend = CountingBackend(fleet.root)
+        paths = [governance.PathPolicy(f"T-{i}", f"has {i}", "low", path=f"f{i}") for i in range(10)]
+        results = governance.evaluate_repo(backend, "acme", "good", "sha", paths)
+        assert backend.calls == 1 and {r["status"] for r in results} == {"fail"}
+
+    def test_fail_fast_skips_less_severe_policies(self, fleet):
+        backend = CountingBackend(fleet.root)
+        results = scan_many([("acme", "leaky")], backend, fail_fast="critical")
+        status = {r["policy"]: r["status"] for r in results}
+        assert status["BR-005"] == "fail"                         # cheap tree check runs first
+        assert {s for p, s in status.items() if p != "BR-005"} == {"skipped"}
+        assert backend.calls == 1                                 # no secret scan, no protection lookup
+
+    def test_policy_base_is_abstract(self):
+        with pytest.raises(TypeError):
+            governance.Policy("X-1", "bare", "low")
+
+    def test_register_custom_policy(self, fleet, monkeypatch):
+        monkeypatch.setattr(governance, "POLICIES", list(governance.POLICIES))
+        monkeypatch.setattr(governance, "REGISTRY", dict(governance.REGISTRY))
+        governance.register(governance.PathPolicy("BR-900", "Security policy", "medium", path="SECURITY.md"))
+        with pytest.raises(ValueError):
+            governance.register(governance.PathPolicy("BR-900", "dupe", "medium", path="x"))
+        results = scan_many([("acme", "good")], fleet)
+        assert next(r for r in results if r["policy"] == "BR-900")["status"] == "fail"
+
+
+class TestSecretScanner:
+    @pytest.fixture
+    def checkout(self, tmp_path):
+        return _repo(tmp_path, "acme", "mono", {
+            "src/app.py": f"import os\n\nTOKEN = '{GH_TOKEN}'\n",
+            "deploy/env.yaml": f"aws: {AWS_KEY}\n",
+            "docs/notes.md": "mentions sk- and AKIA but no real key\n",
+            "build/out.js": f"const k = '{GH_TOKEN}'\n",
+            ".gitignore": "build/\n*.log\n",
+            "debug.log": f"{AWS_KEY}\n",
+        })
+
+    def test_finds_each_rule_with_line_numbers(self, checkout):
+        (checkout / "logo.png").write_bytes(b"\x89PNG\0\0" + AWS_KEY.encode())
+        found = SecretScanner(str(checkout)).scan()
+        assert [(f["path"], f["line"], f["rule"]) for f in found] == [
+            ("deploy/env.yaml", 1, "aws_access_key"), ("src/app.py", 3, "github_token")]
+        assert GH_TOKEN not in str(found)
+
+    def test_git_checkout_respects_gitignore(self, checkout):
+        _git(checkout, "init", "-q")
+        _git(checkout, "add", "src", ".gitignore")
+        found = SecretScanner(str(checkout)).scan()
+        assert {f["path"] for f in found} == {"deploy/env.yaml", "src/app.py"}
+
+    def test_incremental_rescans_only_changed_blobs(self, checkout, tmp_path):
+        _git(checkout, "init", "-q")
+        _git(checkout, "add", "-A")
+        state = str(tmp_path / "state.json")
+        scanner = SecretScanner(str(checkout), state)
+        assert len(scanner.scan()) == 2 and scanner.stats["scanned"] == 4
+        assert len(scanner.scan()) == 2 and scanner.stats["scanned"] == 0
+        (checkout / "src" / "app.py").write_text("TOKEN = os.environ['TOKEN']\n")
+        assert len(scanner.scan()) == 1 and scanner.stats["scanned"] == 1
+
+    def test_process_pool_matches_serial(self, checkout):
+        for i in range(40):
+            (checkout / "src" / f"m{i}.py").write_text(("x = 1\n" * i) + (f"t = '{GH_TOKEN}'\n" if i % 7 == 0 else ""))
+        serial = SecretScanner(str(checkout), workers=1).scan()
+        parallel = SecretScanner(str(checkout), workers=2, parallel_threshold=1).scan()
+        assert serial == parallel and len(serial) == 2 + 6
+
+    def test_github_backend_scans_every_file_in_the_tarball(self, checkout, monkeypatch):
+        import tarfile
+
+        def tarball(self, org, repo, dest):
+            with tarfile.open(dest, "w:gz") as tar:
+                tar.add(checkout, arcname=f"{org}-{repo}-abc123")
+
+        monkeypatch.setattr(governance.GitHubBackend, "_tarball", tarball)
+        found = governance.GitHubBackend().secrets("acme", "mono")
+        # Tracked-but-ignored files ship in the tarball too, so they are scanned.
+        assert {f["path"] for f in found} == {"build/out.js", "debug.log", "deploy/env.yaml", "src/app.py"}
@@ -0,0 +1,90 @@
+"""Tests for the durable MessageBus journal"""
+import os
+import time
+
+from src.agent_message import AgentMessage, MessageBus
+from src.message_journal import MessageJournal
+
+
+def _msg(n, topic="tasks.progress", ts="2026-02-23T02:00:00Z"):
+    return AgentMessage(from_agent="agent/alice-001", to_agent="agent/octavia-001", type="event",
+                        topic=topic, payload={"n": n}, timestamp=ts, ttl=None)
+
+
+class TestMessageJournal:
+    def test_append_replay_and_chain(self, tmp_path):
+        with MessageJournal(str(tmp_path)) as j:
+            msgs = [_msg(n) for n in range(10)]
+            for m in msgs:
+                j.append(m)
+            assert list(j.replay()) == msgs
+            assert list(j.replay(from_seq=7)) == msgs[7:]
+            assert list(j.replay(after_id=msgs[4].id)) == msgs[5:]
+            assert j.verify_chain()
+
+    def test_segments_and_sparse_index_seek(self, tmp_path):
+        with MessageJournal(str(tmp_path), segment_bytes=2_000, index_every=4) as j:
+            msgs = [_msg(n, ts=f"2026-02-23T02:{n:02d}:00Z") for n in range(60)]
+            for m in msgs:
+                j.append(m)
+            assert len([f for f in os.listdir(tmp_path) if f.endswith(".log")]) > 3
+            assert list(j.replay(from_seq=33)) == msgs[33:]
+            since = msgs[41].epoch
+            assert list(j.replay(since=since)) == msgs[41:]
+            assert list(j.replay(after_id=msgs[2].id))[0] == msgs[3]
+
+    def test_interval_sync_without_further_appends(self, tmp_path, monkeypatch):
+        synced = []
+        fsync = os.fsync
+        monkeypatch.setattr(os, "fsync", lambda fd: (synced.append(fd), fsync(fd)))
+        with MessageJournal(str(tmp_path), sync_every=1_000, sync_interval=0.01) as j:
+            j.append(_msg(0))
+            j.append(_msg(1))                     # both buffered: neither threshold hit yet
+            deadline = time.monotonic() + 2
+            while j._unsynced and time.monotonic() < deadline:
+                time.sleep(0.005)
+            assert j._unsynced == 0 and synced
+            assert (tmp_path / f"{0:020d}.log").read_bytes().count(b"\n") == 2
+
+    def test_seek_by_id_in_sealed_segments(self, tmp_path):
+        msgs = [_msg(n) for n in range(80)]
+        with MessageJournal(str(tmp_path), segment_bytes=1_500) as j:
+            for m in msgs:
+                j.append(m)
+            sealed = sorted(f for f in os.listdir(tmp_path) if f.endswith(".ids"))[0]
+            lines = (tmp_path / sealed).read_bytes().splitlines()
+            assert lines == sorted(lines, key=lambda l: l.rsplit(b" ", 2)[0])
+            for n in (0, 17, 41, 79):
+                assert j._find_id(msgs[n].id) == n
+            assert j._find_id("msg_missing") is None
+        (tmp_path / sealed).write_bytes(b"\n".join(reversed(lines)) + b"\n")   # as sealed by older versions
+        with MessageJournal(str(tmp_path), segment_bytes=1_500) as j:
+            assert j._find_id(msgs[3].id) == 3
+
+    def test_recovers_after_torn_write(self, tmp_path):
+        j = MessageJournal(str(tmp_path), segment_bytes=2_000)
+        msgs = [_msg(n) for n in range(20)]
+        for m in msgs:
+            j.append(m)
+        j.close()
+        tail = sorted(f for f in os.listdir(tmp_path) if f.endswith(".log"))[-1]
+        with open(tmp_path / tail, "ab") as f:
+            f.write(b'{"n":20,"h":"dead')
+        with MessageJournal(str(tmp_path), segment_bytes=2_000) as j2:
+            assert len(j2) == 20
+            extra = _msg(20)
+            assert j2.append(extra) == 20
+            assert list(j2.replay()) == msgs + [extra]
+            assert j2.verify_chain()
+
+    def test_bus_replays_journal_to_late_subscriber(self, tmp_path):
+        with MessageJournal(str(tmp_path)) as journal:
+            bus = MessageBus(journal=journal)
+            bus.publish(_msg(0, topic="tasks.assign"))
+            bus.publish(_msg(1, topic="memory.store"))
+            bus.publish(_msg(2, topic="tasks.done"))
+
+        restarted = MessageBus(journal=MessageJournal(str(tmp_path)))
+        got = []
+        assert restarted.replay("tasks.*", got.append) == 2
+        assert [m.payload["n"] for m in got] == [0, 2]
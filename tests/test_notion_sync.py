@@ -0,0 +1,376 @@
+"""Tests for the Notion doc sync — run against an in-memory fake of the Notion API"""
+import itertools
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("notion_client")
+
+from src.notion_client import (  # noqa: E402
+    BlackRoadNotionClient, RateLimitedClient, SyncManifest, TokenBucket, iter_md_blocks,
+)
+
+
+class FakeNotion:
+    """Just enough of notion_client.Client for BlackRoadNotionClient."""
+
+    def __init__(self):
+        self.pages: dict[str, dict] = {}
+        self.blocks: dict[str, list] = {}
+        self.calls: list[str] = []
+        self.failures: dict[str, list[Exception]] = {}
+        self.lock = threading.Lock()
+        self._ids = (f"id{n}" for n in itertools.count())
+        fake = self
+
+        class Pages:
+            def create(self, parent, properties, children=()):
+                fake.calls.append("pages.create")
+                fake.fail("pages.create")
+                pid = next(fake._ids)
+                fake.pages[pid] = {"properties": properties, "archived": False}
+                fake.blocks[pid] = [{"id": next(fake._ids), **b} for b in children]
+                return {"id": pid}
+
+            def update(self, page_id, properties=None, archived=None):
+                fake.calls.append("pages.update")
+                fake.fail("pages.update")
+                if page_id not in fake.pages:
+                    raise FakeAPIError(404, code="object_not_found")
+                if properties is not None:
+                    fake.pages[page_id]["properties"] = properties
+                if archived is not None:
+                    fake.pages[page_id]["archived"] = archived
+
+        class Children:
+            def list(self, block_id, start_cursor=None, page_size=100):
+                fake.calls.append("blocks.children.list")
+                blocks = fake.blocks[block_id]
+                start = int(start_cursor or 0)
+                more = start + page_size < len(blocks)
+                return {"results": list(blocks[start:start + page_size]), "has_more": more,
+                        "next_cursor": str(start + page_size) if more else None}
+
+            def append(self, block_id, children, after=None):
+                fake.calls.append("blocks.children.append")
+                created = [{"id": next(fake._ids), **b} for b in children]
+                blocks = fake.blocks[block_id]
+                at = len(blocks) if after is None else [b["id"] for b in blocks].index(after) + 1
+                blocks[at:at] = created
+                return {"results": created}
+
+        class Blocks:
+            children = Children()
+
+            def update(self, block_id, **body):
+                fake.calls.append("blocks.update")
+                for blocks in fake.blocks.values():
+                    for b in blocks:
+                        if b["id"] == block_id:
+                            b.update(body)
+
+            def delete(self, block_id):
+                fake.calls.append("blocks.delete")
+                fake.fail("blocks.delete")
+                with fake.lock:
+                    for blocks in fake.blocks.values():
+                        blocks[:] = [b for b in blocks if b["id"] != block_id]
+
+        class Databases:
+            def query(self, database_id, filter):
+                fake.calls.append("databases.query")
+                title = filter["title"]["equals"]
+                return {"results": [{"id": pid} for pid, p in fake.pages.items()
+                                    if p["properties"]["Name"]["title"][0]["text"]["content"] == title
+                                    and not p["archived"]]}
+
+        self.databases = Databases()
+        self.pages_api = Pages()
+        self.blocks_api = Blocks()
+
+    def fail(self, endpoint: str) -> None:
+        queued = self.failures.get(endpoint)
+        if queued:
+            raise queued.pop(0)
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status, retry_after=None, code=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.code = code
+        self.headers = {"retry-after": retry_after} if retry_after is not None else {}
+
+
+@pytest.fixture
+def notion():
+    client = BlackRoadNotionClient.__new__(BlackRoadNotionClient)
+    fake = FakeNotion()
+    client.client = type("Client", (), {"databases": fake.databases, "pages": fake.pages_api,
+                                         "blocks": fake.blocks_api})()
+    client.db_id = "db"
+    client.token = "t"
+    return client, fake
+
+
+class TestIncrementalSync:
+    def test_unchanged_files_are_skipped(self, notion, tmp_path):
+        client, fake = notion
+        docs = tmp_path / "repo"
+        docs.mkdir()
+        (docs / "README.md").write_text("# Readme\nhello\n")
+        (docs / "GOVERNANCE.md").write_text("# Governance\nrules\n")
+        manifest = SyncManifest(str(tmp_path / "m.json"))
+        assert client.sync_repo_docs(str(docs), "gov", manifest=manifest) == 2
+        fake.calls.clear()
+        manifest = SyncManifest(str(tmp_path / "m.json"))
+        assert client.sync_repo_docs(str(docs), "gov", manifest=manifest) == 0
+        assert fake.calls == []
+
+    def test_pages_from_older_converter_are_resynced(self, notion, tmp_path):
+        client, fake = notion
+        docs = tmp_path / "repo"
+        docs.mkdir()
+        (docs / "README.md").write_text("# Readme\nhello\n")
+        manifest = SyncManifest(str(tmp_path / "m.json"))
+        client.sync_repo_docs(str(docs), "gov", manifest=manifest)
+        del manifest.entries["gov:README.md"]["converter"]   # as written before versioning
+        assert client.sync_repo_docs(str(docs), "gov", manifest=manifest) == 1
+        assert client.sync_repo_docs(str(docs), "gov", manifest=manifest) == 0
+
+    def test_changed_file_updates_by_page_id_without_lookup(self, notion, tmp_path):
+        client, fake = notion
+        docs = tmp_path / "repo"
+        docs.mkdir()
+        (docs / "README.md").write_text("# Readme\nhello\n")
+        manifest = SyncManifest(str(tmp_path / "m.json"))
+        client.sync_repo_docs(str(docs), "gov", manifest=manifest)
+        fake.calls.clear()
+        (docs / "README.md").write_text("# Readme\nhello again\n")
+        assert client.sync_repo_docs(str(docs), "gov", manifest=manifest) == 1
+        assert "databases.query" not in fake.calls and "pages.create" not in fake.calls
+
+    def test_removed_file_archives_page(self, notion, tmp_path):
+        client, fake = notion
+        docs = tmp_path / "repo"
+        docs.mkdir()
+        (docs / "OLD.md").write_text("# Old\n")
+        manifest = SyncManifest(str(tmp_path / "m.json"))
+        client.sync_repo_docs(str(docs), "gov", manifest=manifest)
+        page_id = manifest.get("gov:OLD.md")["page_id"]
+        (docs / "OLD.md").unlink()
+        client.sync_repo_docs(str(docs), "gov", manifest=manifest)
+        assert fake.pages[page_id]["archived"] and manifest.get("gov:OLD.md") is None
+
+    def test_transient_error_on_known_page_does_not_create_duplicate(self, notion, tmp_path):
+        client, fake = notion
+        docs = tmp_path / "repo"
+        docs.mkdir()
+        (docs / "README.md").write_text("# Readme\n")
+        manifest = SyncManifest(str(tmp_path / "m.json"))
+        client.sync_repo_docs(str(docs), "gov", manifest=manifest)
+        (docs / "README.md").write_text("# Renamed\n")
+        fake.failures["pages.update"] = [FakeAPIError(503)]
+        assert client.sync_repo_docs(str(docs), "gov", manifest=manifest) == 0
+        assert len(fake.pages) == 1 and client.last_report.failed == 1
+
+    def test_page_deleted_in_notion_is_looked_up_again(self, notion, tmp_path):
+        client, fake = notion
+        docs = tmp_path / "repo"
+        docs.mkdir()
+        (docs / "README.md").write_text("# Readme\n")
+        manifest = SyncManifest(str(tmp_path / "m.json"))
+        client.sync_repo_docs(str(docs), "gov", manifest=manifest)
+        del fake.pages[manifest.get("gov:README.md")["page_id"]]
+        (docs / "README.md").write_text("# Readme\nmore\n")
+        assert client.sync_repo_docs(str(docs), "gov", manifest=manifest) == 1
+        assert manifest.get("gov:README.md")["page_id"] in fake.pages
+
+
+def _wrap(client, rate=1000.0, **kwargs):
+    client.client = RateLimitedClient(client.client, TokenBucket(rate, capacity=rate), **kwargs)
+    return client
+
+
+class TestConcurrentSync:
+    def test_token_bucket_paces_to_rate(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+        t0 = time.monotonic()
+        for _ in range(11):
+            bucket.acquire()
+        assert time.monotonic() - t0 >= 0.18
+
+    def test_retries_429_honouring_retry_after(self, notion, tmp_path):
+        client, fake = notion
+        _wrap(client, backoff=0.001)
+        fake.failures["pages.create"] = [FakeAPIError(429, retry_after="0.01"), FakeAPIError(429)]
+        docs = tmp_path / "repo"
+        docs.mkdir()
+        (docs / "README.md").write_text("# Readme\n")
+        manifest = SyncManifest(str(tmp_path / "m.json"))
+        assert client.sync_repo_docs(str(docs), "gov", manifest=manifest) == 1
+        report = client.last_report.summary()
+        assert report["retries"] == 2 and report["calls"]["pages.create"]["calls"] == 3
+
+    def test_5xx_is_retried_only_on_idempotent_calls(self, notion, tmp_path):
+        client, fake = notion
+        _wrap(client, backoff=0.001)
+        docs = tmp_path / "repo"
+        docs.mkdir()
+        (docs / "README.md").write_text("# Readme\n")
+        manifest = SyncManifest(str(tmp_path / "m.json"))
+        fake.failures["pages.create"] = [FakeAPIError(503)]
+        assert client.sync_repo_docs(str(docs), "gov", manifest=manifest) == 0
+        assert client.last_report.retries == 0 and len(fake.pages) == 0
+        assert client.sync_repo_docs(str(docs), "gov", manifest=manifest) == 1
+        (docs / "README.md").write_text("# Readme\nmore\n")
+        fake.failures["pages.update"] = [FakeAPIError(502)]
+        assert client.sync_repo_docs(str(docs), "gov", manifest=manifest) == 1
+        assert client.last_report.retries == 1 and len(fake.pages) == 1
+
+    def test_client_errors_are_not_retried_and_count_as_failed(self, notion, tmp_path):
+        client, fake = notion
+        _wrap(client)
+        fake.failures["pages.create"] = [FakeAPIError(400)]
+        docs = tmp_path / "repo"
+        docs.mkdir()
+        (docs / "A.md").write_text("# A\n")
+        (docs / "B.md").write_text("# B\n")
+        seen = []
+        manifest = SyncManifest(str(tmp_path / "m.json"))
+        assert client.sync_repo_docs(str(docs), "gov", manifest=manifest,
+                                     progress=lambda key, outcome: seen.append(outcome)) == 1
+        report = client.last_report
+        assert (report.synced, report.failed, report.retries) == (1, 1, 0)
+        assert sorted(seen) == ["failed", "synced"] and len(report.errors) == 1
+
+    def test_files_sync_concurrently(self, notion, tmp_path):
+        client, fake = notion
+        active, peak = 0, 0
+        lock = threading.Lock()
+        create = fake.pages_api.create
+
+        def slow_create(*args, **kwargs):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+            return create(*args, **kwargs)
+
+        fake.pages_api.create = slow_create
+        docs = tmp_path / "repo"
+        docs.mkdir()
+        for i in range(16):
+            (docs / f"D{i}.md").write_text(f"# Doc {i}\n")
+        manifest = SyncManifest(str(tmp_path / "m.json"))
+        assert client.sync_repo_docs(str(docs), "gov", manifest=manifest, workers=8) == 16
+        assert peak > 1 and len(manifest.keys_for("gov")) == 16
+
+    def test_existing_blocks_are_all_deleted_on_update(self, notion, tmp_path):
+        client, fake = notion
+        _wrap(client)
+        client.diff_blocks = False
+        docs = tmp_path / "repo"
+        docs.mkdir()
+        (docs / "README.md").write_text("# Readme\n" + "".join(f"line {i}\n" for i in range(20)))
+        manifest = SyncManifest(str(tmp_path / "m.json"))
+        client.sync_repo_docs(str(docs), "gov", manifest=manifest)
+        (docs / "README.md").write_text("# Readme\nshort\n")
+        client.sync_repo_docs(str(docs), "gov", manifest=manifest)
+        page_id = manifest.get("gov:README.md")["page_id"]
+        assert len(fake.blocks[page_id]) == 2
+        assert client.last_report.summary()["calls"]["blocks.delete"]["calls"] == 21
+
+    def test_failed_block_delete_fails_the_file_and_keeps_old_hash(self, notion, tmp_path):
+        client, fake = notion
+        _wrap(client)
+        client.diff_blocks = False
+        docs = tmp_path / "repo"
+        docs.mkdir()
+        (docs / "README.md").write_text("# Readme\nold\n")
+        manifest = SyncManifest(str(tmp_path / "m.json"))
+        client.sync_repo_docs(str(docs), "gov", manifest=manifest)
+        first = manifest.get("gov:README.md")["hash"]
+        (docs / "README.md").write_text("# Readme\nnew\n")
+        fake.failures["blocks.delete"] = [FakeAPIError(400)]
+        assert client.sync_repo_docs(str(docs), "gov", manifest=manifest) == 0
+        assert client.last_report.failed == 1 and manifest.get("gov:README.md")["hash"] == first
+        assert client.sync_repo_docs(str(docs), "gov", manifest=manifest) == 1
+        page_id = manifest.get("gov:README.md")["page_id"]
+        assert _texts(fake, page_id) == ["Readme", "new"]
+
+
+def _texts(fake, page_id):
+    return [b[b["type"]]["rich_text"][0]["text"]["content"] for b in fake.blocks[page_id]]
+
+
+class TestBlockDiff:
+    @pytest.fixture
+    def page(self, notion):
+        client, fake = notion
+        lines = ["# Spec"] + [f"para {i}" for i in range(30)]
+        page_id = client.upsert_page("Spec", "\n".join(lines))
+        fake.calls.clear()
+        return client, fake, page_id, lines
+
+    def test_one_line_edit_is_one_update(self, page):
+        client, fake, page_id, lines = page
+        lines[10] = "para ten, edited"
+        client.upsert_page("Spec", "\n".join(lines), page_id=page_id)
+        assert fake.calls == ["pages.update", "blocks.children.list", "blocks.update"]
+        assert _texts(fake, page_id) == [l.lstrip("# ") for l in lines]
+
+    def test_insert_and_delete_keep_order(self, page):
+        client, fake, page_id, lines = page
+        lines.insert(5, "## New section")
+        del lines[20]
+        client.upsert_page("Spec", "\n".join(lines), page_id=page_id)
+        assert _texts(fake, page_id) == [l.lstrip("# ") for l in lines]
+        assert fake.calls.count("blocks.delete") == 1 and fake.calls.count("blocks.children.append") == 1
+
+    def test_new_leading_block_falls_back_to_rewrite(self, page):
+        client, fake, page_id, lines = page
+        lines.insert(0, "preamble")
+        client.upsert_page("Spec", "\n".join(lines), page_id=page_id)
+        assert _texts(fake, page_id) == [l.lstrip("# ") for l in lines]
+
+    def test_children_are_listed_past_first_hundred(self, notion):
+        client, fake = notion
+        page_id = client.upsert_page("Big", "x")
+        fake.blocks[page_id] += [{"id": f"extra{i}", "type": "paragraph",
+                                  "paragraph": {"rich_text": [{"text": {"content": f"old {i}"}}]}}
+                                 for i in range(250)]
+        assert len(list(client._list_children(page_id))) == 251
+        client.upsert_page("Big", "x", page_id=page_id)
+        assert _texts(fake, page_id) == ["x"]
+
+
+class TestMarkdownConversion:
+    def test_block_types(self):
+        md = ["# Title", "#### Deep", "1. one", "2) two", "- bullet", "> quoted", "---",
+              "```py", "x = 1", "", "y = 2", "```", "plain"]
+        blocks = list(iter_md_blocks(md))
+        assert [b["type"] for b in blocks] == [
+            "heading_1", "heading_3", "numbered_list_item", "numbered_list_item",
+            "bulleted_list_item", "quote", "divider", "code", "paragraph"]
+        code = blocks[7]["code"]
+        assert code["language"] == "python" and code["rich_text"][0]["text"]["content"] == "x = 1\n\ny = 2"
+
+    def test_long_text_is_split_at_notion_limits(self):
+        (block,) = iter_md_blocks(["x" * 4500])
+        assert [len(rt["text"]["content"]) for rt in block["paragraph"]["rich_text"]] == [2000, 2000, 500]
+        code = list(iter_md_blocks(["```", "y" * 250_000, "```"]))
+        assert len(code) == 2 and len(code[0]["code"]["rich_text"]) == 100
+
+    def test_large_file_is_uploaded_in_batches(self, notion, tmp_path):
+        client, fake = notion
+        doc = tmp_path / "RFC.md"
+        doc.write_text("# RFC\n" + "".join(f"line {i}\n" for i in range(249)))
+        page_id = client.upsert_page("RFC", doc)
+        assert len(fake.blocks[page_id]) == 250
+        assert fake.calls.count("pages.create") == 1 and fake.calls.count("blocks.children.append") == 2
+        assert _texts(fake, page_id)[-1] == "line 248"
@@ -0,0 +1,62 @@
+"""Tests for the multi-process shared-memory MessageBus"""
+import multiprocessing as mp
+import sys
+
+import pytest
+
+from src.agent_message import AgentMessage
+from src.process_bus import ProcessMessageBus
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="fork + POSIX shared memory")
+
+
+def _msg(topic, n):
+    return AgentMessage(from_agent="agent/alice-001", to_agent="agent/octavia-001",
+                        type="event", topic=topic, payload={"n": n})
+
+
+class TestProcessMessageBus:
+    def test_per_topic_order_preserved_across_workers(self):
+        out = mp.get_context("fork").Queue()
+        bus = ProcessMessageBus(workers=3, ring_bytes=4096)
+        bus.subscribe("tasks.*", lambda m: out.put((m.topic, m.payload["n"])))
+        bus.start()
+        topics = [f"tasks.t{i}" for i in range(5)]
+        for n in range(200):
+            assert bus.publish(_msg(topics[n % 5], n)) == 1
+        final = bus.close()
+        got = [out.get(timeout=5) for _ in range(200)]
+        assert sum(s["delivered"] for s in final) == 200
+        for t in topics:
+            seq = [n for topic, n in got if topic == t]
+            assert seq == sorted(seq) and len(seq) == 40
+
+    def test_unmatched_topic_not_sent_and_errors_counted(self):
+        bus = ProcessMessageBus(workers=1)
+
+        def boom(m):
+            raise RuntimeError("boom")
+
+        bus.subscribe("system.health", boom)
+        bus.start()
+        assert bus.publish(_msg("memory.store", 0)) == 0
+        assert bus.publish(_msg("system.health", 1)) == 1
+        final = bus.close()
+        assert final[0]["errors"] == 1 and final[0]["delivered"] == 0
+
+    def test_subscribe_after_start_rejected(self):
+        with ProcessMessageBus(workers=1) as bus:
+            with pytest.raises(RuntimeError):
+                bus.subscribe("tasks.assign", print)
+
+    def test_publish_and_close_do_not_hang_on_dead_worker(self):
+        import os
+
+        bus = ProcessMessageBus(workers=1, ring_bytes=4096)
+        bus.subscribe("tasks.*", lambda m: os._exit(1))
+        bus.start()
+        with pytest.raises(RuntimeError, match="exited"):
+            for n in range(100):
+                bus.publish(AgentMessage(from_agent="agent/alice-001", to_agent="agent/octavia-001",
+                                         type="event", topic="tasks.t", payload={"pad": "x" * 500, "n": n}))
+        assert bus.close(timeout=1)[0]["alive"] is False
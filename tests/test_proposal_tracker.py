@@ -0,0 +1,176 @@
+"""Tests for the governance proposal tracker"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+import src.proposal_tracker as pt
+from src.proposal_tracker import GovernanceStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    with GovernanceStore(str(tmp_path / "gov.db")) as s:
+        yield s
+
+
+class TestGovernanceStore:
+    def test_wal_and_single_connection_per_thread(self, store):
+        con = store.connection()
+        assert con.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert con.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert store.connection() is con
+
+    def test_create_vote_list(self, store):
+        assert store.create_proposal("RFC-0005", "Mesh quotas", "body")
+        assert not store.create_proposal("RFC-0005", "dupe", "body")
+        assert store.vote("RFC-0005") and store.vote("RFC-0005", yes=False)
+        assert not store.vote("RFC-9999")
+        row = store.get("RFC-0005")
+        assert (row.title, row.status, row.votes_yes, row.votes_no) == ("Mesh quotas", "draft", 1, 1)
+
+    def test_threads_get_their_own_connections(self, store):
+        store.create_proposal("RFC-0006", "Threads", "")
+
+        def worker():
+            for _ in range(50):
+                store.vote("RFC-0006")
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert store.get("RFC-0006").votes_yes == 200
+        assert len(store._conns) == 5
+
+
+class TestVoteLedger:
+    def test_revote_changes_instead_of_double_counting(self, store):
+        store.create_proposal("RFC-0010", "Ledger", "")
+        assert store.vote("RFC-0010", True, voter="agent/alice")
+        assert not store.vote("RFC-0010", True, voter="agent/alice")
+        assert store.vote("RFC-0010", False, voter="agent/alice")
+        assert store.get("RFC-0010")[4:6] == (0, 1)
+        assert store.retract_vote("RFC-0010", "agent/alice")
+        assert store.get("RFC-0010")[4:6] == (0, 0)
+
+    def test_vote_many_single_transaction(self, store):
+        store.create_proposal("RFC-0011", "Bulk", "")
+        votes = [("RFC-0011", f"agent/{i}", i % 3 != 0) for i in range(3000)]
+        votes += [("RFC-0011", "agent/0", True), ("RFC-9999", "agent/x", True)]
+        assert store.vote_many(votes) == 3001
+        yes, no = store.get("RFC-0011")[4:6]
+        assert (yes, no) == (2001, 999)
+        store.connection().execute("UPDATE proposals SET votes_yes = 0, votes_no = 0")
+        store.recompute_tallies()
+        assert store.get("RFC-0011")[4:6] == (2001, 999)
+
+    def test_legacy_counters_backfilled(self, tmp_path):
+        import sqlite3
+        path = str(tmp_path / "old.db")
+        con = sqlite3.connect(path)
+        con.execute(pt.SCHEMA)
+        con.execute("INSERT INTO proposals VALUES ('RFC-0001','Old','x','draft','',3,2,'2026-01-01')")
+        con.commit()
+        con.close()
+        with GovernanceStore(path) as s:
+            assert len(s.votes("RFC-0001")) == 5
+            s.recompute_tallies()
+            s.vote("RFC-0001", True, voter="agent/new")
+            assert s.get("RFC-0001")[4:6] == (4, 2)
+
+
+class TestProposalQueries:
+    def _seed(self, store, n=25):
+        con = store.connection()
+        with con:
+            con.executemany(pt.SQL_INSERT, [
+                (f"RFC-{i:04d}", f"P{i}", "alice" if i % 2 else "bob",
+                 "accepted" if i % 5 == 0 else "draft", "", f"2026-01-{1 + i // 3:02d}T00:00:00")
+                for i in range(n)])
+
+    def test_keyset_pages_cover_everything_once(self, store):
+        self._seed(store)
+        page = store.query(limit=10)
+        assert len(page.rows) == 10 and page.next_cursor
+        seen = [r.id for r in store.iter_proposals(page_size=7)]
+        assert len(seen) == 25 == len(set(seen))
+        created = [store.get(i).created_at for i in seen]
+        assert created == sorted(created, reverse=True)
+
+    def test_filters(self, store):
+        self._seed(store)
+        assert {r.id for r in store.query(status="accepted").rows} == {"RFC-0000", "RFC-0005", "RFC-0010",
+                                                                        "RFC-0015", "RFC-0020"}
+        assert all(r.author == "bob" for r in store.iter_proposals(author="bob", page_size=3))
+        rows = store.query(since="2026-01-02", until="2026-01-03").rows
+        assert sorted(r.id for r in rows) == ["RFC-0003", "RFC-0004", "RFC-0005"]
+
+    def test_status_query_uses_index(self, store):
+        plan = store.connection().execute(
+            "EXPLAIN QUERY PLAN " + pt.SQL_COLUMNS + " WHERE status = ? ORDER BY created_at DESC, id DESC LIMIT 5",
+            ("draft",)).fetchall()
+        assert "idx_proposals_status" in " ".join(str(r) for r in plan)
+
+
+class TestModuleFunctions:
+    def test_cli_functions_share_one_store(self, tmp_path, monkeypatch, capsys):
+        monkeypatch.setattr(pt, "DB_PATH", str(tmp_path / "cli.db"))
+        pt.create_proposal("RFC-0007", "CLI", "")
+        pt.vote("RFC-0007")
+        pt.list_proposals()
+        assert "RFC-0007: CLI  YES:1 NO:0" in capsys.readouterr().out
+        assert pt.get_store() is pt.get_store()
+        pt.get_store().close()
+
+
+class TestAsyncGovernanceStore:
+    def test_concurrent_writes_are_group_committed(self, tmp_path):
+        async def scenario():
+            async with pt.AsyncGovernanceStore(str(tmp_path / "async.db")) as store:
+                assert await store.create("RFC-0020", "Async", "body")
+                results = await asyncio.gather(*(store.vote("RFC-0020", i % 4 != 0, voter=f"agent/{i}")
+                                                 for i in range(400)))
+                row = await store.get("RFC-0020")
+                page = await store.list(status="draft")
+                return results, row, page, store.commits
+
+        results, row, page, commits = asyncio.run(scenario())
+        assert all(results)
+        assert (row.votes_yes, row.votes_no) == (300, 100)
+        assert [r.id for r in page.rows] == ["RFC-0020"]
+        assert commits < 100
+
+    def test_failed_request_only_fails_its_caller(self, tmp_path):
+        async def scenario():
+            async with pt.AsyncGovernanceStore(str(tmp_path / "async.db")) as store:
+                await store.create("RFC-0021", "Async", "")
+                ok, bad = await asyncio.gather(store.vote("RFC-0021", voter="agent/a"),
+                                               store.vote_many([("RFC-0021", "agent/b")]), return_exceptions=True)
+                return ok, bad, await store.get("RFC-0021")
+
+        ok, bad, row = asyncio.run(scenario())
+        assert ok is True and isinstance(bad, Exception)
+        assert row.votes_yes == 1
+
+    def test_close_does_not_block_the_event_loop(self, tmp_path):
+        async def scenario():
+            store = pt.AsyncGovernanceStore(str(tmp_path / "async.db"))
+            slow = asyncio.ensure_future(store._read(lambda: time.sleep(0.3)))
+            await asyncio.sleep(0.05)
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+            ticker = asyncio.ensure_future(tick())
+            await store.close()
+            ticker.cancel()
+            await slow
+            return ticks
+
+        assert asyncio.run(scenario()) > 5